@@ -1,8 +1,45 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
 from fastmcp import FastMCP
 from logging_config import setup_logging
+from gcp import clients, concurrency, lazy, metrics
+from gcp.inventory import store as inventory_store
 
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(server):
+    """
+    Starts the background inventory collection and the import of the
+    Google client libraries, if configured, and on shutdown stops them,
+    stops the worker pool running blocking GCP calls and closes the
+    shared GCP clients (and their channels / HTTP sessions) and the
+    inventory database.
+    """
+    from gcp.inventory.collector import start_background_collection
+
+    collection = start_background_collection()
+    warming = None
+    if lazy.WARM_UP:
+        # Not awaited: the server accepts connections while it runs.
+        warming = asyncio.create_task(concurrency.run_blocking(lazy.warm_up))
+    try:
+        yield
+    finally:
+        if warming is not None:
+            warming.cancel()
+        if collection is not None:
+            collection.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await collection
+        # Waits for the running calls without blocking the event loop.
+        await asyncio.to_thread(concurrency.shutdown)
+        clients.close_all()
+        inventory_store.close()
+
+
 mcp = FastMCP(
     name="GCPMCPServer",
     instructions="""
@@ -12,8 +49,17 @@ mcp = FastMCP(
         Use this MCP server if you need to interact with the user's GCP
         organization and gather information about it.
     """,
+    lifespan=lifespan,
+    tool_serializer=metrics.timed_serializer,
 )
+mcp.add_middleware(metrics.MetricsMiddleware())
 
 from gcp.storage import buckets
 from gcp.compute import firewalls
 from gcp.compute import instances
+from gcp.resourcemanager import projects
+from gcp.iam import policy
+from gcp import cache_tools
+from gcp.inventory import collector
+from gcp.inventory import query
+from gcp.inventory import diff
@@ -0,0 +1,88 @@
+"""
+Measures server cold start in fresh interpreters: the time to import the
+server with every tool registered, to list the tool schemas, and then to
+import the Google client libraries that are deferred until first use.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --max-seconds 6
+
+Fails (exit status 1) when a deferred library was imported at startup,
+or when the median time to list the tools exceeds --max-seconds.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFERRED_LIBRARIES = (
+    "google.cloud.compute_v1",
+    "google.cloud.storage",
+    "google.cloud.resourcemanager_v3",
+)
+
+CHILD = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import main
+from app import mcp
+imported = time.perf_counter()
+tools = asyncio.run(mcp.get_tools())
+listed = time.perf_counter()
+
+from gcp import lazy
+loaded = [name for name in {libraries!r} if lazy.is_loaded(name)]
+lazy.warm_up()
+warmed = time.perf_counter()
+
+print(json.dumps({{
+    "import_s": imported - started,
+    "list_tools_s": listed - started,
+    "warm_up_s": warmed - listed,
+    "tools": len(tools),
+    "loaded_at_startup": loaded,
+}}))
+"""
+
+
+def run_once() -> dict:
+    child = CHILD.format(libraries=DEFERRED_LIBRARIES)
+    completed = subprocess.run(
+        [sys.executable, "-c", child], capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    for metric in ("import_s", "list_tools_s", "warm_up_s"):
+        values = [run[metric] for run in runs]
+        print(
+            f"{metric:<14} median {statistics.median(values):6.2f}s "
+            f"min {min(values):6.2f}s max {max(values):6.2f}s"
+        )
+    print(f"tools          {runs[0]['tools']}")
+
+    failures = sorted({name for run in runs for name in run["loaded_at_startup"]})
+    if failures:
+        print(f"FAIL imported at startup: {', '.join(failures)}", file=sys.stderr)
+    median = statistics.median(run["list_tools_s"] for run in runs)
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(
+            f"FAIL startup took {median:.2f}s, more than {args.max_seconds}s",
+            file=sys.stderr,
+        )
+        failures.append("max_seconds")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Benchmarks every tool of gcp/compute, gcp/storage and gcp/iam against the
+in-process fake GCP backend (gcp.fakes), through an in-memory MCP client,
+so argument validation, the middleware and result serialization are
+measured along with the tool itself.
+
+Each tool is measured cold (caches cleared before every call, so each
+call reaches the fake API) and warm, reporting throughput, p50 / p99
+latency, API requests per call and the peak memory allocated by one cold
+call.
+
+    python -m benchmarks.bench_tools --firewalls 10000 --buckets 5000
+    python -m benchmarks.bench_tools --output baseline.json
+    python -m benchmarks.bench_tools --baseline baseline.json --tolerance 0.25
+
+With --baseline, exits with status 1 when a p50 or p99 latency regressed
+by more than tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARKED_PACKAGES = ("gcp.compute.", "gcp.storage.", "gcp.iam.")
+
+
+def benchmark_cases(fake) -> dict:
+    """Returns the arguments each benchmarked tool is called with."""
+    from gcp.fakes import ORGANIZATION, ZONES
+
+    project_id = fake.project_ids[0]
+    bucket_name = f"{project_id}-bucket-00001"
+    return {
+        "list_firewall_rules": {"project_id": project_id},
+        "list_firewall_rules_per_vpc": {"project_id": project_id, "vpc_name": "vpc-1"},
+        "describe_firewall_rule": {"project_id": project_id, "rule_name": "fw-00001"},
+        "describe_firewall_rules": {
+            "project_id": project_id,
+            "rule_names": [f"fw-{number:05d}" for number in range(0, 60, 2)],
+        },
+        "unsafe_ssh_exposure": {"project_id": project_id},
+        "unsafe_ssh_exposure_across_projects": {"parent": ORGANIZATION},
+        "list_exposed_ports": {"project_id": project_id, "ports": [22, 3389, 5432]},
+        "list_gcp_instances": {"project_id": project_id, "status": "RUNNING"},
+        "list_gcp_instances_across_projects": {"parent": ORGANIZATION},
+        "describe_gcp_instance": {
+            "instance_name": "vm-00001",
+            "project_id": project_id,
+            "zone": ZONES[1],
+        },
+        "describe_gcp_instances": {
+            "project_id": project_id,
+            "instance_names": [f"vm-{number:05d}" for number in range(30)],
+        },
+        "list_gcs_buckets": {"project_id": project_id},
+        "list_gcs_buckets_across_projects": {"parent": ORGANIZATION},
+        "describe_gcs_bucket": {"project_id": project_id, "bucket_name": bucket_name},
+        "describe_gcs_buckets": {
+            "project_id": project_id,
+            "bucket_names": [
+                f"{project_id}-bucket-{number:05d}" for number in range(30)
+            ],
+        },
+        "is_ubla_enabled_in_bucket": {
+            "project_id": project_id,
+            "bucket_name": bucket_name,
+        },
+        "is_bucket_public": {"project_id": project_id, "bucket_name": bucket_name},
+        "scan_bucket_posture": {"project_id": project_id},
+        "list_project_iam": {"project_id": project_id},
+        "find_project_owners": {"project_id": project_id},
+        "find_project_owners_across_projects": {"parent": ORGANIZATION},
+        "get_effective_iam_policy": {"project_id": project_id},
+        "query_iam_bindings": {"parent": ORGANIZATION, "role": "roles/owner"},
+        "find_external_iam_members": {
+            "internal_domains": ["example.com"],
+            "parent": ORGANIZATION,
+        },
+    }
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def measure(client, name: str, arguments: dict, args, fake, cold: bool) -> dict:
+    from gcp.cache import response_cache
+
+    async def call():
+        started = time.perf_counter()
+        await client.call_tool(name, arguments)
+        return time.perf_counter() - started
+
+    if not cold:
+        await call()
+
+    latencies = []
+    requests_before = sum(fake.requests.values())
+    started = time.perf_counter()
+    for _ in range(0, args.iterations, args.concurrency):
+        if cold:
+            response_cache.clear()
+        batch = min(args.concurrency, args.iterations - len(latencies))
+        latencies.extend(await asyncio.gather(*(call() for _ in range(batch))))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "api_requests": round(
+            (sum(fake.requests.values()) - requests_before) / len(latencies), 2
+        ),
+    }
+
+
+async def peak_memory(client, name: str, arguments: dict) -> int:
+    from gcp.cache import response_cache
+
+    response_cache.clear()
+    tracemalloc.start()
+    try:
+        await client.call_tool(name, arguments)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+async def run(args) -> dict:
+    from fastmcp import Client
+    import main  # noqa: F401 - registers the routes along with the tools
+    from app import mcp
+    from gcp.fakes import FakeGcp
+
+    # One INFO event per GCP call would flood stderr.
+    logging.getLogger().setLevel(logging.WARNING)
+
+    fake = FakeGcp(
+        projects=args.projects,
+        folders=args.folders,
+        firewalls=args.firewalls,
+        instances=args.instances,
+        buckets=args.buckets,
+        bindings=args.bindings,
+        latency=args.latency,
+    )
+    cases = benchmark_cases(fake)
+    tools = await mcp.get_tools()
+    missing = sorted(
+        name
+        for name, tool in tools.items()
+        if tool.fn.__module__.startswith(BENCHMARKED_PACKAGES) and name not in cases
+    )
+    if missing:
+        raise SystemExit(f"No benchmark case for: {', '.join(missing)}")
+
+    selected = [name for name in cases if not args.tools or name in args.tools]
+    results = {}
+    with fake:
+        # Generates every project's resources up front, outside the timings.
+        for project_id in fake.project_ids:
+            fake.project(project_id)
+
+        async with Client(mcp) as client:
+            for name in selected:
+                for mode in ("cold", "warm"):
+                    result = await measure(
+                        client, name, cases[name], args, fake, mode == "cold"
+                    )
+                    if mode == "cold":
+                        memory = await peak_memory(client, name, cases[name])
+                        result["peak_memory_kb"] = round(memory / 1024)
+                    results[f"{name}/{mode}"] = result
+                    print(format_row(f"{name}/{mode}", result), flush=True)
+
+    return {"parameters": vars(args), "results": results}
+
+
+def format_row(case: str, result: dict) -> str:
+    memory = result.get("peak_memory_kb")
+    return (
+        f"{case:<48} {result['throughput']:>10.1f}/s "
+        f"p50 {result['p50_ms']:>9.2f}ms p99 {result['p99_ms']:>9.2f}ms "
+        f"{result['api_requests']:>7.1f} req"
+        + ("" if memory is None else f" {memory:>8} KiB")
+    )
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """Lists the cases whose p50 or p99 grew by more than tolerance."""
+    found = []
+    for case, previous in baseline["results"].items():
+        current = results["results"].get(case)
+        if current is None:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                found.append(
+                    f"{case} {metric}: {previous[metric]} -> {current[metric]}"
+                )
+
+    return found
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--folders", type=int, default=1)
+    parser.add_argument("--firewalls", type=int, default=1000)
+    parser.add_argument("--instances", type=int, default=1000)
+    parser.add_argument("--buckets", type=int, default=500)
+    parser.add_argument("--bindings", type=int, default=50)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per fake API request"
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--tools", nargs="*", help="only benchmark these tools")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with a previous --output")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Set before the server is imported: a throwaway inventory, so no real
+    # snapshot answers for the fake projects, and no client-side rate
+    # limiting, which would measure the limiter instead of the tools.
+    os.environ["GCP_MCP_INVENTORY_PATH"] = os.path.join(
+        tempfile.mkdtemp(prefix="gcp-mcp-bench-"), "inventory.sqlite3"
+    )
+    for service in ("COMPUTE", "STORAGE", "RESOURCEMANAGER"):
+        os.environ.setdefault(f"GCP_MCP_RATE_LIMIT_{service}", "1000000")
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_MAX_SIZE = 1024
+
+# The fallback marks of the cached call in progress: a list shared with
+# the worker threads it runs logic on (run_blocking copies the context,
+# not the list), which mark_uncacheable appends to.
+_fallbacks = contextvars.ContextVar("gcp_mcp_cache_fallbacks", default=None)
+
+
+class ResponseCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after a
+    per-entry TTL. Keys are (tool_name, arguments) tuples so entries can
+    be invalidated per tool or per project.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+
+    def get(self, key):
+        """Returns (True, value) for a live entry, (False, None) otherwise."""
+        tool_name = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits[tool_name] += 1
+                    return True, value
+                del self._entries[key]
+            self._misses[tool_name] += 1
+            return False, None
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(
+        self, tool_name: str | None = None, project_id: str | None = None
+    ) -> int:
+        """
+        Drops every entry matching tool_name and/or project_id (both None
+        drops everything) and returns how many entries were removed.
+        """
+        with self._lock:
+            doomed = [
+                key
+                for key in self._entries
+                if (tool_name is None or key[0] == tool_name)
+                and (project_id is None or ("project_id", project_id) in key[1])
+            ]
+            for key in doomed:
+                del self._entries[key]
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = sorted(set(self._hits) | set(self._misses))
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "tools": {
+                    tool: {"hits": self._hits[tool], "misses": self._misses[tool]}
+                    for tool in tools
+                },
+            }
+
+
+response_cache = ResponseCache(
+    max_size=int(os.environ.get("GCP_MCP_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE))
+)
+
+
+def cached(ttl: float):
+    """
+    A decorator that caches a tool's result in response_cache for ttl
+    seconds, keyed by the tool name and its arguments.
+
+    If the decorated function has a "refresh" parameter, calling it with
+    refresh=True skips the cached entry and stores the fresh result.
+
+    Results are not cached when a GCP error was turned into an empty
+    fallback while computing them (see mark_uncacheable), so a missing
+    permission or a mistyped project isn't remembered for ttl seconds.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def lookup(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            refresh = arguments.pop("refresh", False)
+            key = (func.__name__, freeze_arguments(arguments))
+            if refresh:
+                return key, False, None
+
+            found, value = response_cache.get(key)
+            if found:
+                logger.debug("tool_cache_hit", tool=func.__name__)
+            return key, found, value
+
+        def store(key, value, fallbacks):
+            if fallbacks:
+                # Not cached, nor is the call this one is part of.
+                logger.debug("tool_cache_skipped_fallback", tool=func.__name__)
+                mark_uncacheable()
+            else:
+                response_cache.set(key, value, ttl)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key, found, value = lookup(args, kwargs)
+                if found:
+                    return value
+
+                fallbacks = []
+                token = _fallbacks.set(fallbacks)
+                try:
+                    value = await func(*args, **kwargs)
+                finally:
+                    _fallbacks.reset(token)
+                store(key, value, fallbacks)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key, found, value = lookup(args, kwargs)
+            if found:
+                return value
+
+            fallbacks = []
+            token = _fallbacks.set(fallbacks)
+            try:
+                value = func(*args, **kwargs)
+            finally:
+                _fallbacks.reset(token)
+            store(key, value, fallbacks)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def mark_uncacheable():
+    """
+    Keeps the result of the cached call in progress, if any, out of
+    response_cache. Called by handle_gcp_exceptions when it returns an
+    empty fallback instead of raising, and by listings that came back
+    incomplete.
+    """
+    fallbacks = _fallbacks.get()
+    if fallbacks is not None:
+        fallbacks.append(True)
+
+
+def freeze_arguments(arguments: dict) -> tuple:
+    return tuple(
+        sorted((name, _freeze_value(value)) for name, value in arguments.items())
+    )
+
+
+def _freeze_value(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze_value(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return tuple(sorted(_freeze_value(v) for v in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(v) for v in value)
+    return value
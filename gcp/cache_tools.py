@@ -0,0 +1,47 @@
+from app import mcp
+from gcp.cache import response_cache
+from gcp.inventory.store import expire_snapshots
+from gcp.singleflight import in_flight
+
+
+@mcp.tool()
+def invalidate_cache(project_id: str | None = None, tool_name: str | None = None) -> dict:
+    """
+    Drops cached tool results so the next call fetches fresh data from
+    Google Cloud. Use this tool when the user says something changed
+    recently, or when cached data looks stale.
+
+    Without tool_name, the project's inventory snapshots (see
+    refresh_inventory) are expired too, so the tools stop answering from
+    them until the next collection. With tool_name, only that tool's
+    cached results are dropped: tools may still answer from a fresh
+    inventory snapshot.
+
+    Individual list tools also accept refresh=True to bypass the cache
+    and the inventory for a single call.
+
+    Args:
+        project_id: only drop cached results for this project. Optional.
+        tool_name: only drop cached results of this tool, e.g.
+        "list_firewall_rules". Optional.
+        With neither argument every cached result is dropped.
+
+    Returns:
+        A dict with the number of cache entries that were removed
+        ("invalidated") and of inventory snapshots that were expired
+        ("expired_snapshots").
+    """
+    removed = response_cache.invalidate(tool_name=tool_name, project_id=project_id)
+    expired = 0 if tool_name else expire_snapshots(project_id)
+    return {"invalidated": removed, "expired_snapshots": expired}
+
+
+@mcp.tool()
+def cache_stats() -> dict:
+    """
+    Returns the size of the tool result cache, the hit/miss counters of
+    every cached tool, and per GCP call how many calls were executed and
+    how many were coalesced into an identical call already in flight
+    ("single_flight").
+    """
+    return {**response_cache.stats(), "single_flight": in_flight.stats()}
@@ -0,0 +1,97 @@
+import threading
+import structlog
+from gcp import metrics, throttling
+
+logger = structlog.get_logger(__name__)
+
+_lock = threading.Lock()
+_clients = {}
+_overrides = {}
+
+
+def get_client(factory, **kwargs):
+    """
+    Returns a long-lived client built by factory(**kwargs), creating it
+    on first use and reusing it (and its channel / HTTP session) on every
+    call after that.
+
+    Clients are keyed by factory and keyword arguments, so
+    storage.Client(project="a") and storage.Client(project="b") are
+    kept apart while every caller asking for the same one shares it.
+
+    Args:
+        factory: the client class, e.g. compute_v1.FirewallsClient.
+        kwargs: keyword arguments passed to the factory, e.g. project
+        or credentials. Values must be hashable.
+    """
+    key = (factory, tuple(sorted(kwargs.items())))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            builder = _overrides.get(factory, factory)
+            client = builder(**kwargs)
+            metrics.instrument_client(client, _service(factory))
+            throttling.throttle_client(client, _service(factory))
+            _clients[key] = client
+            logger.info(
+                "gcp_client_created",
+                client=getattr(factory, "__name__", repr(factory)),
+                kwargs=sorted(kwargs),
+            )
+
+    return client
+
+
+def _service(factory) -> str:
+    # e.g. "google.cloud.compute_v1.services.firewalls.client" -> "compute"
+    module = getattr(factory, "__module__", "") or ""
+    for service in ("compute", "storage", "resourcemanager"):
+        if service in module:
+            return service
+    return module or "unknown"
+
+
+def override_client(factory, builder):
+    """
+    Makes get_client(factory, ...) return builder(...) instead of a real
+    client. Meant for tests and local fakes; already cached clients for
+    factory are closed so the override takes effect immediately.
+    """
+    with _lock:
+        _overrides[factory] = builder
+        _close_matching(lambda key: key[0] is factory)
+
+
+def clear_overrides():
+    """Removes every override registered with override_client."""
+    with _lock:
+        factories = set(_overrides)
+        _overrides.clear()
+        _close_matching(lambda key: key[0] in factories)
+
+
+def close_all():
+    """Closes and forgets every cached client. Called on server shutdown."""
+    with _lock:
+        _close_matching(lambda key: True)
+
+
+def _close_matching(predicate):
+    for key in [key for key in _clients if predicate(key)]:
+        _close(_clients.pop(key))
+
+
+def _close(client):
+    # storage.Client exposes close(); the GAPIC clients only release their
+    # transport through the context manager protocol.
+    try:
+        if hasattr(client, "close"):
+            client.close()
+        else:
+            client.__exit__(None, None, None)
+    except Exception as e:
+        logger.warning("gcp_client_close_failed", error=str(e))
@@ -0,0 +1,180 @@
+import heapq
+import ipaddress
+from collections import defaultdict
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+ALL_PORTS = (0, 65535)
+
+# Firewall rules may name a protocol by its IANA number instead of its name.
+PROTOCOL_NUMBERS = {
+    "1": "icmp",
+    "6": "tcp",
+    "17": "udp",
+    "132": "sctp",
+}
+
+# The protocols whose rules can name ports; rules for the others (icmp,
+# esp, ah, ...) allow the protocol as a whole, with no port to expose.
+PORT_PROTOCOLS = ("tcp", "udp", "sctp", "all")
+
+# A source range at least this broad that is not private address space is
+# treated as "the internet" when no explicit source prefix is asked for.
+BROAD_PREFIX_LENGTH = {4: 8, 6: 32}
+
+# Ingress rules that set none of these sources apply to every source.
+DEFAULT_SOURCE_RANGES = ("0.0.0.0/0",)
+
+
+def parse_port_intervals(ports: list) -> list:
+    """
+    Parses firewall port specs ("22", "8000-8080") into inclusive
+    (low, high) intervals, skipping invalid ones. An empty list means
+    every port.
+    """
+    if not ports:
+        return [ALL_PORTS]
+
+    intervals = []
+    for port in ports:
+        low, _, high = str(port).partition("-")
+        try:
+            interval = (int(low), int(high or low))
+        except ValueError:
+            logger.warning("firewall_port_spec_invalid", port=port)
+            continue
+        if ALL_PORTS[0] <= interval[0] <= interval[1] <= ALL_PORTS[1]:
+            intervals.append(interval)
+        else:
+            logger.warning("firewall_port_spec_invalid", port=port)
+
+    return intervals
+
+
+def normalize_protocol(protocol: str) -> str:
+    protocol = protocol.lower()
+    return PROTOCOL_NUMBERS.get(protocol, protocol)
+
+
+def parse_networks(ranges) -> list:
+    """Parses CIDR strings into ipaddress networks, skipping invalid ones."""
+    networks = []
+    for source_range in ranges:
+        try:
+            networks.append(ipaddress.ip_network(source_range, strict=False))
+        except ValueError:
+            continue
+
+    return networks
+
+
+def is_internet_range(network) -> bool:
+    return (
+        not network.is_private
+        and network.prefixlen <= BROAD_PREFIX_LENGTH[network.version]
+    )
+
+
+class ExposureIndex:
+    """
+    An interval index over the enabled ingress allow rules of a project,
+    given as FirewallRule records.
+
+    Every allowed (protocol, port range) becomes an interval, so a single
+    sweep over the sorted intervals answers "which rules expose these
+    ports over this protocol to these sources" for any number of ports.
+    Deny rules and rule priorities are not evaluated.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self._networks = {}
+        self._intervals = defaultdict(list)
+
+        for position, rule in enumerate(rules):
+            if rule.disabled or rule.direction != "INGRESS":
+                continue
+
+            source_ranges = rule.source_ranges
+            if not (source_ranges or rule.source_tags or rule.source_service_accounts):
+                source_ranges = DEFAULT_SOURCE_RANGES
+            self._networks[position] = parse_networks(source_ranges)
+
+            for allowed in rule.allowed:
+                protocol = normalize_protocol(allowed.ip_protocol)
+                for low, high in parse_port_intervals(allowed.ports):
+                    self._intervals[protocol].append((low, high, position))
+
+        for intervals in self._intervals.values():
+            intervals.sort()
+
+    def exposed_ports(
+        self, ports: list, protocol: str = "tcp", sources: list | None = None
+    ) -> dict:
+        """
+        Returns {port: [(rule, matching_source_ranges), ...]} for every
+        requested port.
+
+        Args:
+            ports: the port numbers to check.
+            protocol: the IP protocol, e.g. "tcp" or "udp". Rules
+            allowing "all" protocols always match. "all" checks the
+            protocols with ports (tcp, udp and sctp), so a rule allowing
+            icmp doesn't count as exposing every port.
+            sources: CIDR prefixes the traffic comes from. A rule matches
+            when one of its source ranges overlaps one of them. When
+            None, a rule matches when it allows a broad, non-private
+            source range such as 0.0.0.0/0, 0.0.0.0/1 or ::/0.
+        """
+        matching_sources = self._matching_sources(sources)
+        protocol = normalize_protocol(protocol)
+        if protocol == "all":
+            streams = [self._intervals.get(name, []) for name in PORT_PROTOCOLS]
+        else:
+            streams = [
+                self._intervals.get(protocol, []),
+                self._intervals.get("all", []),
+            ]
+        intervals = heapq.merge(*streams)
+
+        results = {}
+        active = []
+        pending = next(intervals, None)
+        for port in sorted(set(ports)):
+            while pending is not None and pending[0] <= port:
+                heapq.heappush(active, (pending[1], pending[2]))
+                pending = next(intervals, None)
+            while active and active[0][0] < port:
+                heapq.heappop(active)
+
+            positions = sorted(
+                {position for _, position in active if position in matching_sources}
+            )
+            results[port] = [
+                (self.rules[position], matching_sources[position])
+                for position in positions
+            ]
+
+        return results
+
+    def _matching_sources(self, sources: list | None) -> dict:
+        matches = _source_matcher(sources)
+        matching = {}
+        for position, networks in self._networks.items():
+            matched = [str(network) for network in networks if matches(network)]
+            if matched:
+                matching[position] = matched
+
+        return matching
+
+
+def _source_matcher(sources: list | None):
+    if sources is None:
+        return is_internet_range
+
+    prefixes = parse_networks(sources)
+    return lambda network: any(
+        network.version == prefix.version and network.overlaps(prefix)
+        for prefix in prefixes
+    )
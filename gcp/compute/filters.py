@@ -0,0 +1,86 @@
+import re
+
+# Compute API list filters, so GCP only returns (and we only transfer and
+# parse) the matching resources. They use the regular expression ("eq")
+# syntax: every parenthesized expression must match, and values are RE2
+# patterns matched against the whole field. The "=" syntax can't be used
+# as zones and networks can only be matched against the end of their URL.
+
+# Names matched by one list filter, and its length in characters; longer
+# batches take several calls.
+MAX_FILTER_NAMES = 100
+MAX_FILTER_LENGTH = 4000
+
+
+def instances_filter(
+    zone: str | None = None,
+    region: str | None = None,
+    status: str | None = None,
+    labels: dict[str, str] | None = None,
+    name_prefix: str | None = None,
+) -> str:
+    """The filter of instances matching every given criterion."""
+    expressions = []
+    if zone:
+        expressions.append(f"(zone eq .*/zones/{re.escape(zone)})")
+    if region:
+        expressions.append(f"(zone eq .*/zones/{re.escape(region)}-[a-z]+)")
+    if status:
+        expressions.append(f"(status eq {re.escape(status.upper())})")
+    for key, value in sorted((labels or {}).items()):
+        expressions.append(f"(labels.{key} eq {re.escape(value)})")
+    if name_prefix:
+        expressions.append(_name_prefix(name_prefix))
+
+    return " ".join(expressions)
+
+
+def firewalls_filter(
+    network: str | None = None,
+    direction: str | None = None,
+    disabled: bool | None = None,
+    name_prefix: str | None = None,
+) -> str:
+    """
+    The filter of firewall rules matching every given criterion; network
+    is the VPC network name, e.g. "default".
+    """
+    expressions = []
+    if network:
+        expressions.append(f"(network eq .*/networks/{re.escape(network)})")
+    if direction:
+        expressions.append(f"(direction eq {re.escape(direction.upper())})")
+    if disabled is not None:
+        expressions.append(f"(disabled eq {str(disabled).lower()})")
+    if name_prefix:
+        expressions.append(_name_prefix(name_prefix))
+
+    return " ".join(expressions)
+
+
+def name_filter(names: list) -> str:
+    """The filter of resources named any of names."""
+    return f"(name eq {'|'.join(re.escape(name) for name in names)})"
+
+
+def name_filters(names: list):
+    """
+    Yields the name filters matching names in batches, each of at most
+    MAX_FILTER_NAMES names and MAX_FILTER_LENGTH characters.
+    """
+    batch, length = [], len(name_filter([]))
+    for name in names:
+        escaped = len(re.escape(name)) + 1
+        if batch and (
+            len(batch) == MAX_FILTER_NAMES or length + escaped > MAX_FILTER_LENGTH
+        ):
+            yield name_filter(batch)
+            batch, length = [], len(name_filter([]))
+        batch.append(name)
+        length += escaped
+    if batch:
+        yield name_filter(batch)
+
+
+def _name_prefix(prefix: str) -> str:
+    return f"(name eq {re.escape(prefix)}.*)"
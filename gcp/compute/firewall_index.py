@@ -0,0 +1,234 @@
+import functools
+from collections import defaultdict
+from gcp.cache import response_cache
+from gcp.clients import get_client
+from gcp.compute.exposure import ExposureIndex
+from gcp.compute.filters import firewalls_filter
+from gcp.inventory.store import snapshot_rows
+from gcp.lazy import lazy_import
+from gcp.pagination import MAX_PAGE_SIZE
+from gcp.records import FirewallRule
+from gcp.singleflight import single_flight
+from gcp.throttling import throttled
+
+compute_v1 = lazy_import("google.cloud.compute_v1")
+
+FIREWALL_SNAPSHOT_TTL = 60
+SNAPSHOT_CACHE_NAME = "firewall_snapshot"
+FILTERED_CACHE_NAME = "firewall_filtered"
+
+
+class FirewallIndex:
+    """
+    An in-memory snapshot of every firewall rule in a project, indexed by
+    name, network, direction, protocol/port, source range and target tag
+    so firewall questions are answered with dictionary lookups instead of
+    re-listing the project.
+    """
+
+    def __init__(self, rules):
+        # Rules come from the API, or as dicts from the inventory.
+        self.rules = [
+            FirewallRule.from_dict(rule)
+            if isinstance(rule, dict)
+            else FirewallRule.from_proto(rule)
+            for rule in rules
+        ]
+        self._by_name = {}
+        self._by_network = defaultdict(set)
+        self._by_direction = defaultdict(set)
+        self._by_protocol = defaultdict(set)
+        self._by_port = defaultdict(set)
+        self._by_source_range = defaultdict(set)
+        self._by_target_tag = defaultdict(set)
+        self._enabled = set()
+
+        for position, rule in enumerate(self.rules):
+            self._by_name[rule.name] = position
+            self._by_network[rule.network.split("/")[-1]].add(position)
+            self._by_direction[rule.direction].add(position)
+            for allowed in rule.allowed:
+                protocol = allowed.ip_protocol
+                self._by_protocol[protocol].add(position)
+                # A rule without ports allows every port of its protocol.
+                for port in allowed.ports or [None]:
+                    self._by_port[(protocol, port)].add(position)
+            for source_range in rule.source_ranges:
+                self._by_source_range[source_range].add(position)
+            for target_tag in rule.target_tags:
+                self._by_target_tag[target_tag].add(position)
+            if not rule.disabled:
+                self._enabled.add(position)
+
+    def __len__(self):
+        return len(self.rules)
+
+    @functools.cached_property
+    def exposure(self) -> ExposureIndex:
+        """The port/source interval index, built on first use."""
+        return ExposureIndex(self.rules)
+
+    def get(self, name: str) -> FirewallRule | None:
+        position = self._by_name.get(name)
+        return None if position is None else self.rules[position]
+
+    def query(
+        self,
+        network: str | None = None,
+        direction: str | None = None,
+        protocol: str | None = None,
+        port: str | None = None,
+        source_range: str | None = None,
+        target_tag: str | None = None,
+        include_disabled: bool = True,
+    ) -> list:
+        """
+        Returns the rules matching every given criterion, in listing order.
+
+        Args:
+            network: the VPC network name, e.g. "default".
+            direction: "INGRESS" or "EGRESS".
+            protocol: an IP protocol, e.g. "tcp". Rules allowing "all"
+            protocols match any protocol.
+            port: a port spec as written in the rule, e.g. "22". Only
+            used together with protocol. Rules without ports match.
+            source_range: a source CIDR as written in the rule.
+            target_tag: a network tag the rule applies to.
+            include_disabled: whether disabled rules are returned.
+        """
+        candidates = []
+        if network is not None:
+            candidates.append(self._by_network.get(network, set()))
+        if direction is not None:
+            candidates.append(self._by_direction.get(direction, set()))
+        if protocol is not None:
+            candidates.append(self._protocol_matches(protocol, port))
+        if source_range is not None:
+            candidates.append(self._by_source_range.get(source_range, set()))
+        if target_tag is not None:
+            candidates.append(self._by_target_tag.get(target_tag, set()))
+        if not include_disabled:
+            candidates.append(self._enabled)
+
+        if not candidates:
+            return list(self.rules)
+
+        candidates.sort(key=len)
+        positions = set(candidates[0]).intersection(*candidates[1:])
+        return [self.rules[position] for position in sorted(positions)]
+
+    def _protocol_matches(self, protocol: str, port: str | None) -> set:
+        if port is None:
+            return self._by_protocol.get(protocol, set()) | self._by_protocol.get(
+                "all", set()
+            )
+        return (
+            self._by_port.get((protocol, port), set())
+            | self._by_port.get((protocol, None), set())
+            | self._by_port.get(("all", None), set())
+        )
+
+
+@single_flight
+def get_firewall_index(project_id: str, refresh: bool = False) -> FirewallIndex:
+    """
+    Returns the FirewallIndex of a project, listing its firewall rules
+    only when there is no snapshot younger than FIREWALL_SNAPSHOT_TTL
+    seconds, or when refresh is True. A fresh inventory snapshot of the
+    project (see gcp.inventory) is used instead of listing when present.
+
+    Snapshots live in the shared response cache, so invalidate_cache
+    also drops them.
+    """
+    if not refresh:
+        index = cached_firewall_index(project_id, inventory=True)
+        if index is not None:
+            return index
+
+    index = FirewallIndex(list_firewalls(project_id))
+    response_cache.set(_snapshot_key(project_id), index, FIREWALL_SNAPSHOT_TTL)
+
+    return index
+
+
+def find_firewall_rules(
+    project_id: str,
+    network: str | None = None,
+    direction: str | None = None,
+    disabled: bool | None = None,
+    name_prefix: str | None = None,
+    refresh: bool = False,
+) -> list:
+    """
+    Returns the project's rules matching every given criterion (see
+    gcp.compute.filters.firewalls_filter), in listing order.
+
+    They are looked up in the project's snapshot when one is cached or
+    in the inventory. Otherwise only the matching rules are listed, as
+    Compute Engine applies the filter, and cached for
+    FIREWALL_SNAPSHOT_TTL seconds apart from the snapshot, since they
+    are only part of the project's rules.
+    """
+    index = None if refresh else cached_firewall_index(project_id, inventory=True)
+    if index is None:
+        expression = firewalls_filter(network, direction, disabled, name_prefix)
+        key = (
+            FILTERED_CACHE_NAME,
+            (("project_id", project_id), ("filter", expression)),
+        )
+        found, rules = (False, None) if refresh else response_cache.get(key)
+        if not found:
+            rules = [
+                FirewallRule.from_proto(rule)
+                for rule in list_firewalls(project_id, expression)
+            ]
+            response_cache.set(key, rules, FIREWALL_SNAPSHOT_TTL)
+        return list(rules)
+
+    return [
+        rule
+        for rule in index.query(
+            network=network,
+            direction=direction and direction.upper(),
+            include_disabled=disabled is not False,
+        )
+        if (disabled is None or rule.disabled == disabled)
+        and rule.name.startswith(name_prefix or "")
+    ]
+
+
+@throttled("compute")
+def list_firewalls(project_id: str, expression: str = "") -> list:
+    """Lists the project's firewall rules matching a list filter expression."""
+    client = get_client(compute_v1.FirewallsClient)
+    request = compute_v1.ListFirewallsRequest(
+        project=project_id, filter=expression, max_results=MAX_PAGE_SIZE
+    )
+    return list(client.list(request=request))
+
+
+def cached_firewall_index(
+    project_id: str, inventory: bool = False
+) -> FirewallIndex | None:
+    """
+    Returns the project's snapshot if one is cached, without listing.
+    With inventory, a fresh inventory snapshot of the project is indexed
+    (and cached) when there is none.
+    """
+    key = _snapshot_key(project_id)
+    found, index = response_cache.get(key)
+    if found:
+        return index
+
+    if inventory:
+        rules = snapshot_rows("firewalls", project_id)
+        if rules is not None:
+            index = FirewallIndex(rules)
+            response_cache.set(key, index, FIREWALL_SNAPSHOT_TTL)
+            return index
+
+    return None
+
+
+def _snapshot_key(project_id: str) -> tuple:
+    return (SNAPSHOT_CACHE_NAME, (("project_id", project_id),))
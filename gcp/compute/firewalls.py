@@ -1,10 +1,45 @@
+import hashlib
 from app import mcp
-from google.cloud import compute_v1
+from fastmcp import Context
+from gcp.clients import get_client
+from gcp.concurrency import run_blocking
+from gcp.fanout import error_entry, fan_out_async, progress_reporter
+from gcp.lazy import lazy_import
+from gcp.pagination import (
+    decode_page_token,
+    page_result,
+    resolve_page_size,
+)
+from gcp.resourcemanager.projects import resolve_project_ids
+from gcp.compute.filters import name_filters
+from gcp.compute.firewall_index import (
+    cached_firewall_index,
+    find_firewall_rules,
+    get_firewall_index,
+    list_firewalls,
+)
+from gcp.records import FirewallRule
+from gcp.singleflight import single_flight
+from gcp.throttling import throttled
 from gcp.utils import handle_gcp_exceptions
+from google.api_core import exceptions
+
+compute_v1 = lazy_import("google.cloud.compute_v1")
+
+FIREWALL_PAGE_KIND = "firewalls"
 
 
 @mcp.tool()
-def list_firewall_rules(project_id: str) -> list:
+async def list_firewall_rules(
+    project_id: str,
+    network: str | None = None,
+    direction: str | None = None,
+    disabled: bool | None = None,
+    name_prefix: str | None = None,
+    refresh: bool = False,
+    page_size: int | None = None,
+    page_token: str | None = None,
+) -> list | dict:
     """
     Retrieves a comprehensive list of all firewall rules within a specified
     Google Cloud project.
@@ -13,43 +48,95 @@ def list_firewall_rules(project_id: str) -> list:
 
     Args:
         project_id: The unique identifier for the Google Cloud project.
+        network: Optional. Only rules of this VPC network name, e.g.
+        "default".
+        direction: Optional. Only "INGRESS" or "EGRESS" rules.
+        disabled: Optional. Only disabled (True) or enabled (False) rules.
+        name_prefix: Optional. Only rules whose name starts with this.
+        refresh: set to True to skip cached results and fetch fresh data.
+        page_size: Optional. Return at most this many rules (up to 500)
+        plus a next_page_token, instead of the whole list at once.
+        page_token: Optional. The next_page_token of the previous page,
+        called with the same filters. It is refused if rules were added
+        or removed since; list again from the first page then.
+
+    The filters are applied by Compute Engine, unless the project's rules
+    are already cached, so only matching rules are transferred.
 
     Returns:
         A list of dictionaries, where each dictionary represents a complete
-        firewall rule.
+        firewall rule. With page_size, a dictionary with the "items" of
+        the page and the "next_page_token" (None on the last page).
     """
-    return list_firewall_rules_logic(project_id)
+    return await run_blocking(
+        list_firewall_rules_logic,
+        project_id,
+        refresh=refresh,
+        page_size=page_size,
+        page_token=page_token,
+        network=network,
+        direction=direction,
+        disabled=disabled,
+        name_prefix=name_prefix,
+    )
 
 
 @handle_gcp_exceptions
-def list_firewall_rules_logic(project_id: str) -> list:
-    results = []
-    firewall_data = {}
-    with compute_v1.FirewallsClient() as client:
-        request = compute_v1.ListFirewallsRequest(project=project_id)
-        firewall_rules = client.list(request)
-
-        for rule in firewall_rules:
-            firewall_data = {
-                "name": rule.name,
-                "network": rule.network,
-                "direction": rule.direction,
-                "allowed": rule.allowed,
-                "source_ranges": rule.source_ranges,
-                "source_tags": rule.source_tags,
-                "destination_ranges": rule.destination_ranges,
-                "disabled": rule.disabled,
-                "priority": rule.priority,
-                "self_link": rule.self_link,
-            }
-
-        results.append(firewall_data)
+def list_firewall_rules_logic(
+    project_id: str,
+    refresh: bool = False,
+    page_size: int | None = None,
+    page_token: str | None = None,
+    network: str | None = None,
+    direction: str | None = None,
+    disabled: bool | None = None,
+    name_prefix: str | None = None,
+) -> list | dict:
+    criteria = {
+        "network": network,
+        "direction": direction,
+        "disabled": disabled,
+        "name_prefix": name_prefix,
+    }
+    if any(value is not None for value in criteria.values()):
+        rules = find_firewall_rules(project_id, refresh=refresh, **criteria)
+    else:
+        rules = get_firewall_index(project_id, refresh=refresh).query()
+    if page_size is None and page_token is None:
+        return rules
+
+    # Pages are slices of the project's snapshot, so the cursor is an
+    # offset, valid only while the snapshot lists the same rules.
+    state = decode_page_token(FIREWALL_PAGE_KIND, page_token)
+    snapshot = _rules_fingerprint(rules)
+    if state and state.get("snapshot") != snapshot:
+        raise ValueError(
+            "The firewall rules changed since the previous page was listed; "
+            "list them again from the first page."
+        )
+    offset = state.get("offset", 0)
+    size = resolve_page_size(page_size, state)
+    end = offset + size
+    next_state = (
+        {"offset": end, "page_size": size, "snapshot": snapshot}
+        if end < len(rules)
+        else None
+    )
+
+    return page_result(FIREWALL_PAGE_KIND, rules[offset:end], next_state)
 
-    return results
+
+def _rules_fingerprint(rules: list) -> str:
+    # Identifies the listing a cursor's offset points into: refreshed
+    # snapshots listing the same rules keep their cursors valid.
+    names = "\n".join(rule.name for rule in rules)
+    return hashlib.sha1(names.encode()).hexdigest()[:16]
 
 
 @mcp.tool()
-def list_firewall_rules_per_vpc(project_id: str, vpc_name: str) -> list:
+async def list_firewall_rules_per_vpc(
+    project_id: str, vpc_name: str, refresh: bool = False
+) -> list:
     """
     Allows you to only list the firewall rules crreated for a
     specific VPC network name. The list of rules are returned in
@@ -64,37 +151,22 @@ def list_firewall_rules_per_vpc(project_id: str, vpc_name: str) -> list:
     Wrong vpc_name:
     "https://www.googleapis.com/compute/v1/projects/example-project/global/networks/default"
     Correct vpc_name: "default"
+    * refresh: set to True to skip cached results and fetch fresh data.
     """
-    return list_firewall_rules_per_vpc_logic(project_id, vpc_name)
+    return await run_blocking(
+        list_firewall_rules_per_vpc_logic, project_id, vpc_name, refresh=refresh
+    )
 
 
 @handle_gcp_exceptions
-def list_firewall_rules_per_vpc_logic(project_id: str, vpc_name: str) -> list:
-    vpc_rules_dict = []
-    with compute_v1.FirewallsClient() as client:
-        request = compute_v1.ListFirewallsRequest(project=project_id)
-        firewall_rules = client.list(request)
-        for rule in firewall_rules:
-            if rule.network.endswith(f"/{vpc_name}"):
-                rule_data = {
-                    "name": rule.name,
-                    "network": rule.network,
-                    "direction": rule.direction,
-                    "allowed": rule.allowed,
-                    "source_ranges": rule.source_ranges,
-                    "source_tags": rule.source_tags,
-                    "destination_ranges": rule.destination_ranges,
-                    "disabled": rule.disabled,
-                    "priority": rule.priority,
-                    "self_link": rule.self_link,
-                }
-                vpc_rules_dict.append(rule_data)
-
-    return vpc_rules_dict
+def list_firewall_rules_per_vpc_logic(
+    project_id: str, vpc_name: str, refresh: bool = False
+) -> list:
+    return find_firewall_rules(project_id, network=vpc_name, refresh=refresh)
 
 
 @mcp.tool()
-def describe_firewall_rule(project_id: str, rule_name: str) -> dict:
+async def describe_firewall_rule(project_id: str, rule_name: str) -> dict:
     """
     Given a firewall rule name in parameter rule_name, this function will
     retrieve and return all the details of such firewall rule.
@@ -105,40 +177,89 @@ def describe_firewall_rule(project_id: str, rule_name: str) -> dict:
     * rule_name: the name of the firewall rule, as it shows up in the
     last part of the Self Link: "allow-ssh-ingress", for example.
     """
-    return describe_firewall_rule_logic(project_id, rule_name)
+    return await run_blocking(describe_firewall_rule_logic, project_id, rule_name)
 
 
 @handle_gcp_exceptions
-def describe_firewall_rule_logic(project_id: str, rule_name: str) -> dict:
-    with compute_v1.FirewallsClient() as client:
-        request = compute_v1.GetFirewallRequest(
-            project=project_id, firewall=rule_name)
-
-        firewall_rule = client.get(request=request)
-
-        firewall_rule_dict = {
-            "name": firewall_rule.name,
-            "network": firewall_rule.network,
-            "direction": firewall_rule.direction,
-            "allowed": firewall_rule.allowed,
-            "source_ranges": firewall_rule.source_ranges,
-            "source_tags": firewall_rule.source_tags,
-            "destination_ranges": firewall_rule.destination_ranges,
-            "disabled": firewall_rule.disabled,
-            "priority": firewall_rule.priority,
-            "self_link": firewall_rule.self_link,
-        }
+@single_flight
+def describe_firewall_rule_logic(project_id: str, rule_name: str) -> FirewallRule:
+    # Reuse a cached snapshot when there is one; a single GET is cheaper
+    # than listing the whole project otherwise.
+    index = cached_firewall_index(project_id)
+    if index is not None:
+        firewall_rule = index.get(rule_name)
+        if firewall_rule is not None:
+            return firewall_rule
+
+    return FirewallRule.from_proto(_get_firewall(project_id, rule_name))
+
 
-        return firewall_rule_dict
+@throttled("compute")
+def _get_firewall(project_id: str, rule_name: str) -> "compute_v1.Firewall":
+    client = get_client(compute_v1.FirewallsClient)
+    request = compute_v1.GetFirewallRequest(
+        project=project_id, firewall=rule_name)
+
+    return client.get(request=request)
 
 
 @mcp.tool()
-def unsafe_ssh_exposure(project_id: str) -> list:
+async def describe_firewall_rules(project_id: str, rule_names: list[str]) -> list:
+    """
+    Retrieves the details of many firewall rules of a project in one call.
+    Use this tool instead of calling describe_firewall_rule once per rule.
+
+    Args:
+    * project_id: the project where the firewall rules are created.
+    * rule_names: the names of the firewall rules, e.g.
+    ["allow-ssh-ingress", "allow-https"].
+
+    Returns:
+        A list with one entry per requested rule holding its "name" and
+        either the "result" or the "error" (e.g. NotFound) that
+        prevented describing it.
+    """
+    return await run_blocking(describe_firewall_rules_logic, project_id, rule_names)
+
+
+@handle_gcp_exceptions
+@single_flight
+def describe_firewall_rules_logic(project_id: str, rule_names: list[str]) -> list:
+    requested = list(dict.fromkeys(rule_names))
+
+    index = cached_firewall_index(project_id)
+    if index is not None:
+        found = {name: index.get(name) for name in requested}
+    else:
+        # One filtered list per batch of names instead of one get per rule.
+        found = {}
+        try:
+            for batch_filter in name_filters(requested):
+                for rule in list_firewalls(project_id, batch_filter):
+                    found[rule.name] = FirewallRule.from_proto(rule)
+        except (exceptions.NotFound, exceptions.PermissionDenied) as e:
+            return [error_entry(name, e) for name in requested]
+
+    results = []
+    for name in requested:
+        if found.get(name) is None:
+            error = exceptions.NotFound(f"Firewall {name} not found")
+            results.append(error_entry(name, error))
+        else:
+            results.append({"name": name, "result": found[name]})
+
+    return results
+
+
+@mcp.tool()
+async def unsafe_ssh_exposure(project_id: str, refresh: bool = False) -> list:
     """
     Analyses all firewall rules looking for rules that expose SSH
-    to anyone on the internet. This means, if any firewall rule
-    allows source range 0.0.0.0/0 to connect to port 22 TCP
-    exists in the project, we'll consider that as being a security problem.
+    to anyone on the internet. This means, if any enabled ingress rule
+    allows TCP port 22 (directly, through a port range or through an
+    "all" protocol rule) from a broad public source range such as
+    0.0.0.0/0, 0.0.0.0/1 or ::/0, we'll consider that as being a
+    security problem.
 
     This tool will return the name of the firewall rule and the name of the
     VPC network.
@@ -146,30 +267,115 @@ def unsafe_ssh_exposure(project_id: str) -> list:
     Args:
     project_id: the project ID of the project that contains the
     firewall rules we're going to review.
+    refresh: set to True to skip cached results and fetch fresh data.
     """
-    return unsafe_ssh_exposure_logic(project_id)
+    return await run_blocking(unsafe_ssh_exposure_logic, project_id, refresh=refresh)
 
 
 @handle_gcp_exceptions
-def unsafe_ssh_exposure_logic(project_id: str) -> list:
-    with compute_v1.FirewallsClient() as client:
-        request = compute_v1.ListFirewallsRequest(project=project_id)
-        firewall_rules = client.list(request)
-        unsafe_rules = [
-            {
-                "name": rule.self_link.split("/")[-1],
-                "network": rule.network.split("/")[-1],
-            }
-            for rule in firewall_rules
-            if (
-                "0.0.0.0/0" in rule.source_ranges
-                and rule.enabled
-                and rule.direction == "INGRESS"
-                and any(
-                    allowed.ip_protocol == "tcp" and "22" in allowed.ports
-                    for allowed in rule.allowed
-                )
-            )
-        ]
-
-        return unsafe_rules
+def unsafe_ssh_exposure_logic(project_id: str, refresh: bool = False) -> list:
+    exposure = get_firewall_index(project_id, refresh=refresh).exposure
+    unsafe_rules = [
+        {
+            "name": rule.self_link.split("/")[-1],
+            "network": rule.network.split("/")[-1],
+        }
+        for rule, _ in exposure.exposed_ports([22], protocol="tcp")[22]
+    ]
+
+    return unsafe_rules
+
+
+@mcp.tool()
+async def unsafe_ssh_exposure_across_projects(
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    ctx: Context | None = None,
+) -> list:
+    """
+    Runs unsafe_ssh_exposure on many projects at once, concurrently.
+    Use this tool for questions like "which projects expose SSH to the
+    internet?" instead of calling unsafe_ssh_exposure once per project.
+
+    Args:
+        project_ids: the project IDs to check. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are checked too. Optional.
+
+    Returns:
+        A list with one entry per project holding its "project_id" and
+        either the "result" or the "error" that prevented checking it.
+    """
+    project_ids = await run_blocking(resolve_project_ids, project_ids, parent)
+    return await fan_out_async(
+        unsafe_ssh_exposure_logic.__wrapped__,
+        project_ids,
+        on_result=progress_reporter(ctx),
+    )
+
+
+@mcp.tool()
+async def list_exposed_ports(
+    project_id: str,
+    ports: list[int],
+    protocol: str = "tcp",
+    source_ranges: list[str] | None = None,
+    refresh: bool = False,
+) -> list:
+    """
+    Finds the enabled ingress firewall rules that expose any of the given
+    ports to the internet, or to specific source ranges. Use this tool
+    for questions such as "is RDP open to the world?" or "which rules
+    expose PostgreSQL and MySQL?"; many ports can be checked at once.
+
+    Port ranges ("1-65535"), rules allowing "all" protocols and IPv6
+    ranges are all taken into account. Deny rules and rule priorities
+    are not evaluated.
+
+    Args:
+    * project_id: the project ID that contains the firewall rules.
+    * ports: the port numbers to check, e.g. [22, 3389, 5432].
+    * protocol: the IP protocol, "tcp" (default), "udp", "sctp" or "all".
+    * source_ranges: CIDR prefixes the traffic would come from, e.g.
+    ["203.0.113.0/24"]. When omitted, any broad public range such as
+    0.0.0.0/0, 0.0.0.0/1 or ::/0 counts as the internet.
+    * refresh: set to True to skip cached results and fetch fresh data.
+
+    Returns:
+        A list with one entry per exposed (port, rule) pair, containing
+        the port, the rule name, its VPC network and the matching source
+        ranges.
+    """
+    return await run_blocking(
+        list_exposed_ports_logic,
+        project_id,
+        ports,
+        protocol,
+        source_ranges,
+        refresh=refresh,
+    )
+
+
+@handle_gcp_exceptions
+def list_exposed_ports_logic(
+    project_id: str,
+    ports: list[int],
+    protocol: str = "tcp",
+    source_ranges: list[str] | None = None,
+    refresh: bool = False,
+) -> list:
+    exposure = get_firewall_index(project_id, refresh=refresh).exposure
+    exposed = exposure.exposed_ports(ports, protocol=protocol, sources=source_ranges)
+
+    return [
+        {
+            "port": port,
+            "protocol": protocol,
+            "name": rule.name,
+            "network": rule.network.split("/")[-1],
+            "source_ranges": matching_ranges,
+        }
+        for port, matches in exposed.items()
+        for rule, matching_ranges in matches
+    ]
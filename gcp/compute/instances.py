@@ -1,46 +1,322 @@
-import json
+from collections import defaultdict
+import structlog
 from app import mcp
-from google.cloud import compute_v1
-from gcp.utils import handle_gcp_exceptions
+from fastmcp import Context
+from gcp.cache import cached, mark_uncacheable
+from gcp.clients import get_client
+from gcp.compute.filters import instances_filter, name_filters
+from gcp.concurrency import run_blocking
+from gcp.fanout import error_entry, fan_out_async, progress_reporter
+from gcp.inventory.store import snapshot_rows
+from gcp.lazy import lazy_import
+from gcp.pagination import (
+    MAX_PAGE_SIZE,
+    decode_page_token,
+    page_result,
+    resolve_page_size,
+)
+from gcp.records import InstanceSummary
+from gcp.resourcemanager.projects import resolve_project_ids
+from gcp.singleflight import single_flight
+from gcp.throttling import throttled
+from gcp.utils import fit_to_budget, handle_gcp_exceptions, project_fields
+from google.api_core import exceptions
+
+compute_v1 = lazy_import("google.cloud.compute_v1")
+
+logger = structlog.get_logger(__name__)
+
+INSTANCE_PAGE_KIND = "instances"
+AGGREGATED_INSTANCE_PAGE_KIND = "instances_aggregated"
+
+INSTANCE_FIELD_PRESETS = {
+    "summary": ["name", "status", "machineType", "zone", "labels", "creationTimestamp"],
+    "network": ["networkInterfaces", "canIpForward", "tags"],
+    "disks": ["disks"],
+    "security": [
+        "serviceAccounts",
+        "shieldedInstanceConfig",
+        "shieldedInstanceIntegrityPolicy",
+        "confidentialInstanceConfig",
+        "metadata",
+    ],
+}
 
 
 @mcp.tool()
-def list_gcp_instances(project_id: str, zone: str) -> list:
+@cached(ttl=30)
+async def list_gcp_instances(
+    project_id: str,
+    zone: str | None = None,
+    region: str | None = None,
+    status: str | None = None,
+    labels: dict[str, str] | None = None,
+    name_prefix: str | None = None,
+    refresh: bool = False,
+    page_size: int | None = None,
+    page_token: str | None = None,
+) -> list | dict:
     """
-    Lists all Google Compute Engine VM instances in a zone of the
-    specified project ID. The list of VMs is returned in a Python
-    list that can be iterated over.
+    Lists Google Compute Engine VM instances of the specified project ID.
+    Without a zone, every zone of the project is listed at once, so use
+    this tool for questions like "list all VMs in this project". The list
+    of VMs is returned in a Python list that can be iterated over.
 
     Args:
     * project_id: the project ID where the VMs are. Must be a string.
-    * zone: the zone you want to list. Must be in the format
-    'us-central1-a' and be a string.
+    * zone: only list this zone. Must be in the format 'us-central1-a'
+    and be a string. Optional.
+    * region: only list zones of this region, e.g. 'us-central1'. Optional.
+    * status: only list VMs in this state, e.g. 'RUNNING' or
+    'TERMINATED'. Optional.
+    * labels: only list VMs carrying all of these labels, e.g.
+    {"env": "prod"}. Optional.
+    * name_prefix: only list VMs whose name starts with this, e.g.
+    'web-'. Optional.
+    * refresh: set to True to skip cached results and fetch fresh data.
+    * page_size: return at most this many VMs (up to 500) plus a
+    next_page_token, instead of the whole list at once. Optional.
+    * page_token: the next_page_token of the previous page, called with
+    the same filters. Optional.
+
+    With page_size, a dictionary with the "items" of the page and the
+    "next_page_token" (None on the last page) is returned instead. Without
+    a zone, it also holds the "unreachable_zones" whose VMs are missing
+    from the page because Compute Engine could not reach them. A whole
+    listing missing such zones is returned the same way, as a dictionary
+    of the "items" and the "unreachable_zones", and is not cached.
+
+    The filters are applied by Compute Engine, so only matching VMs are
+    transferred.
     """
-    return list_all_instances_in_project_logic(project_id, zone)
+    if not (refresh or labels or page_size or page_token):
+        rows = await run_blocking(snapshot_rows, "instances", project_id)
+        if rows is not None:
+            return [
+                InstanceSummary.from_dict(row)
+                for row in filter_instance_rows(rows, zone, region, status, name_prefix)
+            ]
+
+    if zone and not region:
+        return await run_blocking(
+            list_all_instances_in_project_logic,
+            project_id,
+            zone,
+            page_size=page_size,
+            page_token=page_token,
+            status=status,
+            labels=labels,
+            name_prefix=name_prefix,
+        )
+
+    return await run_blocking(
+        list_instances_aggregated_logic,
+        project_id,
+        zone=zone,
+        region=region,
+        status=status,
+        labels=labels,
+        page_size=page_size,
+        page_token=page_token,
+        name_prefix=name_prefix,
+    )
+
+
+@handle_gcp_exceptions
+@single_flight
+@throttled("compute")
+def list_all_instances_in_project_logic(
+    project_id: str,
+    zone: str,
+    page_size: int | None = None,
+    page_token: str | None = None,
+    status: str | None = None,
+    labels: dict[str, str] | None = None,
+    name_prefix: str | None = None,
+) -> list | dict:
+    results = []
+    instance_client = get_client(compute_v1.InstancesClient)
+    request = compute_v1.ListInstancesRequest(
+        project=project_id,
+        zone=zone,
+        filter=instances_filter(status=status, labels=labels, name_prefix=name_prefix),
+        max_results=MAX_PAGE_SIZE,
+    )
+
+    if page_size is not None or page_token is not None:
+        page, size = _fetch_page(
+            INSTANCE_PAGE_KIND, instance_client.list, request, page_size, page_token
+        )
+        items = [InstanceSummary.from_proto(instance, zone) for instance in page.items]
+        return _instances_page(INSTANCE_PAGE_KIND, items, page, size)
+
+    instance_list = instance_client.list(request=request)
+
+    for instance in instance_list:
+        results.append(InstanceSummary.from_proto(instance, zone))
+
+    return results
 
 
 @handle_gcp_exceptions
-def list_all_instances_in_project_logic(project_id: str, zone: str) -> list:
+@single_flight
+@throttled("compute")
+def list_instances_aggregated_logic(
+    project_id: str,
+    zone: str | None = None,
+    region: str | None = None,
+    status: str | None = None,
+    labels: dict[str, str] | None = None,
+    page_size: int | None = None,
+    page_token: str | None = None,
+    name_prefix: str | None = None,
+) -> list | dict:
     results = []
-    with compute_v1.InstancesClient() as instance_client:
-        request = compute_v1.ListInstancesRequest(project=project_id, zone=zone)
+    instance_client = get_client(compute_v1.InstancesClient)
+    request = compute_v1.AggregatedListInstancesRequest(
+        project=project_id,
+        filter=instances_filter(zone, region, status, labels, name_prefix),
+        max_results=MAX_PAGE_SIZE,
+        # A zone that can't be reached is left out instead of failing the
+        # whole listing.
+        return_partial_success=True,
+    )
+
+    if page_size is not None or page_token is not None:
+        page, size = _fetch_page(
+            AGGREGATED_INSTANCE_PAGE_KIND,
+            instance_client.aggregated_list,
+            request,
+            page_size,
+            page_token,
+        )
+        items = [
+            InstanceSummary.from_proto(instance, scope.split("/")[-1])
+            for scope, scoped_list in page.items.items()
+            for instance in scoped_list.instances
+        ]
+        result = _instances_page(AGGREGATED_INSTANCE_PAGE_KIND, items, page, size)
+        result["unreachable_zones"] = _unreachable_zones(page)
+        return result
+
+    # Pages of (scope, InstancesScopedList) pairs covering every zone;
+    # scopes without instances come back empty.
+    unreachable = []
+    for page in instance_client.aggregated_list(request=request).pages:
+        for scope, scoped_list in page.items.items():
+            for instance in scoped_list.instances:
+                results.append(
+                    InstanceSummary.from_proto(instance, scope.split("/")[-1])
+                )
+        unreachable.extend(_unreachable_zones(page))
+
+    if unreachable:
+        # The VMs of these zones are missing, so the listing is returned
+        # with them named, and isn't remembered as the project's VMs.
+        zones = list(dict.fromkeys(unreachable))
+        logger.warning("gcp_zones_unreachable", project_id=project_id, zones=zones)
+        mark_uncacheable()
+        return {"items": results, "unreachable_zones": zones}
+
+    return results
+
+
+def filter_instance_rows(
+    rows: list,
+    zone: str | None = None,
+    region: str | None = None,
+    status: str | None = None,
+    name_prefix: str | None = None,
+) -> list:
+    """
+    Applies the zone, region, status and name prefix filters of
+    list_gcp_instances to rows from the inventory snapshot.
+    """
+    return [
+        row
+        for row in rows
+        if (zone is None or row["zone"] == zone)
+        and (region is None or row["zone"].rsplit("-", 1)[0] == region)
+        and (status is None or row["status"] == status.upper())
+        and row["name"].startswith(name_prefix or "")
+    ]
+
+
+def _fetch_page(
+    kind: str, list_method, request, page_size: int | None, page_token: str | None
+):
+    # Fetches exactly one API page; the agent's cursor wraps the API's own
+    # page token, so nothing but the current page is held in memory.
+    state = decode_page_token(kind, page_token)
+    size = resolve_page_size(page_size, state)
+    request.max_results = size
+    request.page_token = state.get("token", "")
+    return next(iter(list_method(request=request).pages)), size
+
+
+def _unreachable_zones(page) -> list:
+    # The zones an aggregated list page left out under
+    # return_partial_success: listed in unreachables, or in the data of an
+    # UNREACHABLE warning.
+    scopes = list(page.unreachables)
+    if page.warning.code == "UNREACHABLE":
+        scopes.extend(data.value for data in page.warning.data if data.key == "scope")
+    return list(dict.fromkeys(scope.split("/")[-1] for scope in scopes))
 
-        instance_list = instance_client.list(request=request)
 
-        for instance in instance_list:
-            vm_data = {
-                "name": instance.name,
-                "status": str(instance.status),
-                "machine_type": instance.machine_type.split("/")[-1],
-            }
+def _instances_page(kind: str, items: list, page, size: int) -> dict:
+    next_state = (
+        {"token": page.next_page_token, "page_size": size}
+        if page.next_page_token
+        else None
+    )
+    return page_result(kind, items, next_state)
 
-            results.append(vm_data)
 
-        return results
+@mcp.tool()
+async def list_gcp_instances_across_projects(
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    status: str | None = None,
+    labels: dict[str, str] | None = None,
+    ctx: Context | None = None,
+) -> list:
+    """
+    Lists the VM instances of many projects at once, concurrently, across
+    every zone of each project. Use this tool for questions like "which
+    VMs are running in folder X?" instead of calling list_gcp_instances
+    once per project.
+
+    Args:
+        project_ids: the project IDs to list. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are listed too. Optional.
+        status: only list VMs in this state, e.g. 'RUNNING'. Optional.
+        labels: only list VMs carrying all of these labels. Optional.
+
+    Returns:
+        A list with one entry per project holding its "project_id" and
+        either the "result" or the "error" that prevented listing it.
+    """
+    project_ids = await run_blocking(resolve_project_ids, project_ids, parent)
+    return await fan_out_async(
+        list_instances_aggregated_logic.__wrapped__,
+        project_ids,
+        on_result=progress_reporter(ctx),
+        status=status,
+        labels=labels,
+    )
 
 
 @mcp.tool()
-def describe_gcp_instance(instance_name: str, project_id: str, zone: str) -> dict:
+async def describe_gcp_instance(
+    instance_name: str,
+    project_id: str,
+    zone: str,
+    fields: list[str] | None = None,
+    max_bytes: int | None = None,
+) -> dict:
     """
     Fetches detailed metadata about a single Google Compute Engine (GCE) VM
     instance.
@@ -48,28 +324,146 @@ def describe_gcp_instance(instance_name: str, project_id: str, zone: str) -> dic
     interfaces (IP addresses), disk details, machine type, status, labels,
     and service accounts associated with a specific instance.
 
+    The full metadata is large; ask only for what you need with fields.
+
     Args:
         instance_name: The name of the GCE instance to describe.
         project_id: The unique identifier for the Google Cloud project
         where the instance resides.
         zone: The zone where the instance is located, e.g., 'us-central1-a'.
+        fields: Optional. Presets "summary", "network", "disks" and
+        "security", and/or field names such as "labels" or dotted paths
+        such as "networkInterfaces.networkIP". Omit to get everything.
+        max_bytes: Optional. Upper bound on the size of the JSON returned;
+        the largest fields are dropped to fit and listed under
+        "_truncated_fields".
 
     Returns:
-        A dict containing the full metadata of the specified VM instance.
+        A dict containing the requested metadata of the specified VM
+        instance.
     """
-    return describe_gcp_instance_logic(
-        instance_name=instance_name, project_id=project_id, zone=zone
+    return await run_blocking(
+        describe_gcp_instance_logic,
+        instance_name=instance_name,
+        project_id=project_id,
+        zone=zone,
+        fields=fields,
+        max_bytes=max_bytes,
     )
 
 
 @handle_gcp_exceptions
-def describe_gcp_instance_logic(instance_name: str, project_id: str, zone: str) -> dict:
-    with compute_v1.InstancesClient() as client:
-        request = compute_v1.GetInstanceRequest(
-            project=project_id, instance=instance_name, zone=zone
-        )
+@single_flight
+@throttled("compute")
+def describe_gcp_instance_logic(
+    instance_name: str,
+    project_id: str,
+    zone: str,
+    fields: list[str] | None = None,
+    max_bytes: int | None = None,
+) -> dict:
+    client = get_client(compute_v1.InstancesClient)
+    request = compute_v1.GetInstanceRequest(
+        project=project_id, instance=instance_name, zone=zone
+    )
+
+    instance_details = client.get(request=request)
+
+    return _instance_details(instance_details, fields, max_bytes)
+
+
+@mcp.tool()
+async def describe_gcp_instances(
+    project_id: str,
+    instance_names: list[str],
+    fields: list[str] | None = None,
+    max_bytes: int | None = None,
+) -> list:
+    """
+    Fetches the metadata of many VM instances of a project in one call,
+    whatever their zones. Use this tool instead of calling
+    describe_gcp_instance once per instance.
+
+    Args:
+        project_id: The unique identifier for the Google Cloud project.
+        instance_names: the instance names, e.g. ["web-1", "web-2"]. An
+        instance name used in several zones is given as "zone/name",
+        e.g. "us-central1-a/web-1".
+        fields: Optional. As for describe_gcp_instance; applies to every
+        instance.
+        max_bytes: Optional. Upper bound on the size of the JSON of each
+        instance, as for describe_gcp_instance.
 
-        instance_details = client.get(request=request)
-        instance_details_json = compute_v1.Instance.to_json(instance_details)
+    Returns:
+        A list with one entry per requested instance holding its "name"
+        and either the "result" or the "error" (e.g. NotFound) that
+        prevented describing it.
+    """
+    return await run_blocking(
+        describe_gcp_instances_logic, project_id, instance_names, fields, max_bytes
+    )
+
+
+@handle_gcp_exceptions
+@single_flight
+@throttled("compute")
+def describe_gcp_instances_logic(
+    project_id: str,
+    instance_names: list[str],
+    fields: list[str] | None = None,
+    max_bytes: int | None = None,
+) -> list:
+    requested = list(dict.fromkeys(instance_names))
+    names = list(dict.fromkeys(entry.rpartition("/")[2] for entry in requested))
+    client = get_client(compute_v1.InstancesClient)
 
-        return json.loads(instance_details_json)
+    # One filtered aggregated list per batch of names finds the instances
+    # in every zone, instead of one get per instance and zone.
+    found = defaultdict(list)
+    try:
+        for batch_filter in name_filters(names):
+            request = compute_v1.AggregatedListInstancesRequest(
+                project=project_id, filter=batch_filter
+            )
+            for scope, scoped_list in client.aggregated_list(request=request):
+                for instance in scoped_list.instances:
+                    found[instance.name].append((scope.split("/")[-1], instance))
+    except (exceptions.NotFound, exceptions.PermissionDenied) as e:
+        return [error_entry(entry, e) for entry in requested]
+
+    results = []
+    for entry in requested:
+        zone, _, name = entry.rpartition("/")
+        matches = [
+            instance
+            for instance_zone, instance in found[name]
+            if not zone or instance_zone == zone
+        ]
+        if len(matches) == 1:
+            details = _instance_details(matches[0], fields, max_bytes)
+            results.append({"name": entry, "result": details})
+        elif not matches:
+            error = exceptions.NotFound(f"Instance {entry} not found")
+            results.append(error_entry(entry, error))
+        else:
+            zones = ", ".join(sorted(zone for zone, _ in found[name]))
+            error = ValueError(
+                f"Instance {name} exists in zones {zones}; name it as zone/name"
+            )
+            results.append(error_entry(entry, error))
+
+    return results
+
+
+def _instance_details(
+    instance: "compute_v1.Instance", fields: list | None, max_bytes: int | None
+) -> dict:
+    # Converts the protobuf straight to a dict (camelCase keys, as in the
+    # REST API) instead of going through a JSON string.
+    instance_dict = compute_v1.Instance.to_dict(
+        instance, preserving_proto_field_name=False
+    )
+
+    return fit_to_budget(
+        project_fields(instance_dict, fields, INSTANCE_FIELD_PRESETS), max_bytes
+    )
@@ -0,0 +1,50 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_CONCURRENCY = int(os.environ.get("GCP_MCP_MAX_CONCURRENCY", 32))
+
+_lock = threading.Lock()
+_executor = None
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking function (a *_logic function calling the Google client
+    libraries) on the shared worker pool and awaits its result, so the
+    event loop keeps serving other sessions meanwhile.
+
+    At most GCP_MCP_MAX_CONCURRENCY (default 32) calls run at once; the
+    rest queue up in the pool. Context variables, such as structlog's
+    bound request context, are carried over to the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(_get_executor(), call)
+
+
+def shutdown():
+    """
+    Stops the worker pool, dropping calls that have not started yet.
+    Called on server shutdown; a later run_blocking starts a new pool.
+    """
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MAX_CONCURRENCY, thread_name_prefix="gcp-logic"
+                )
+    return _executor
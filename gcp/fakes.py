@@ -0,0 +1,499 @@
+import base64
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from google.api_core import exceptions
+from google.cloud import compute_v1, resourcemanager_v3, storage
+from google.iam.v1 import policy_pb2
+from gcp import clients
+
+ORGANIZATION = "organizations/1000"
+ZONES = ("us-central1-a", "us-central1-b", "europe-west1-b", "asia-east1-a")
+COMPUTE_URL = "https://www.googleapis.com/compute/v1"
+
+# The largest page the fake list APIs return, as the real ones do.
+MAX_RESULTS = 500
+
+
+class FakeGcp:
+    """
+    An in-process stand-in for the Compute, Storage and Resource Manager
+    APIs, serving synthetic projects: one organization, folders below it
+    and projects spread over the folders, each with firewall rules,
+    instances, buckets and an IAM policy.
+
+    Resources are generated deterministically from seed, on first use of
+    each project. Every API request (each page of a listing) sleeps for
+    latency seconds and is counted in requests, keyed by (API, method).
+
+        with FakeGcp(projects=3, firewalls=10_000, latency=0.05) as fake:
+            list_firewall_rules_logic(fake.project_ids[0])
+    """
+
+    def __init__(
+        self,
+        projects: int = 1,
+        folders: int = 1,
+        firewalls: int = 100,
+        instances: int = 100,
+        buckets: int = 50,
+        bindings: int = 20,
+        latency: float = 0.0,
+        seed: int = 0,
+    ):
+        self.project_ids = [f"fake-project-{i:04d}" for i in range(projects)]
+        self.folders = [f"folders/{2000 + i}" for i in range(max(folders, 1))]
+        self.sizes = {
+            "firewalls": firewalls,
+            "instances": instances,
+            "buckets": buckets,
+            "bindings": bindings,
+        }
+        self.latency = latency
+        self.seed = seed
+        self.requests = Counter()
+        self._projects = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def install(self):
+        """Makes get_client return fake clients backed by this instance."""
+        fakes = {
+            compute_v1.FirewallsClient: FakeFirewallsClient,
+            compute_v1.InstancesClient: FakeInstancesClient,
+            storage.Client: FakeStorageClient,
+            resourcemanager_v3.ProjectsClient: FakeProjectsClient,
+            resourcemanager_v3.FoldersClient: FakeFoldersClient,
+            resourcemanager_v3.OrganizationsClient: FakeOrganizationsClient,
+        }
+        for factory, fake in fakes.items():
+            clients.override_client(
+                factory, lambda fake=fake, **kwargs: fake(self, **kwargs)
+            )
+
+    def uninstall(self):
+        clients.clear_overrides()
+
+    def request(self, api: str, method: str):
+        """Records one API request and waits for its simulated latency."""
+        with self._lock:
+            self.requests[(api, method)] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def folder_of(self, project_id: str) -> str:
+        return self.folders[self.project_ids.index(project_id) % len(self.folders)]
+
+    def project(self, project_id: str) -> dict:
+        """Returns the project's generated resources, creating them once."""
+        if project_id not in self.project_ids:
+            raise exceptions.NotFound(f"Project {project_id} not found")
+        with self._lock:
+            resources = self._projects.get(project_id)
+            if resources is None:
+                resources = self._projects[project_id] = self._generate(project_id)
+        return resources
+
+    def _generate(self, project_id: str) -> dict:
+        rng = random.Random(f"{self.seed}/{project_id}")
+        return {
+            "firewalls": {
+                rule.name: rule
+                for rule in (
+                    _firewall(rng, project_id, i)
+                    for i in range(self.sizes["firewalls"])
+                )
+            },
+            "instances": {
+                (instance.zone.split("/")[-1], instance.name): instance
+                for instance in (
+                    _instance(rng, project_id, i)
+                    for i in range(self.sizes["instances"])
+                )
+            },
+            "buckets": {
+                properties["name"]: properties
+                for properties in (
+                    _bucket(rng, project_id, i) for i in range(self.sizes["buckets"])
+                )
+            },
+            "policy": _policy(project_id, self.sizes["bindings"]),
+        }
+
+
+def _firewall(rng: random.Random, project_id: str, i: int) -> compute_v1.Firewall:
+    name = f"fw-{i:05d}"
+    network = f"{COMPUTE_URL}/projects/{project_id}/global/networks/vpc-{i % 5}"
+    port = rng.choice(["22", "80", "443", "3389", "5432", "8000-9000"])
+    source_range = rng.choices(
+        ["0.0.0.0/0", "10.0.0.0/8", f"192.168.{i % 256}.0/24", "35.191.0.0/16"],
+        weights=[5, 55, 30, 10],
+    )[0]
+    return compute_v1.Firewall(
+        name=name,
+        network=network,
+        direction="INGRESS" if rng.random() < 0.8 else "EGRESS",
+        allowed=[compute_v1.Allowed(I_p_protocol="tcp", ports=[port])],
+        source_ranges=[source_range],
+        target_tags=[f"tier-{i % 10}"],
+        disabled=rng.random() < 0.05,
+        priority=1000 + i % 100,
+        self_link=f"{COMPUTE_URL}/projects/{project_id}/global/firewalls/{name}",
+    )
+
+
+def _instance(rng: random.Random, project_id: str, i: int) -> compute_v1.Instance:
+    zone = ZONES[i % len(ZONES)]
+    return compute_v1.Instance(
+        name=f"vm-{i:05d}",
+        zone=f"{COMPUTE_URL}/projects/{project_id}/zones/{zone}",
+        status="RUNNING" if rng.random() < 0.8 else "TERMINATED",
+        machine_type=f"{COMPUTE_URL}/projects/{project_id}/zones/{zone}"
+        f"/machineTypes/{rng.choice(['e2-small', 'n2-standard-4'])}",
+        labels={"env": rng.choice(["prod", "staging", "dev"])},
+        network_interfaces=[
+            compute_v1.NetworkInterface(
+                network=f"{COMPUTE_URL}/projects/{project_id}/global/networks/vpc-0",
+                network_i_p=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            )
+        ],
+        tags=compute_v1.Tags(items=[f"tier-{i % 10}"]),
+        fingerprint=base64.b64encode(i.to_bytes(8, "big")).decode(),
+    )
+
+
+def _bucket(rng: random.Random, project_id: str, i: int) -> dict:
+    name = f"{project_id}-bucket-{i:05d}"
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=i)
+    return {
+        "kind": "storage#bucket",
+        "id": name,
+        "name": name,
+        "selfLink": f"https://www.googleapis.com/storage/v1/b/{name}",
+        "location": rng.choice(["US", "EU", "US-CENTRAL1"]),
+        "storageClass": "STANDARD",
+        "timeCreated": created.isoformat().replace("+00:00", "Z"),
+        "etag": "CAE=",
+        "metageneration": "1",
+        "labels": {"env": rng.choice(["prod", "staging", "dev"])},
+        "versioning": {"enabled": rng.random() < 0.5},
+        "iamConfiguration": {
+            "uniformBucketLevelAccess": {"enabled": rng.random() < 0.7},
+            "publicAccessPrevention": rng.choice(["enforced", "inherited"]),
+        },
+        "_public": rng.random() < 0.05,
+    }
+
+
+def _policy(project_id: str, bindings: int) -> policy_pb2.Policy:
+    roles = ["roles/owner", "roles/editor", "roles/viewer", "roles/compute.admin"]
+    members = [
+        f"user:user-{i}@example.com" for i in range(bindings)
+    ] + [
+        f"serviceAccount:sa-{i}@{project_id}.iam.gserviceaccount.com"
+        for i in range(max(bindings // 4, 1))
+    ] + ["group:admins@example.com", "user:contractor@partner.example.org"]
+    policy = policy_pb2.Policy(version=3, etag=b"BwX")
+    for position, role in enumerate(roles):
+        policy.bindings.add(
+            role=role,
+            members=sorted(
+                member for i, member in enumerate(members) if i % len(roles) == position
+            ),
+        )
+    return policy
+
+
+class _FakeClient:
+    def __init__(self, fake: FakeGcp, **kwargs):
+        self._fake = fake
+
+    def close(self):
+        pass
+
+
+def _page(items: list, request) -> tuple:
+    # Offsets serve as page tokens.
+    start = int(request.page_token or 0)
+    end = start + min(request.max_results or MAX_RESULTS, MAX_RESULTS)
+    return items[start:end], (str(end) if end < len(items) else "")
+
+
+class _ComputePager:
+    """Iterates items across pages and exposes .pages, like the real pagers."""
+
+    def __init__(self, fetch, request):
+        self._fetch = fetch
+        self._request = request
+
+    @property
+    def pages(self):
+        request = self._request
+        while True:
+            page = self._fetch(request)
+            yield page
+            if not page.next_page_token:
+                return
+            request = type(request)(request)
+            request.page_token = page.next_page_token
+
+    def __iter__(self):
+        for page in self.pages:
+            if isinstance(page, compute_v1.InstanceAggregatedList):
+                yield from page.items.items()
+            else:
+                yield from page.items
+
+
+class FakeFirewallsClient(_FakeClient):
+    def list(self, request):
+        return _ComputePager(self._list_page, request)
+
+    def _list_page(self, request):
+        self._fake.request("compute", "firewalls.list")
+        matches = _filter_matcher(request.filter)
+        rules = [
+            rule
+            for rule in self._fake.project(request.project)["firewalls"].values()
+            if matches(rule)
+        ]
+        items, token = _page(rules, request)
+        return compute_v1.FirewallList(items=items, next_page_token=token)
+
+    def get(self, request):
+        self._fake.request("compute", "firewalls.get")
+        rule = self._fake.project(request.project)["firewalls"].get(request.firewall)
+        if rule is None:
+            raise exceptions.NotFound(f"Firewall {request.firewall} not found")
+        return rule
+
+
+class FakeInstancesClient(_FakeClient):
+    def list(self, request):
+        return _ComputePager(self._list_page, request)
+
+    def aggregated_list(self, request):
+        return _ComputePager(self._aggregated_list_page, request)
+
+    def _list_page(self, request):
+        self._fake.request("compute", "instances.list")
+        matches = _filter_matcher(request.filter)
+        instances = [
+            instance
+            for (zone, _), instance in self._fake.project(request.project)[
+                "instances"
+            ].items()
+            if zone == request.zone and matches(instance)
+        ]
+        items, token = _page(instances, request)
+        return compute_v1.InstanceList(items=items, next_page_token=token)
+
+    def _aggregated_list_page(self, request):
+        self._fake.request("compute", "instances.aggregatedList")
+        matches = _filter_matcher(request.filter)
+        instances = [
+            instance
+            for instance in self._fake.project(request.project)["instances"].values()
+            if matches(instance)
+        ]
+        items, token = _page(instances, request)
+        scoped = {}
+        for instance in items:
+            scope = "zones/" + instance.zone.split("/")[-1]
+            scoped.setdefault(scope, []).append(instance)
+        return compute_v1.InstanceAggregatedList(
+            items={
+                scope: compute_v1.InstancesScopedList(instances=instances)
+                for scope, instances in scoped.items()
+            },
+            next_page_token=token,
+        )
+
+    def get(self, request):
+        self._fake.request("compute", "instances.get")
+        instances = self._fake.project(request.project)["instances"]
+        instance = instances.get((request.zone, request.instance))
+        if instance is None:
+            raise exceptions.NotFound(f"Instance {request.instance} not found")
+        return instance
+
+
+def _filter_matcher(expression: str):
+    # Only the "(field eq regex)" conjunctions of gcp.compute.filters
+    # are understood.
+    conditions = re.findall(r"\(([\w.]+) eq (.*?)\)(?= \(|$)", expression or "")
+
+    def value(resource, field):
+        if field.startswith("labels."):
+            return resource.labels.get(field.split(".", 1)[1], "")
+        value = getattr(resource, field)
+        return str(value).lower() if isinstance(value, bool) else str(value)
+
+    return lambda resource: all(
+        re.fullmatch(pattern, value(resource, field)) for field, pattern in conditions
+    )
+
+
+class _BucketIterator:
+    """Like the storage HTTP iterator: .pages, and next_page_token after each."""
+
+    def __init__(
+        self, client, project: str, page_size: int | None, page_token: str | None
+    ):
+        self._client = client
+        self._project = project
+        self._page_size = min(page_size or 1000, 1000)
+        self.next_page_token = page_token
+
+    @property
+    def pages(self):
+        while True:
+            self._client._fake.request("storage", "buckets.list")
+            buckets = self._client._fake.project(self._project)["buckets"]
+            properties = list(buckets.values())
+            start = int(self.next_page_token or 0)
+            end = start + self._page_size
+            self.next_page_token = str(end) if end < len(properties) else None
+            yield [self._client._bucket_from(entry) for entry in properties[start:end]]
+            if self.next_page_token is None:
+                return
+
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+
+class FakeStorageClient(_FakeClient):
+    """
+    Stands in for storage.Client below the library's own Bucket class:
+    buckets are real storage.Bucket objects, and their HTTP calls
+    (metadata and IAM policy GETs) are served by _get_resource.
+    """
+
+    def __init__(self, fake: FakeGcp, project: str | None = None, **kwargs):
+        super().__init__(fake)
+        self.project = project
+
+    def _project_of(self, bucket_name: str) -> str | None:
+        # Bucket names are global; the fake ones start with their project.
+        for project_id in self._fake.project_ids:
+            if bucket_name.startswith(project_id + "-"):
+                return project_id
+        return None
+
+    def _bucket_from(self, properties: dict) -> storage.Bucket:
+        bucket = storage.Bucket(self, name=properties["name"])
+        bucket._set_properties(_public_fields(properties))
+        return bucket
+
+    def bucket(self, bucket_name: str) -> storage.Bucket:
+        return storage.Bucket(self, name=bucket_name)
+
+    def list_buckets(
+        self, page_size=None, page_token=None, fields=None, project=None, **kwargs
+    ):
+        return _BucketIterator(self, project or self.project, page_size, page_token)
+
+    def get_bucket(self, bucket_name: str) -> storage.Bucket:
+        bucket = self.bucket(bucket_name)
+        bucket._set_properties(self._get_resource(bucket.path))
+        return bucket
+
+    def _get_resource(self, path: str, query_params=None, **kwargs) -> dict:
+        match = re.fullmatch(r"/b/([^/]+)(/iam)?", path)
+        if match is None:
+            raise exceptions.NotFound(f"Unsupported path {path}")
+        name, iam = match.groups()
+        project_id = self._project_of(name)
+        properties = (
+            self._fake.project(project_id)["buckets"].get(name) if project_id else None
+        )
+        if properties is None:
+            raise exceptions.NotFound(f"Bucket {name} not found")
+
+        if iam:
+            self._fake.request("storage", "buckets.getIamPolicy")
+            members = ["projectViewer:" + project_id]
+            if properties["_public"]:
+                members.append("allUsers")
+            return {
+                "bindings": [
+                    {"role": "roles/storage.objectViewer", "members": members}
+                ],
+                "etag": "CAE=",
+                "version": 1,
+            }
+
+        self._fake.request("storage", "buckets.get")
+        return _public_fields(properties)
+
+
+def _public_fields(properties: dict) -> dict:
+    return {key: value for key, value in properties.items() if key[0] != "_"}
+
+
+class _ResourceManagerClient(_FakeClient):
+    def get_iam_policy(self, request):
+        self._fake.request("resourcemanager", "getIamPolicy")
+        kind, _, name = request.resource.partition("/")
+        if kind == "projects":
+            return self._fake.project(name)["policy"]
+        if request.resource in self._fake.folders or request.resource == ORGANIZATION:
+            return _policy(request.resource.replace("/", "-"), 2)
+        raise exceptions.NotFound(f"{request.resource} not found")
+
+
+class FakeProjectsClient(_ResourceManagerClient):
+    def list_projects(self, request) -> list:
+        self._fake.request("resourcemanager", "projects.list")
+        return [
+            self._project(project_id)
+            for project_id in self._fake.project_ids
+            if self._fake.folder_of(project_id) == request.parent
+        ]
+
+    def get_project(self, name: str):
+        self._fake.request("resourcemanager", "projects.get")
+        project_id = name.split("/", 1)[1]
+        if project_id not in self._fake.project_ids:
+            raise exceptions.NotFound(f"{name} not found")
+        return self._project(project_id)
+
+    def _project(self, project_id: str) -> resourcemanager_v3.Project:
+        return resourcemanager_v3.Project(
+            name=f"projects/{project_id}",
+            project_id=project_id,
+            display_name=project_id,
+            parent=self._fake.folder_of(project_id),
+            state=resourcemanager_v3.Project.State.ACTIVE,
+        )
+
+
+class FakeFoldersClient(_ResourceManagerClient):
+    def list_folders(self, request) -> list:
+        self._fake.request("resourcemanager", "folders.list")
+        if request.parent != ORGANIZATION:
+            return []
+        return [self._folder(folder) for folder in self._fake.folders]
+
+    def get_folder(self, name: str):
+        self._fake.request("resourcemanager", "folders.get")
+        if name not in self._fake.folders:
+            raise exceptions.NotFound(f"{name} not found")
+        return self._folder(name)
+
+    def _folder(self, name: str) -> resourcemanager_v3.Folder:
+        return resourcemanager_v3.Folder(name=name, parent=ORGANIZATION)
+
+
+class FakeOrganizationsClient(_ResourceManagerClient):
+    pass
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import structlog
+from gcp.concurrency import run_blocking
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("GCP_MCP_FANOUT_MAX_WORKERS", 16))
+
+
+async def fan_out_async(
+    logic,
+    project_ids: list,
+    max_workers: int | None = None,
+    on_result=None,
+    key: str = "project_id",
+    **kwargs,
+) -> list:
+    """
+    Runs logic(project_id, **kwargs) for every project on the shared
+    worker pool (see gcp.concurrency), at most max_workers at a time, and
+    returns one entry per project sorted by project ID:
+    {"project_id": ..., "result": ...} or {"project_id": ..., "error": ...}.
+    on_result(entry, done, total) is awaited as each project finishes so
+    callers can stream progress.
+
+    A failing project never aborts the batch. Pass the undecorated logic
+    function (func.__wrapped__) when GCP errors such as PermissionDenied
+    should be reported per project instead of being turned into empty
+    results by handle_gcp_exceptions.
+
+    Entries name their item under key, so other items than projects can
+    be fanned out too, e.g. the buckets of a project with key="name".
+    """
+    project_ids = list(dict.fromkeys(project_ids))
+    semaphore = asyncio.Semaphore(max_workers or DEFAULT_MAX_WORKERS)
+
+    async def run(project_id):
+        async with semaphore:
+            try:
+                result = await run_blocking(logic, project_id, **kwargs)
+                return {key: project_id, "result": result}
+            except Exception as e:
+                return _error_entry(logic, project_id, e, key)
+
+    results = []
+    runs = [run(project_id) for project_id in project_ids]
+    for finished in asyncio.as_completed(runs):
+        entry = await finished
+        results.append(entry)
+        if on_result is not None:
+            await on_result(entry, len(results), len(project_ids))
+
+    return sorted(results, key=lambda entry: entry[key])
+
+
+def progress_reporter(ctx, key: str = "project_id"):
+    """
+    Returns an on_result callback for fan_out_async that streams per-project
+    progress to the MCP client through the tool's Context, or None when the
+    tool was called without one.
+    """
+    if ctx is None:
+        return None
+
+    async def on_result(entry, done, total):
+        outcome = "failed" if "error" in entry else "done"
+        await ctx.report_progress(
+            progress=done, total=total, message=f"{entry[key]}: {outcome}"
+        )
+
+    return on_result
+
+
+def error_entry(item: str, error: Exception, key: str = "name") -> dict:
+    """The fan-out entry reporting that item could not be fetched."""
+    return {key: item, "error": f"{type(error).__name__}: {error}"}
+
+
+def _error_entry(logic, project_id: str, error: Exception, key="project_id") -> dict:
+    logger.error(
+        "fan_out_project_failed",
+        function=getattr(logic, "__name__", repr(logic)),
+        error=str(error),
+        **{key: project_id},
+    )
+    return error_entry(project_id, error, key)
@@ -1,12 +1,32 @@
+import asyncio
 from app import mcp
+from fastmcp import Context
+from gcp.cache import cached, response_cache
+from gcp.clients import get_client
+from gcp.concurrency import run_blocking
+from gcp.fanout import fan_out_async, progress_reporter
+from gcp.iam.policy_index import IamIndex
+from gcp.inventory.store import snapshot_rows
+from gcp.lazy import lazy_import
+from gcp.resourcemanager.projects import resolve_project_ids
+from gcp.singleflight import single_flight
+from gcp.throttling import throttled
 from gcp.utils import handle_gcp_exceptions
-from google.cloud import resourcemanager_v3
-from google.iam.v1 import iam_policy_pb2
+from google.iam.v1 import iam_policy_pb2, options_pb2
 from google.protobuf.json_format import MessageToDict
 
+resourcemanager_v3 = lazy_import("google.cloud.resourcemanager_v3")
+
+IAM_POLICY_TTL = 300
+POLICY_CACHE_NAME = "iam_policy_snapshot"
+POLICY_VERSION = 3
+ANCESTRY_TTL = 3600
+ANCESTRY_CACHE_NAME = "resource_ancestry"
+
 
 @mcp.tool()
-def list_project_iam(project_id: str) -> dict:
+@cached(ttl=300)
+async def list_project_iam(project_id: str, refresh: bool = False) -> dict:
     """
     Retrieves and lists the full Identity and Access Management (IAM)
     policy for a specified Google Cloud project.
@@ -22,6 +42,7 @@ def list_project_iam(project_id: str) -> dict:
 
     Args:
         project_id: The unique identifier for the Google Cloud project.
+        refresh: set to True to skip cached results and fetch fresh data.
 
     Returns:
         A dictionary representing the IAM policy. This includes a
@@ -29,21 +50,299 @@ def list_project_iam(project_id: str) -> dict:
         and the members (users, groups, service accounts)
         assigned to that role.
     """
-    return list_project_iam_logic(project_id)
+    if not refresh:
+        policy = await run_blocking(cached_project_policy, project_id)
+        if policy is not None:
+            return policy
+
+    return await run_blocking(list_project_iam_logic, project_id)
 
 
 @handle_gcp_exceptions
+@single_flight
+@throttled("resourcemanager")
 def list_project_iam_logic(project_id: str) -> dict:
-    with resourcemanager_v3.ProjectsClient() as client:
-        project = f"projects/{project_id}"
-        request = iam_policy_pb2.GetIamPolicyRequest(resource=project)
-        policy = client.get_iam_policy(request=request)
+    client = get_client(resourcemanager_v3.ProjectsClient)
+    request = policy_request(f"projects/{project_id}")
+    policy = client.get_iam_policy(request=request)
 
     return MessageToDict(policy)
 
 
+def policy_request(resource: str) -> iam_policy_pb2.GetIamPolicyRequest:
+    # Version 3 returns conditional role bindings along with their
+    # conditions; older versions fail on policies that contain them.
+    return iam_policy_pb2.GetIamPolicyRequest(
+        resource=resource,
+        options=options_pb2.GetPolicyOptions(requested_policy_version=POLICY_VERSION),
+    )
+
+
+def get_project_policy(project_id: str, refresh: bool = False) -> dict:
+    """
+    Returns the IAM policy of a project as list_project_iam does, fetching
+    it only when there is no copy younger than IAM_POLICY_TTL seconds (or
+    a fresh inventory snapshot), or when refresh is True. The IAM analysis
+    tools all share this one fetch per project. GCP errors are raised.
+    """
+    if not refresh:
+        policy = cached_project_policy(project_id)
+        if policy is not None:
+            return policy
+
+    policy = list_project_iam_logic.__wrapped__(project_id)
+    response_cache.set(
+        (POLICY_CACHE_NAME, (("project_id", project_id),)), policy, IAM_POLICY_TTL
+    )
+
+    return policy
+
+
+def cached_project_policy(project_id: str) -> dict | None:
+    """Returns the project's cached or inventoried policy, without fetching."""
+    found, policy = response_cache.get(
+        (POLICY_CACHE_NAME, (("project_id", project_id),))
+    )
+    if found:
+        return policy
+
+    rows = snapshot_rows("iam_policy", project_id)
+    return rows[0] if rows else None
+
+
+@single_flight
+def get_resource_policy(resource: str, refresh: bool = False) -> dict:
+    """
+    Like get_project_policy, for any of "projects/<id>", "folders/<id>"
+    or "organizations/<id>". Folder and organization policies are shared
+    by every project below them, so they are fetched once per TTL.
+    """
+    kind, _, name = resource.partition("/")
+    if kind == "projects":
+        return get_project_policy(name, refresh=refresh)
+
+    key = (POLICY_CACHE_NAME, (("resource", resource),))
+    if not refresh:
+        found, policy = response_cache.get(key)
+        if found:
+            return policy
+
+    if kind == "folders":
+        client = get_client(resourcemanager_v3.FoldersClient)
+    elif kind == "organizations":
+        client = get_client(resourcemanager_v3.OrganizationsClient)
+    else:
+        raise ValueError(f"Unsupported resource for IAM policies: {resource!r}")
+    policy = _get_iam_policy(client, resource)
+    response_cache.set(key, policy, IAM_POLICY_TTL)
+
+    return policy
+
+
+@throttled("resourcemanager")
+def _get_iam_policy(client, resource: str) -> dict:
+    return MessageToDict(client.get_iam_policy(request=policy_request(resource)))
+
+
+@single_flight
+def get_ancestry(project_id: str, refresh: bool = False) -> list:
+    """
+    Returns the resources whose IAM policies apply to a project, from the
+    project itself up to its organization, e.g. ["projects/p",
+    "folders/123", "organizations/456"].
+
+    The hierarchy changes rarely, so it is cached for ANCESTRY_TTL
+    seconds. Each level is one get call, as a resource only names its
+    direct parent.
+    """
+    key = (ANCESTRY_CACHE_NAME, (("project_id", project_id),))
+    if not refresh:
+        found, ancestry = response_cache.get(key)
+        if found:
+            return ancestry
+
+    ancestry = _walk_ancestry(project_id)
+    response_cache.set(key, ancestry, ANCESTRY_TTL)
+
+    return ancestry
+
+
+@throttled("resourcemanager")
+def _walk_ancestry(project_id: str) -> list:
+    projects_client = get_client(resourcemanager_v3.ProjectsClient)
+    folders_client = get_client(resourcemanager_v3.FoldersClient)
+
+    ancestry = [f"projects/{project_id}"]
+    parent = projects_client.get_project(name=ancestry[0]).parent
+    while parent.startswith("folders/"):
+        ancestry.append(parent)
+        parent = folders_client.get_folder(name=parent).parent
+    if parent:
+        ancestry.append(parent)
+
+    return ancestry
+
+
 @mcp.tool()
-def find_project_owners(project_id: str) -> list:
+async def get_effective_iam_policy(
+    project_id: str,
+    principal: str | None = None,
+    role: str | None = None,
+    refresh: bool = False,
+) -> dict:
+    """
+    Returns the IAM bindings that apply to a project, including the ones
+    inherited from its folders and organization, which list_project_iam
+    does not show. Use this tool for questions like "who really has
+    access to project X?" or "why does alice@example.com have access to
+    project X?".
+
+    Args:
+        project_id: The unique identifier for the Google Cloud project.
+        principal: only bindings of this member, e.g.
+        "user:alice@example.com", or of this email address. Optional.
+        role: only bindings of this role, e.g. "roles/owner". Optional.
+        refresh: set to True to skip cached policies and fetch fresh ones.
+
+    Returns:
+        A dictionary with the "ancestry" from the project up to its
+        organization, the matching "bindings" (resource granting it,
+        role, member and, for conditional bindings, condition), and the
+        resources whose policy could not be read ("errors").
+    """
+    ancestry = await run_blocking(get_ancestry, project_id, refresh)
+    # Every policy along the hierarchy is fetched at the same time.
+    fetches = [
+        run_blocking(get_resource_policy, resource, refresh) for resource in ancestry
+    ]
+    results = await asyncio.gather(*fetches, return_exceptions=True)
+
+    policies = {}
+    errors = []
+    for resource, result in zip(ancestry, results):
+        if isinstance(result, Exception):
+            error = f"{type(result).__name__}: {result}"
+            errors.append({"resource": resource, "error": error})
+        else:
+            policies[resource] = result
+
+    index = IamIndex(policies, key="resource")
+    bindings = index.query(principal=principal, role=role)
+    bindings.sort(key=lambda binding: ancestry.index(binding.scope))
+
+    return {
+        "ancestry": ancestry,
+        "bindings": index.as_dicts(bindings),
+        "errors": errors,
+    }
+
+
+@mcp.tool()
+async def query_iam_bindings(
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    principal: str | None = None,
+    role: str | None = None,
+    member_type: str | None = None,
+    domain: str | None = None,
+    primitive_roles_only: bool = False,
+    refresh: bool = False,
+    ctx: Context | None = None,
+) -> dict:
+    """
+    Answers questions about the IAM policies of one or many projects from
+    an index over their bindings, without returning whole policies. Use
+    this tool for questions like "what roles does alice@example.com have?",
+    "which service accounts have roles/editor?" or "where are basic roles
+    granted?".
+
+    Args:
+        project_ids: the project IDs to check. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are checked too. Optional.
+        principal: a member such as "user:alice@example.com", or just an
+        email address to match it as any member type. Optional.
+        role: a role such as "roles/editor". Optional.
+        member_type: "user", "group", "serviceAccount", "domain",
+        "allUsers" or "allAuthenticatedUsers". Optional.
+        domain: only members of this domain, e.g. "example.com". Optional.
+        primitive_roles_only: only the basic roles owner, editor and
+        viewer. Optional.
+        refresh: set to True to skip cached policies and fetch fresh ones.
+
+    Returns:
+        A dictionary with the matching "bindings" (project_id, role,
+        member and, for conditional bindings, condition) and per-project
+        "errors".
+    """
+    index, errors = await _iam_index(project_ids, parent, refresh, ctx)
+    bindings = index.query(
+        principal=principal,
+        role=role,
+        member_type=member_type,
+        domain=domain,
+        primitive_roles_only=primitive_roles_only,
+    )
+    return {"bindings": index.as_dicts(bindings), "errors": errors}
+
+
+@mcp.tool()
+async def find_external_iam_members(
+    internal_domains: list[str],
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    refresh: bool = False,
+    ctx: Context | None = None,
+) -> dict:
+    """
+    Finds users, groups and domains from outside the organization that are
+    granted roles in one or many projects, e.g. personal gmail.com
+    accounts or partner domains.
+
+    Args:
+        internal_domains: the organization's own domains, e.g.
+        ["example.com"]. Their subdomains are internal too.
+        project_ids: the project IDs to check. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are checked too. Optional.
+        refresh: set to True to skip cached policies and fetch fresh ones.
+
+    Returns:
+        A dictionary with the "external_domains" and their members, the
+        roles of each external member per project ("members"), and
+        per-project "errors".
+    """
+    index, errors = await _iam_index(project_ids, parent, refresh, ctx)
+    external = index.external_domains(internal_domains)
+    members = {}
+    for domain_members in external.values():
+        for member in domain_members:
+            members.update(index.roles_by_principal(principal=member))
+
+    return {"external_domains": external, "members": members, "errors": errors}
+
+
+async def _iam_index(project_ids, parent, refresh: bool, ctx) -> tuple:
+    project_ids = await run_blocking(resolve_project_ids, project_ids, parent)
+    entries = await fan_out_async(
+        get_project_policy,
+        project_ids,
+        on_result=progress_reporter(ctx),
+        refresh=refresh,
+    )
+    policies = {
+        entry["project_id"]: entry["result"] for entry in entries if "result" in entry
+    }
+    errors = [entry for entry in entries if "error" in entry]
+
+    return IamIndex(policies), errors
+
+
+@mcp.tool()
+@cached(ttl=300)
+async def find_project_owners(project_id: str, refresh: bool = False) -> list:
     """
     Retrieves the full Identity and Access Management (IAM)
     policy for a specified Google Cloud project and
@@ -60,23 +359,48 @@ def find_project_owners(project_id: str) -> list:
     Args:
         project_id: The unique identifier for the Google Cloud
         project.
+        refresh: set to True to skip cached results and fetch fresh data.
 
     Returns:
-        A list of princpals that have IAM role "Owner" bound to
-        them.
+        A sorted list of the principals that have IAM role "Owner"
+        bound to them, e.g. ["user:alice@example.com"], including
+        conditional grants (see query_iam_bindings for their conditions).
     """
-    return find_project_owners_logic(project_id)
+    return await run_blocking(find_project_owners_logic, project_id, refresh=refresh)
 
 
 @handle_gcp_exceptions
-def find_project_owners_logic(project_id: str) -> list:
-    project_owners = []
-    with resourcemanager_v3.ProjectsClient() as client:
-        project = f"projects/{project_id}"
-        request = iam_policy_pb2.GetIamPolicyRequest(resource=project)
-        policy = client.get_iam_policy(request=request)
-        for binding in policy.bindings:
-            if binding.role == "roles/owner":
-                project_owners.append(binding.members)
-
-    return project_owners
+def find_project_owners_logic(project_id: str, refresh: bool = False) -> list:
+    policy = get_project_policy(project_id, refresh=refresh)
+    owners = IamIndex({project_id: policy}).query(role="roles/owner")
+
+    return sorted({binding.member for binding in owners})
+
+
+@mcp.tool()
+async def find_project_owners_across_projects(
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    ctx: Context | None = None,
+) -> list:
+    """
+    Runs find_project_owners on many projects at once, concurrently.
+    Use this tool for questions like "which projects have owners that
+    are users?" instead of calling find_project_owners once per project.
+
+    Args:
+        project_ids: the project IDs to check. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are checked too. Optional.
+
+    Returns:
+        A list with one entry per project holding its "project_id" and
+        either the "result" or the "error" that prevented checking it.
+    """
+    project_ids = await run_blocking(resolve_project_ids, project_ids, parent)
+    return await fan_out_async(
+        find_project_owners_logic.__wrapped__,
+        project_ids,
+        on_result=progress_reporter(ctx),
+    )
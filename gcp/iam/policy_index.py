@@ -0,0 +1,173 @@
+from collections import defaultdict
+from gcp.records import IamBinding, frozen
+
+# The basic roles, which grant broad access to every service of a project.
+PRIMITIVE_ROLES = ("roles/owner", "roles/editor", "roles/viewer")
+
+# Domains of Google-managed accounts, which are never "external".
+GOOGLE_MANAGED_DOMAIN_SUFFIXES = ("gserviceaccount.com", "googleusercontent.com")
+
+
+def member_type(member: str) -> str:
+    """Returns the kind of an IAM member, e.g. "user" or "serviceAccount"."""
+    return member.split(":", 1)[0]
+
+
+def member_identity(member: str) -> str:
+    """
+    Returns a member without its type prefix, e.g. "alice@example.com" for
+    "user:alice@example.com" or "deleted:user:alice@example.com?uid=1".
+    """
+    identity = member.split(":", 1)[-1]
+    if member_type(member) == "deleted":
+        identity = identity.split(":", 1)[-1].split("?", 1)[0]
+    return identity
+
+
+def member_domain(member: str) -> str | None:
+    """Returns the domain of a user, group, domain or service account member."""
+    identity = member_identity(member)
+    if member_type(member) == "domain":
+        return identity.lower()
+    if "@" in identity:
+        return identity.rsplit("@", 1)[1].lower()
+    return None
+
+
+class IamIndex:
+    """
+    An inverted index over the bindings of the IAM policies of one or more
+    projects: principal -> roles, role -> principals, member type ->
+    principals and domain -> principals.
+
+    Policies are the dicts returned by list_project_iam, so one fetch of
+    a project's policy answers every question asked about it. They are
+    keyed by project ID, or by any resource name when key is set, e.g.
+    "resource" for the folders and organization above a project.
+
+    Bindings are kept as IamBinding records; as_dicts turns query results
+    into the dicts the IAM tools return, their scope named key.
+    """
+
+    def __init__(self, policies: dict, key: str = "project_id"):
+        self._key = key
+        self.bindings = []
+        self._by_member = defaultdict(set)
+        self._by_identity = defaultdict(set)
+        self._by_role = defaultdict(set)
+        self._by_type = defaultdict(set)
+        self._by_domain = defaultdict(set)
+        self._primitive = set()
+
+        for project_id, policy in sorted(policies.items()):
+            for binding in policy.get("bindings", []):
+                # One frozen copy of the condition for all of its members.
+                condition = frozen(binding.get("condition"))
+                for member in binding.get("members", []):
+                    position = len(self.bindings)
+                    self.bindings.append(
+                        IamBinding(
+                            project_id,
+                            binding["role"],
+                            member,
+                            condition,
+                        )
+                    )
+
+                    self._by_member[member.lower()].add(position)
+                    self._by_identity[member_identity(member).lower()].add(position)
+                    self._by_role[binding["role"]].add(position)
+                    self._by_type[member_type(member)].add(position)
+                    domain = member_domain(member)
+                    if domain is not None:
+                        self._by_domain[domain].add(position)
+                    if binding["role"] in PRIMITIVE_ROLES:
+                        self._primitive.add(position)
+
+    def __len__(self):
+        return len(self.bindings)
+
+    def query(
+        self,
+        principal: str | None = None,
+        role: str | None = None,
+        member_type: str | None = None,
+        domain: str | None = None,
+        primitive_roles_only: bool = False,
+    ) -> list:
+        """
+        Returns the bindings matching every given criterion, one entry per
+        project, role and member.
+
+        Args:
+            principal: a member, e.g. "user:alice@example.com", or just an
+            email, which matches it whatever its member type.
+            role: a role, e.g. "roles/editor".
+            member_type: e.g. "user", "group", "serviceAccount", "domain"
+            or "allUsers".
+            domain: the domain of user, group, domain and service account
+            members, e.g. "example.com".
+            primitive_roles_only: only owner, editor and viewer bindings.
+        """
+        candidates = []
+        if principal is not None:
+            key = principal.lower()
+            by = self._by_member if ":" in key else self._by_identity
+            candidates.append(by.get(key, set()))
+        if role is not None:
+            candidates.append(self._by_role.get(role, set()))
+        if member_type is not None:
+            candidates.append(self._by_type.get(member_type, set()))
+        if domain is not None:
+            candidates.append(self._by_domain.get(domain.lower(), set()))
+        if primitive_roles_only:
+            candidates.append(self._primitive)
+
+        if not candidates:
+            return list(self.bindings)
+
+        candidates.sort(key=len)
+        positions = set(candidates[0]).intersection(*candidates[1:])
+        return [self.bindings[position] for position in sorted(positions)]
+
+    def as_dicts(self, bindings: list) -> list:
+        return [binding.to_dict(self._key) for binding in bindings]
+
+    def roles_by_principal(self, **criteria) -> dict:
+        """
+        Groups the bindings matching query(**criteria) into
+        {member: {project_id: [roles]}}.
+        """
+        grouped = defaultdict(lambda: defaultdict(list))
+        for binding in self.query(**criteria):
+            grouped[binding.member][binding.scope].append(binding.role)
+
+        return {
+            member: dict(projects) for member, projects in sorted(grouped.items())
+        }
+
+    def external_domains(self, internal_domains: list) -> dict:
+        """
+        Returns {domain: [members]} for every user, group and domain member
+        whose domain is neither one of internal_domains (or a subdomain of
+        one) nor Google-managed.
+        """
+        internal = tuple(domain.lower() for domain in internal_domains)
+        external = {}
+        for domain, positions in sorted(self._by_domain.items()):
+            if _is_within(domain, internal + GOOGLE_MANAGED_DOMAIN_SUFFIXES):
+                continue
+            members = {self.bindings[position].member for position in positions}
+            members = sorted(
+                member
+                for member in members
+                if member_type(member) != "serviceAccount"
+            )
+            if members:
+                external[domain] = members
+
+        return external
+
+
+def _is_within(domain: str, parents: tuple) -> bool:
+    return any(domain == parent or domain.endswith("." + parent) for parent in parents)
@@ -0,0 +1,168 @@
+import asyncio
+import os
+import structlog
+from app import mcp
+from fastmcp import Context
+from gcp.compute import firewalls, instances
+from gcp.concurrency import run_blocking
+from gcp.fanout import fan_out_async, progress_reporter
+from gcp.iam import policy
+from gcp.inventory.store import get_inventory
+from gcp.resourcemanager.projects import resolve_project_ids
+from gcp.storage import buckets
+
+logger = structlog.get_logger(__name__)
+
+# Background collection runs when projects or a parent are configured.
+INVENTORY_PROJECTS = [
+    project_id.strip()
+    for project_id in os.environ.get("GCP_MCP_INVENTORY_PROJECTS", "").split(",")
+    if project_id.strip()
+]
+INVENTORY_PARENT = os.environ.get("GCP_MCP_INVENTORY_PARENT") or None
+INVENTORY_INTERVAL = int(os.environ.get("GCP_MCP_INVENTORY_INTERVAL", 600))
+
+
+def collect_instances(project_id: str) -> list:
+    result = instances.list_instances_aggregated_logic.__wrapped__(project_id)
+    if isinstance(result, dict):
+        # Storing the VMs of the reachable zones only would report the
+        # others as removed; the previous snapshot is kept instead.
+        zones = ", ".join(result["unreachable_zones"])
+        raise RuntimeError(f"Zones {zones} could not be reached")
+    return _rows(result)
+
+
+def collect_firewalls(project_id: str) -> list:
+    return _rows(
+        firewalls.list_firewall_rules_logic.__wrapped__(project_id, refresh=True)
+    )
+
+
+def collect_buckets(project_id: str) -> list:
+    return _rows(buckets.list_gcs_buckets_logic.__wrapped__(project_id))
+
+
+def collect_iam_policy(project_id: str) -> list:
+    return [policy.list_project_iam_logic.__wrapped__(project_id)]
+
+
+def _rows(records: list) -> list:
+    return [record.to_dict() for record in records]
+
+
+# Each kind is collected with the undecorated logic of the tool it backs,
+# so the snapshot holds exactly the rows that tool returns (records as
+# their dicts, which the inventory queries filter on) and GCP errors
+# are reported instead of being stored as an empty snapshot. Modules are
+# looked up at call time as the tool modules import this one via app.
+COLLECTORS = {
+    "instances": collect_instances,
+    "firewalls": collect_firewalls,
+    "buckets": collect_buckets,
+    "iam_policy": collect_iam_policy,
+}
+
+
+@mcp.tool()
+async def refresh_inventory(
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    kinds: list[str] | None = None,
+    ctx: Context | None = None,
+) -> list:
+    """
+    Snapshots the instances, firewall rules, buckets and IAM policy of
+    many projects into the server's local inventory. While a snapshot is
+    fresh, list_gcp_instances, list_firewall_rules (and the other
+    firewall tools), list_gcs_buckets and list_project_iam answer from
+    it instead of calling Google Cloud.
+
+    Use this tool before asking many questions about the same projects.
+
+    Args:
+        project_ids: the project IDs to snapshot. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are snapshotted too. Optional.
+        kinds: only snapshot these of "instances", "firewalls", "buckets"
+        and "iam_policy". Optional.
+
+    Returns:
+        A list with one entry per project holding its "project_id" and
+        either the "result", how many resources of each kind were added,
+        updated, removed or unchanged, or the "error" that prevented
+        snapshotting it.
+    """
+    unknown = set(kinds or ()) - COLLECTORS.keys()
+    if unknown:
+        raise ValueError(f"Unknown inventory kinds: {sorted(unknown)}")
+
+    project_ids = await run_blocking(resolve_project_ids, project_ids, parent)
+    return await fan_out_async(
+        collect_inventory_logic,
+        project_ids,
+        on_result=progress_reporter(ctx),
+        kinds=kinds,
+    )
+
+
+def collect_inventory_logic(project_id: str, kinds: list | None = None) -> list:
+    inventory = get_inventory()
+    results = []
+    for kind in kinds or COLLECTORS:
+        # A kind failing, e.g. because its API is disabled in the project,
+        # keeps its previous snapshot and doesn't stop the other kinds.
+        try:
+            rows = COLLECTORS[kind](project_id)
+        except Exception as e:
+            results.append({"kind": kind, "error": f"{type(e).__name__}: {e}"})
+            continue
+        results.append(inventory.store(kind, project_id, rows))
+
+    return results
+
+
+@mcp.tool()
+async def inventory_status() -> list:
+    """
+    Lists the snapshots in the server's local inventory, with their age
+    in seconds and number of resources.
+    """
+    return await run_blocking(get_inventory().status)
+
+
+async def collect_periodically(
+    project_ids: list | None = None,
+    parent: str | None = None,
+    interval: float = INVENTORY_INTERVAL,
+):
+    """
+    Refreshes the inventory of the given projects every interval seconds
+    until cancelled.
+    """
+    while True:
+        try:
+            resolved = await run_blocking(resolve_project_ids, project_ids, parent)
+            entries = await fan_out_async(collect_inventory_logic, resolved)
+            logger.info(
+                "inventory_collected",
+                projects=len(entries),
+                failed=sum("error" in entry for entry in entries),
+            )
+        except Exception as e:
+            logger.error("inventory_collection_failed", error=str(e))
+        await asyncio.sleep(interval)
+
+
+def start_background_collection() -> asyncio.Task | None:
+    """
+    Starts collect_periodically for GCP_MCP_INVENTORY_PROJECTS and
+    GCP_MCP_INVENTORY_PARENT, or returns None when neither is set.
+    """
+    if not (INVENTORY_PROJECTS or INVENTORY_PARENT):
+        return None
+
+    return asyncio.create_task(
+        collect_periodically(INVENTORY_PROJECTS or None, INVENTORY_PARENT)
+    )
@@ -0,0 +1,172 @@
+import datetime
+import json
+import time
+from app import mcp
+from fastmcp import Context
+from gcp.concurrency import run_blocking
+from gcp.fanout import fan_out_async, progress_reporter
+from gcp.inventory.collector import COLLECTORS
+from gcp.inventory.query import iam_binding_rows
+from gcp.inventory.store import get_inventory
+from gcp.resourcemanager.projects import resolve_project_ids
+
+DEFAULT_DIFF_LIMIT = 200
+
+# The APIs' opaque change markers (see store.API_FINGERPRINTS): they tell
+# that a resource changed, not how, so they are not reported as fields.
+CHANGE_MARKERS = frozenset({"fingerprint", "etag"})
+
+
+@mcp.tool()
+async def diff_inventory(
+    kinds: list[str] | None = None,
+    since_hours: float = 24,
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    limit: int = DEFAULT_DIFF_LIMIT,
+    ctx: Context | None = None,
+) -> dict:
+    """
+    Reports what changed in the instances, firewall rules, buckets and IAM
+    policy of one or many projects since some hours ago: only the
+    resources added, removed or modified, from the history of the
+    server's local inventory (see refresh_inventory). Use this tool for
+    questions like "what changed in the firewall rules since yesterday?"
+    instead of listing everything and comparing.
+
+    The state of each project is snapshotted first unless a snapshot is
+    fresh. Changes can only be reported from the first snapshot of a
+    project on, so call refresh_inventory regularly (or configure the
+    background collection) to have a history to compare with.
+
+    Args:
+        kinds: only these of "instances", "firewalls", "buckets" and
+        "iam_policy". Optional, defaults to all of them.
+        since_hours: compare with the latest snapshot taken at least this
+        many hours ago (or the oldest one). Defaults to 24.
+        project_ids: the project IDs to check. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are checked too. Optional.
+        limit: the maximum number of changes returned. Defaults to 200.
+
+    Returns:
+        A dictionary with the snapshots "compared" (project_id, kind,
+        from and to), the "changes" (project_id, kind, "change": added,
+        removed or modified, and the resource's "name"), whether more
+        changes than "limit" were found ("truncated"), and per-project
+        "errors". Added and removed resources come with the "resource";
+        modified ones with the "fields" that changed, before and after
+        (none when only something the listing leaves out, such as a
+        bucket's IAM policy, did).
+        IAM policy changes are the bindings added or removed (role,
+        member and, for conditional bindings, condition).
+    """
+    kinds = kinds or list(COLLECTORS)
+    unknown = set(kinds) - COLLECTORS.keys()
+    if unknown:
+        raise ValueError(f"Unknown inventory kinds: {sorted(unknown)}")
+
+    since = time.time() - since_hours * 3600
+    project_ids = await run_blocking(resolve_project_ids, project_ids, parent)
+    entries = await fan_out_async(
+        diff_inventory_logic,
+        project_ids,
+        on_result=progress_reporter(ctx),
+        kinds=kinds,
+        since=since,
+    )
+
+    compared = []
+    changes = []
+    errors = []
+    for entry in entries:
+        if "error" in entry:
+            errors.append(entry)
+            continue
+        for diff in entry["result"]:
+            compared.append(
+                {
+                    "project_id": entry["project_id"],
+                    "kind": diff["kind"],
+                    "from": diff["from"],
+                    "to": diff["to"],
+                }
+            )
+            for change in diff["changes"]:
+                changes.append(
+                    {"project_id": entry["project_id"], "kind": diff["kind"], **change}
+                )
+
+    return {
+        "compared": compared,
+        "changes": changes[:limit],
+        "truncated": len(changes) > limit,
+        "errors": errors,
+    }
+
+
+def diff_inventory_logic(project_id: str, kinds: list, since: float) -> list:
+    inventory = get_inventory()
+    diffs = []
+    for kind in kinds:
+        if inventory.rows(kind, project_id) is None:
+            inventory.store(kind, project_id, COLLECTORS[kind](project_id))
+
+        collections = inventory.collections(kind, project_id)
+        earlier = [at for at in collections if at <= since]
+        start = earlier[-1] if earlier else collections[0]
+        end = collections[-1]
+
+        changes = []
+        for key, before, after in inventory.diff(kind, project_id, start, end):
+            if kind == "iam_policy":
+                changes.extend(policy_changes(before, after))
+            else:
+                changes.append(resource_change(key, before, after))
+
+        diffs.append(
+            {
+                "kind": kind,
+                "from": _timestamp(start),
+                "to": _timestamp(end),
+                "changes": changes,
+            }
+        )
+
+    return diffs
+
+
+def resource_change(key: str, before: dict | None, after: dict | None) -> dict:
+    """Describes how a resource changed, keeping only the fields that did."""
+    if before is None:
+        return {"change": "added", "name": key, "resource": after}
+    if after is None:
+        return {"change": "removed", "name": key, "resource": before}
+
+    fields = {
+        field: {"before": before.get(field), "after": after.get(field)}
+        for field in sorted((before.keys() | after.keys()) - CHANGE_MARKERS)
+        if before.get(field) != after.get(field)
+    }
+    return {"change": "modified", "name": key, "fields": fields}
+
+
+def policy_changes(before: dict | None, after: dict | None) -> list:
+    """Returns the bindings added to or removed from an IAM policy."""
+    old = _bindings(before)
+    new = _bindings(after)
+    return [
+        {"change": "removed", **json.loads(binding)} for binding in sorted(old - new)
+    ] + [{"change": "added", **json.loads(binding)} for binding in sorted(new - old)]
+
+
+def _bindings(policy: dict | None) -> set:
+    rows = iam_binding_rows([policy] if policy else [])
+    return {json.dumps(row, sort_keys=True) for row in rows}
+
+
+def _timestamp(collected_at: float) -> str:
+    return datetime.datetime.fromtimestamp(collected_at, datetime.UTC).isoformat(
+        timespec="seconds"
+    )
@@ -0,0 +1,268 @@
+import ipaddress
+import operator
+import re
+
+# Quoted strings, parentheses, commas, comparison operators and bare words.
+TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+        |(?P<symbol>[(),]|<=|>=|!=|=|<|>)
+        |(?P<word>[^\s(),=<>!"']+)
+    )""",
+    re.VERBOSE,
+)
+
+COMPARISONS = {
+    "=": operator.eq,
+    "!=": operator.eq,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+KEYWORDS = {"and", "or", "not", "in", "startswith", "overlaps"}
+
+
+def compile_filter(expression: str | None, fields: set | None = None):
+    """
+    Compiles a filter expression into a predicate taking a row (a dict
+    as returned by the list tools) and returning whether it matches.
+
+    The expression is parsed once, so evaluating it over many rows is a
+    chain of plain function calls. Supported syntax:
+
+        status = RUNNING and zone startswith "us-"
+        labels.env in (prod, staging)
+        source_ranges in (0.0.0.0/0, ::/0) and not disabled = true
+        source_ranges overlaps 10.0.0.0/8
+        priority < 1000 or (direction = EGRESS)
+        labels.team = *
+
+    Fields are dotted paths into nested dicts and lists, and match when
+    any of their values does: allowed.ports = 22 matches a rule with
+    port 22 in any of its allowed entries. "= *" matches rows having the
+    field at all, "!=" rows where no value is equal. Values are compared
+    as numbers or booleans when the field holds one, else as strings;
+    but <, <=, > and >= against a number compare numerically, so
+    allowed.ports < 1024 reads "8080" as 8080 (and doesn't match a
+    non-numeric value such as "8000-9000"). "overlaps" matches ranges
+    sharing any address with the CIDR, so every IPv4 range overlaps
+    0.0.0.0/0.
+
+    Raises ValueError if the expression is malformed, or, given the
+    fields rows have, if it compares a field not among them (which would
+    silently match nothing). An empty expression matches every row.
+    """
+    if not expression or not expression.strip():
+        return lambda row: True
+
+    parser = _Parser(_tokenize(expression), fields)
+    predicate = parser.parse_or()
+    if parser.peek() is not None:
+        raise ValueError(f"Unexpected {parser.peek()[1]!r} in filter")
+
+    return predicate
+
+
+def field_values(row, path: list) -> list:
+    """Returns every value at a dotted path, flattening lists on the way."""
+    values = [row]
+    for part in path:
+        next_values = []
+        for value in values:
+            if isinstance(value, dict) and part in value:
+                value = value[part]
+                if isinstance(value, list):
+                    next_values.extend(value)
+                else:
+                    next_values.append(value)
+        values = next_values
+
+    return values
+
+
+def _tokenize(expression: str) -> list:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Invalid filter near {expression[position:]!r}")
+        position = match.end()
+
+        if match.group("string") is not None:
+            literal = match.group("string")[1:-1]
+            tokens.append(("value", re.sub(r"\\(.)", r"\1", literal)))
+        elif match.group("symbol") is not None:
+            tokens.append(("symbol", match.group("symbol")))
+        elif match.group("word").lower() in KEYWORDS:
+            tokens.append(("keyword", match.group("word").lower()))
+        else:
+            tokens.append(("value", match.group("word")))
+
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: list, fields: set | None = None):
+        self._tokens = tokens
+        self._position = 0
+        self._fields = fields
+
+    def peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def take(self, kind: str, text: str | None = None) -> str:
+        token = self.peek()
+        if token is None or token[0] != kind or text not in (None, token[1]):
+            found = "end of filter" if token is None else repr(token[1])
+            raise ValueError(f"Expected {text or kind} in filter, found {found}")
+        self._position += 1
+        return token[1]
+
+    def accept(self, kind: str, text: str) -> bool:
+        if self.peek() == (kind, text):
+            self._position += 1
+            return True
+        return False
+
+    def parse_or(self):
+        predicates = [self.parse_and()]
+        while self.accept("keyword", "or"):
+            predicates.append(self.parse_and())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda row: any(predicate(row) for predicate in predicates)
+
+    def parse_and(self):
+        predicates = [self.parse_not()]
+        while self.accept("keyword", "and"):
+            predicates.append(self.parse_not())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda row: all(predicate(row) for predicate in predicates)
+
+    def parse_not(self):
+        if self.accept("keyword", "not"):
+            predicate = self.parse_not()
+            return lambda row: not predicate(row)
+        if self.accept("symbol", "("):
+            predicate = self.parse_or()
+            self.take("symbol", ")")
+            return predicate
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        path = self.take("value").split(".")
+        if self._fields is not None and path[0] not in self._fields:
+            raise ValueError(
+                f"Unknown field {'.'.join(path)!r} in filter; the fields are "
+                + ", ".join(sorted(self._fields))
+            )
+        token = self.peek()
+        if token == ("keyword", "in"):
+            self._position += 1
+            return _in(path, self.parse_list())
+        if token == ("keyword", "startswith"):
+            self._position += 1
+            return _startswith(path, self.take("value"))
+        if token == ("keyword", "overlaps"):
+            self._position += 1
+            return _overlaps(path, self.take("value"))
+        if token is not None and token[0] == "symbol" and token[1] in COMPARISONS:
+            self._position += 1
+            return _compare(path, token[1], self.take("value"))
+
+        found = "end of filter" if token is None else repr(token[1])
+        field = ".".join(path)
+        raise ValueError(f"Expected an operator after {field}, found {found}")
+
+    def parse_list(self) -> list:
+        self.take("symbol", "(")
+        literals = [self.take("value")]
+        while self.accept("symbol", ","):
+            literals.append(self.take("value"))
+        self.take("symbol", ")")
+        return literals
+
+
+def _coerce(literal: str, value):
+    """Converts a literal to the type of the field value it's compared to."""
+    if isinstance(value, bool):
+        return literal.lower() == "true"
+    if isinstance(value, (int, float)):
+        return float(literal)
+    return literal
+
+
+def _matches(compare, literal: str, value, ordered: bool = False) -> bool:
+    actual = value if isinstance(value, (bool, int, float)) else str(value)
+    if ordered and isinstance(actual, str) and _is_number(literal):
+        # Strings would order "8080" before "22": compare the numbers.
+        if not _is_number(actual):
+            return False
+        actual = float(actual)
+    try:
+        expected = _coerce(literal, actual)
+    except ValueError:
+        return False
+    return compare(actual, expected)
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _compare(path: list, symbol: str, literal: str):
+    if literal == "*" and symbol in ("=", "!="):
+        exists = symbol == "="
+        return lambda row: bool(field_values(row, path)) == exists
+
+    compare = COMPARISONS[symbol]
+    if symbol == "!=":
+        return lambda row: not any(
+            _matches(compare, literal, value) for value in field_values(row, path)
+        )
+    ordered = symbol not in ("=", "!=")
+    return lambda row: any(
+        _matches(compare, literal, value, ordered)
+        for value in field_values(row, path)
+    )
+
+
+def _in(path: list, literals: list):
+    return lambda row: any(
+        _matches(operator.eq, literal, value)
+        for value in field_values(row, path)
+        for literal in literals
+    )
+
+
+def _startswith(path: list, prefix: str):
+    return lambda row: any(
+        str(value).startswith(prefix) for value in field_values(row, path)
+    )
+
+
+def _overlaps(path: list, cidr: str):
+    try:
+        network = ipaddress.ip_network(cidr, strict=False)
+    except ValueError as e:
+        raise ValueError(f"Invalid CIDR in filter: {cidr!r}") from e
+
+    def overlaps(value) -> bool:
+        try:
+            candidate = ipaddress.ip_network(str(value), strict=False)
+        except ValueError:
+            return False
+        return candidate.version == network.version and candidate.overlaps(network)
+
+    return lambda row: any(overlaps(value) for value in field_values(row, path))
@@ -0,0 +1,143 @@
+import dataclasses
+from app import mcp
+from gcp.concurrency import run_blocking
+from gcp.fanout import fan_out_async
+from gcp.inventory.collector import COLLECTORS
+from gcp.inventory.expressions import compile_filter
+from gcp.inventory.store import get_inventory
+from gcp.records import BucketSummary, FirewallRule, InstanceSummary
+from gcp.resourcemanager.projects import resolve_project_ids
+from gcp.utils import project_fields
+
+# Queryable kinds and the inventory snapshot each one is read from.
+QUERY_KINDS = {
+    "instances": "instances",
+    "firewalls": "firewalls",
+    "buckets": "buckets",
+    "iam_bindings": "iam_policy",
+}
+
+# The fields of each kind's rows, which filters may compare. Instances'
+# fingerprints are only the inventory's change marker, so they are
+# neither queryable nor returned.
+HIDDEN_FIELDS = {"instances": {"fingerprint"}}
+QUERY_FIELDS = {
+    "instances": {field.name for field in dataclasses.fields(InstanceSummary)}
+    - HIDDEN_FIELDS["instances"],
+    "firewalls": {field.name for field in dataclasses.fields(FirewallRule)},
+    "buckets": {field.name for field in dataclasses.fields(BucketSummary)},
+    "iam_bindings": {"role", "member", "condition"},
+}
+
+DEFAULT_QUERY_LIMIT = 200
+
+
+@mcp.tool()
+async def query_inventory(
+    kind: str,
+    filter: str | None = None,
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    fields: list[str] | None = None,
+    limit: int = DEFAULT_QUERY_LIMIT,
+) -> dict:
+    """
+    Returns only the instances, firewall rules, buckets or IAM bindings
+    matching a filter, evaluated by the server over its local inventory
+    (see refresh_inventory). Projects without a fresh snapshot are
+    snapshotted first. Prefer this tool over pulling whole lists such as
+    list_firewall_rules and filtering them yourself.
+
+    Args:
+        kind: "instances", "firewalls", "buckets" or "iam_bindings". Rows
+        have the fields of list_gcp_instances (without "fingerprint"),
+        list_firewall_rules and list_gcs_buckets; IAM bindings have
+        "role", "member" and, for conditional bindings, "condition".
+        Instance rows have no labels: use list_gcp_instances with labels
+        to filter VMs on them.
+        filter: Optional. Field comparisons (=, !=, <, <=, >, >=) joined
+        with and / or / not and parentheses. Also supports
+        "field in (a, b)", "field startswith prefix", "field overlaps
+        10.0.0.0/8" (shares an address with the CIDR, so every IPv4 range
+        overlaps 0.0.0.0/0) and "field = *" (field is set). Fields are
+        dotted paths, e.g. "labels.env = prod" or "allowed.ports = 22",
+        and match when any of their values does. Comparing with a number
+        using <, <=, > or >= is numeric, e.g. "allowed.ports < 1024".
+        Example, rules open to the internet: 'direction = INGRESS and
+        source_ranges in (0.0.0.0/0, ::/0)'. Filtering on a field the
+        kind's rows don't have is an error.
+        project_ids: the project IDs to query. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are queried too. Optional.
+        fields: Optional. Only return these fields of each row.
+        limit: the maximum number of rows returned. Defaults to 200.
+
+    Returns:
+        A dictionary with the matching "items" (each with its
+        "project_id"), whether more rows matched than "limit"
+        ("truncated"), and per-project "errors".
+    """
+    if kind not in QUERY_KINDS:
+        raise ValueError(f"kind must be one of {sorted(QUERY_KINDS)}, got {kind!r}")
+
+    # Parsed once here, so a malformed filter fails before any GCP call.
+    predicate = compile_filter(filter, QUERY_FIELDS[kind])
+    project_ids = await run_blocking(resolve_project_ids, project_ids, parent)
+    entries = await fan_out_async(
+        query_inventory_logic, project_ids, kind=kind, predicate=predicate
+    )
+
+    items = []
+    errors = []
+    for entry in entries:
+        if "error" in entry:
+            errors.append(entry)
+            continue
+        for row in entry["result"]:
+            row = project_fields(row, fields)
+            items.append({"project_id": entry["project_id"], **row})
+
+    return {
+        "items": items[:limit],
+        "truncated": len(items) > limit,
+        "errors": errors,
+    }
+
+
+def query_inventory_logic(project_id: str, kind: str, predicate) -> list:
+    snapshot_kind = QUERY_KINDS[kind]
+    inventory = get_inventory()
+    rows = inventory.rows(snapshot_kind, project_id)
+    if rows is None:
+        rows = COLLECTORS[snapshot_kind](project_id)
+        inventory.store(snapshot_kind, project_id, rows)
+        # Read back so rows have the snapshot's JSON form and order.
+        rows = inventory.rows(snapshot_kind, project_id)
+
+    if kind == "iam_bindings":
+        rows = iam_binding_rows(rows)
+
+    matching = [row for row in rows if predicate(row)]
+    hidden = HIDDEN_FIELDS.get(kind)
+    if hidden:
+        matching = [
+            {field: value for field, value in row.items() if field not in hidden}
+            for row in matching
+        ]
+
+    return matching
+
+
+def iam_binding_rows(policies: list) -> list:
+    """Flattens IAM policies into one row per role and member."""
+    rows = []
+    for policy in policies:
+        for binding in policy.get("bindings", []):
+            for member in binding.get("members", []):
+                row = {"role": binding["role"], "member": member}
+                if "condition" in binding:
+                    row["condition"] = binding["condition"]
+                rows.append(row)
+
+    return rows
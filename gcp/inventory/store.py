@@ -0,0 +1,385 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+INVENTORY_PATH = os.environ.get(
+    "GCP_MCP_INVENTORY_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "gcp-mcp", "inventory.sqlite3"),
+)
+
+# Tools answer from a snapshot only when it was collected at most this many
+# seconds ago; otherwise they call GCP as usual.
+MAX_STALENESS = int(os.environ.get("GCP_MCP_INVENTORY_MAX_STALENESS", 900))
+
+# How long, in seconds, the history of every resource is kept for diffs.
+HISTORY_RETENTION = int(
+    os.environ.get("GCP_MCP_INVENTORY_HISTORY_RETENTION", 30 * 24 * 3600)
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    kind TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, project_id, key)
+);
+CREATE INDEX IF NOT EXISTS resources_by_key ON resources (kind, key);
+CREATE TABLE IF NOT EXISTS snapshots (
+    kind TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    collected_at REAL NOT NULL,
+    PRIMARY KEY (kind, project_id)
+);
+CREATE TABLE IF NOT EXISTS collections (
+    kind TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    collected_at REAL NOT NULL,
+    PRIMARY KEY (kind, project_id, collected_at)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    kind TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    collected_at REAL NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data TEXT,
+    PRIMARY KEY (kind, project_id, key, collected_at)
+);
+"""
+
+# The state of every changed resource as of a time: its latest change
+# then, which has no data when the resource was removed.
+STATES_AT = """
+SELECT c.key, c.fingerprint, c.data FROM changes c
+WHERE c.kind = :kind AND c.project_id = :project_id
+AND c.key IN (
+    SELECT key FROM changes
+    WHERE kind = :kind AND project_id = :project_id
+    AND collected_at > :since AND collected_at <= :until
+)
+AND c.collected_at = (
+    SELECT MAX(collected_at) FROM changes
+    WHERE kind = c.kind AND project_id = c.project_id AND key = c.key
+    AND collected_at <= :at
+)
+"""
+
+
+def resource_key(kind: str, row: dict) -> str:
+    """
+    Returns what identifies a row within its project: VM names are only
+    unique per zone, and a project has a single IAM policy.
+    """
+    if kind == "instances":
+        return f"{row['zone']}/{row['name']}"
+    if kind == "iam_policy":
+        return "policy"
+    return row["name"]
+
+
+# The fields of a kind's rows that the APIs change whenever the resource
+# does: an instance's fingerprint changes with its configuration (its
+# status aside), the etags of buckets and IAM policies with their
+# metadata. Firewall rules have no such field.
+API_FINGERPRINTS = {
+    "instances": ("fingerprint", "status"),
+    "buckets": ("etag",),
+    "iam_policy": ("etag",),
+}
+
+
+def fingerprint(kind: str, row: dict) -> str:
+    """
+    Returns what changes whenever the resource does: the API's own
+    fingerprint fields of the row (see API_FINGERPRINTS), else a hash of
+    the row's canonical JSON.
+    """
+    fields = API_FINGERPRINTS.get(kind, ())
+    if fields and all(row.get(field) for field in fields):
+        return ":".join(str(row[field]) for field in fields)
+    return hashlib.sha1(_dumps(row).encode()).hexdigest()
+
+
+class InventoryStore:
+    """
+    A local SQLite snapshot of the rows the list tools return, one table
+    row per resource, stored as JSON along with its fingerprint (see
+    fingerprint).
+
+    Storing a fresh listing only serializes and writes the resources
+    whose fingerprint changed and deletes the ones that are gone, so
+    refreshing an unchanged project is a read plus one timestamp update.
+
+    Every change is also appended to a history (the first collection
+    of a project records all its resources), so diff can tell what
+    changed between any two collections of the last HISTORY_RETENTION
+    seconds.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def store(self, kind: str, project_id: str, rows: list) -> dict:
+        """
+        Replaces the snapshot of kind in project_id with rows and returns
+        how many resources were added, updated, removed and unchanged.
+        """
+        now = time.time()
+        fresh = {resource_key(kind, row): row for row in rows}
+        fingerprints = {key: fingerprint(kind, row) for key, row in fresh.items()}
+
+        with self._lock, self._connection as connection:
+            stored = dict(
+                connection.execute(
+                    "SELECT key, fingerprint FROM resources"
+                    " WHERE kind = ? AND project_id = ?",
+                    (kind, project_id),
+                )
+            )
+            first = not connection.execute(
+                "SELECT 1 FROM collections WHERE kind = ? AND project_id = ?",
+                (kind, project_id),
+            ).fetchone()
+            changed_keys = [
+                key
+                for key, fingerprint in fingerprints.items()
+                if stored.get(key) != fingerprint
+            ]
+            # Only the rows to write are serialized.
+            recorded = fresh if first else changed_keys
+            data = {key: _dumps(fresh[key]) for key in recorded}
+            changed = [
+                (kind, project_id, key, fingerprints[key], data[key], now)
+                for key in changed_keys
+            ]
+            removed = [(kind, project_id, key) for key in stored.keys() - fresh]
+            history = [
+                (kind, project_id, key, now, fingerprints[key], data[key])
+                for key in data
+            ]
+            history.extend((*row, now, "", None) for row in removed)
+            connection.executemany(
+                "INSERT OR REPLACE INTO changes VALUES (?, ?, ?, ?, ?, ?)", history
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO collections VALUES (?, ?, ?)",
+                (kind, project_id, now),
+            )
+            _prune_history(connection, kind, project_id, now - HISTORY_RETENTION)
+            connection.executemany(
+                "INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?)", changed
+            )
+            connection.executemany(
+                "DELETE FROM resources WHERE kind = ? AND project_id = ? AND key = ?",
+                removed,
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                (kind, project_id, now),
+            )
+
+        added = len(fresh.keys() - stored.keys())
+        return {
+            "kind": kind,
+            "added": added,
+            "updated": len(changed) - added,
+            "removed": len(removed),
+            "unchanged": len(fresh) - len(changed),
+        }
+
+    def rows(
+        self, kind: str, project_id: str, max_staleness: float = MAX_STALENESS
+    ) -> list | None:
+        """
+        Returns the snapshot of kind in project_id, or None when there is
+        none collected within the last max_staleness seconds.
+        """
+        with self._lock:
+            snapshot = self._connection.execute(
+                "SELECT collected_at FROM snapshots WHERE kind = ? AND project_id = ?",
+                (kind, project_id),
+            ).fetchone()
+            if snapshot is None or time.time() - snapshot[0] > max_staleness:
+                return None
+
+            cursor = self._connection.execute(
+                "SELECT data FROM resources"
+                " WHERE kind = ? AND project_id = ? ORDER BY key",
+                (kind, project_id),
+            )
+            return [json.loads(data) for (data,) in cursor]
+
+    def expire(self, project_id: str | None = None) -> int:
+        """
+        Marks the snapshots of project_id (of every project if None) as
+        stale, so tools call GCP again until the next collection, and
+        returns how many were. Their history is kept for diffs.
+        """
+        with self._lock, self._connection as connection:
+            cursor = connection.execute(
+                "DELETE FROM snapshots WHERE ? IS NULL OR project_id = ?",
+                (project_id, project_id),
+            )
+            return cursor.rowcount
+
+    def collections(self, kind: str, project_id: str) -> list:
+        """Returns when kind was collected in project_id, oldest first."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT collected_at FROM collections"
+                " WHERE kind = ? AND project_id = ? ORDER BY collected_at",
+                (kind, project_id),
+            )
+            return [collected_at for (collected_at,) in cursor]
+
+    def diff(self, kind: str, project_id: str, since: float, until: float) -> list:
+        """
+        Returns (key, before, after) for every resource of kind whose
+        fingerprint differs between the collections as of since and as of
+        until, sorted by key. before is None for added resources, after
+        for removed ones. Only the resources changed in between are read.
+        """
+        parameters = {
+            "kind": kind,
+            "project_id": project_id,
+            "since": since,
+            "until": until,
+        }
+        with self._lock:
+            before = {
+                key: (fingerprint, data)
+                for key, fingerprint, data in self._connection.execute(
+                    STATES_AT, {**parameters, "at": since}
+                )
+            }
+            after = {
+                key: (fingerprint, data)
+                for key, fingerprint, data in self._connection.execute(
+                    STATES_AT, {**parameters, "at": until}
+                )
+            }
+
+        differences = []
+        for key in sorted(before.keys() | after.keys()):
+            old, new = before.get(key, ("", None)), after.get(key, ("", None))
+            if old[0] != new[0]:
+                differences.append((key, _loads(old[1]), _loads(new[1])))
+
+        return differences
+
+    def status(self) -> list:
+        """Returns the age and size of every snapshot."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT s.kind, s.project_id, s.collected_at, COUNT(r.key)"
+                " FROM snapshots s LEFT JOIN resources r"
+                " ON r.kind = s.kind AND r.project_id = s.project_id"
+                " GROUP BY s.kind, s.project_id ORDER BY s.project_id, s.kind"
+            )
+            now = time.time()
+            return [
+                {
+                    "kind": kind,
+                    "project_id": project_id,
+                    "age_seconds": round(now - collected_at),
+                    "resources": count,
+                }
+                for kind, project_id, collected_at, count in cursor
+            ]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_lock = threading.Lock()
+_inventory = None
+
+
+def get_inventory() -> InventoryStore:
+    """Returns the process-wide inventory, opening it on first use."""
+    global _inventory
+    if _inventory is None:
+        with _lock:
+            if _inventory is None:
+                _inventory = InventoryStore(INVENTORY_PATH)
+                logger.info("inventory_opened", path=INVENTORY_PATH)
+    return _inventory
+
+
+def snapshot_rows(kind: str, project_id: str) -> list | None:
+    """
+    Returns the project's snapshot of kind if it is fresh enough for tools
+    to answer from, else None. Never creates the inventory: servers that
+    don't collect one keep calling GCP directly.
+    """
+    if _inventory is None and not os.path.exists(INVENTORY_PATH):
+        return None
+
+    return get_inventory().rows(kind, project_id)
+
+
+def expire_snapshots(project_id: str | None = None) -> int:
+    """
+    Expires the project's snapshots (see InventoryStore.expire), without
+    creating the inventory when there is none.
+    """
+    if _inventory is None and not os.path.exists(INVENTORY_PATH):
+        return 0
+
+    return get_inventory().expire(project_id)
+
+
+def close():
+    global _inventory
+    with _lock:
+        inventory, _inventory = _inventory, None
+    if inventory is not None:
+        inventory.close()
+
+
+def _prune_history(connection, kind: str, project_id: str, cutoff: float):
+    # Changes older than cutoff are only kept as the state of their
+    # resource at cutoff, and removed resources not even then.
+    connection.execute(
+        "DELETE FROM changes AS c WHERE kind = ? AND project_id = ?"
+        " AND collected_at < ? AND (fingerprint = '' OR EXISTS ("
+        " SELECT 1 FROM changes WHERE kind = c.kind AND project_id = c.project_id"
+        " AND key = c.key AND collected_at > c.collected_at AND collected_at <= ?))",
+        (kind, project_id, cutoff, cutoff),
+    )
+    connection.execute(
+        "DELETE FROM collections WHERE kind = ? AND project_id = ?"
+        " AND collected_at < ?",
+        (kind, project_id, cutoff),
+    )
+
+
+def _loads(data: str | None) -> dict | None:
+    return None if data is None else json.loads(data)
+
+
+def _dumps(row: dict) -> str:
+    return json.dumps(row, sort_keys=True, default=_json_default)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
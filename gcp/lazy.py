@@ -0,0 +1,70 @@
+import importlib.util
+import os
+import sys
+import threading
+import time
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Set to import every lazily imported library in the background as soon as
+# the server starts, so the first tool call doesn't pay for it.
+WARM_UP = os.environ.get("GCP_MCP_WARM_UP", "").lower() in ("1", "true", "yes")
+
+_lock = threading.Lock()
+_lazy_modules = {}
+
+
+def lazy_import(name: str):
+    """
+    Returns module name without executing it: the module is loaded on
+    first attribute access (importlib.util.LazyLoader).
+
+    The Google client libraries take seconds to import, most of it in
+    generated protobuf types, so tool modules import them with this and
+    only the tools actually called pay for their library. Annotations
+    using their types must be quoted, or defining the function would
+    load the module. Not for _pb2 modules: protobuf registers their
+    dependencies when they are imported.
+    """
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        _lazy_modules[name] = module
+        # As the import system does, e.g. google.cloud.compute_v1.
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, module)
+
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    """Whether a module returned by lazy_import has been loaded yet."""
+    module = sys.modules.get(name)
+    return module is not None and not isinstance(module, importlib.util._LazyModule)
+
+
+def warm_up():
+    """Loads every module imported with lazy_import so far."""
+    for name, module in list(_lazy_modules.items()):
+        if is_loaded(name):
+            continue
+        started = time.perf_counter()
+        # Any attribute access loads a lazy module.
+        getattr(module, "__file__", None)
+        logger.info(
+            "lazy_module_loaded",
+            module=name,
+            seconds=round(time.perf_counter() - started, 3),
+        )
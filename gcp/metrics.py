@@ -0,0 +1,291 @@
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+import pydantic_core
+from fastmcp.server.middleware import Middleware
+from gcp.cache import response_cache
+from gcp.singleflight import in_flight
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# The tool being served by the current task or worker thread (run_blocking
+# copies context variables), used to label GCP-level metrics.
+current_tool = contextvars.ContextVar("current_tool", default="")
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[label] for label in self.labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels[label] for label in self.labels), 0.0)
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple,
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # key -> [per-bucket counts (non-cumulative) + overflow, sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[label] for label in self.labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._values.get(tuple(labels[label] for label in self.labels))
+        return 0 if series is None else series[2]
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    bucket_labels = _labels(
+                        self.labels + ("le",), key + (f"{bound:g}",)
+                    )
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                bucket_labels = _labels(self.labels + ("le",), key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total:g}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        escaped = escaped.replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+tool_calls = Counter(
+    "gcp_mcp_tool_calls_total", "Tool calls by outcome.", ("tool", "outcome")
+)
+tool_duration = Histogram(
+    "gcp_mcp_tool_duration_seconds", "End-to-end tool call latency.", ("tool",)
+)
+gcp_api_duration = Histogram(
+    "gcp_mcp_gcp_api_duration_seconds",
+    "Time spent in Google Cloud API calls, per tool and API.",
+    ("tool", "service"),
+)
+serialization_duration = Histogram(
+    "gcp_mcp_serialization_duration_seconds",
+    "Time spent serializing tool results to JSON.",
+    ("tool",),
+)
+response_bytes = Counter(
+    "gcp_mcp_tool_response_bytes_total", "Bytes of tool results returned.", ("tool",)
+)
+gcp_requests = Counter(
+    "gcp_mcp_gcp_http_requests_total",
+    "HTTP requests to Google Cloud APIs, i.e. list pages and gets fetched.",
+    ("tool", "service"),
+)
+rate_limit_wait = Counter(
+    "gcp_mcp_rate_limit_wait_seconds_total",
+    "Time spent waiting for the per-API rate limiter.",
+    ("service",),
+)
+errors = Counter(
+    "gcp_mcp_errors_total",
+    "Errors by exception class, raised by tools or handled on their behalf.",
+    ("tool", "error"),
+)
+
+METRICS = (
+    tool_calls,
+    tool_duration,
+    gcp_api_duration,
+    serialization_duration,
+    response_bytes,
+    gcp_requests,
+    rate_limit_wait,
+    errors,
+)
+
+
+def record_error(error: BaseException, tool: str | None = None):
+    """
+    Counts error in gcp_mcp_errors_total, unless it was counted already
+    or was raised from an error that was, e.g. the ToolError that
+    handle_gcp_exceptions raises once retries are exhausted.
+    """
+    cause = error
+    while cause is not None:
+        if getattr(cause, "_gcp_mcp_recorded", False):
+            return
+        cause = cause.__cause__
+
+    errors.inc(tool=tool or current_tool.get(), error=type(error).__name__)
+    error._gcp_mcp_recorded = True
+
+
+def timed_serializer(data) -> str:
+    """FastMCP's default tool result serializer, timed per tool."""
+    started = time.perf_counter()
+    text = pydantic_core.to_json(data, fallback=str).decode()
+    elapsed = time.perf_counter() - started
+    serialization_duration.observe(elapsed, tool=current_tool.get())
+    return text
+
+
+def response_hooks(client) -> list | None:
+    """
+    Returns the response hooks of a client whose transport is a requests
+    session (Compute REST clients and storage.Client), called once per
+    HTTP request, or None for gRPC clients.
+    """
+    transport = getattr(client, "_transport", None)
+    session = getattr(transport, "_session", None) or getattr(client, "_http", None)
+    hooks = getattr(session, "hooks", None)
+    if not isinstance(hooks, dict):
+        return None
+    return hooks.setdefault("response", [])
+
+
+def instrument_client(client, service: str):
+    """
+    Counts the HTTP requests of a client (see response_hooks). gRPC
+    clients are left alone; their calls are still timed by gcp.throttling.
+    """
+    hooks = response_hooks(client)
+    if hooks is None:
+        return
+
+    def count_request(response, *args, **kwargs):
+        gcp_requests.inc(tool=current_tool.get(), service=service)
+        return response
+
+    hooks.append(count_request)
+
+
+def render() -> str:
+    """Renders every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    cache_stats = response_cache.stats()["tools"]
+    lines.extend(
+        _sample_lines(
+            "gcp_mcp_cache_hits_total",
+            "Response cache hits.",
+            "counter",
+            {("cache", name): counts["hits"] for name, counts in cache_stats.items()},
+        )
+    )
+    lines.extend(
+        _sample_lines(
+            "gcp_mcp_cache_misses_total",
+            "Response cache misses.",
+            "counter",
+            {("cache", name): counts["misses"] for name, counts in cache_stats.items()},
+        )
+    )
+    lines.extend(
+        _sample_lines(
+            "gcp_mcp_cache_hit_ratio",
+            "Response cache hits per lookup.",
+            "gauge",
+            {
+                ("cache", name): counts["hits"] / (counts["hits"] + counts["misses"])
+                for name, counts in cache_stats.items()
+                if counts["hits"] + counts["misses"]
+            },
+        )
+    )
+    lines.extend(
+        _sample_lines(
+            "gcp_mcp_coalesced_calls_total",
+            "Calls served by an identical call already in flight.",
+            "counter",
+            {
+                ("function", name): counts["coalesced"]
+                for name, counts in in_flight.stats().items()
+            },
+        )
+    )
+
+    return "\n".join(lines) + "\n"
+
+
+def _sample_lines(name: str, documentation: str, kind: str, samples: dict) -> list:
+    # For values read from other components at scrape time.
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for (label, value), sample in sorted(samples.items()):
+        lines.append(f"{name}{_labels((label,), (value,))} {sample:g}")
+    return lines
+
+
+class MetricsMiddleware(Middleware):
+    """
+    Times every tool call, counts its outcome, errors and response size,
+    and makes the tool name available to GCP-level metrics.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        token = current_tool.set(tool)
+        started = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception as e:
+            tool_calls.inc(tool=tool, outcome="error")
+            record_error(e, tool)
+            raise
+        else:
+            tool_calls.inc(tool=tool, outcome="ok")
+            texts = (getattr(block, "text", "") for block in result.content)
+            response_bytes.inc(sum(len(text.encode()) for text in texts), tool=tool)
+            return result
+        finally:
+            tool_duration.observe(time.perf_counter() - started, tool=tool)
+            current_tool.reset(token)
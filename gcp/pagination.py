@@ -0,0 +1,58 @@
+import base64
+import json
+
+# The Compute API refuses maxResults above 500.
+MAX_PAGE_SIZE = 500
+
+
+def encode_page_token(kind: str, state: dict) -> str:
+    """
+    Wraps the state needed to fetch the next page (an underlying API page
+    token, or an offset into a snapshot) into an opaque cursor for the
+    agent to pass back as page_token.
+    """
+    payload = json.dumps({"kind": kind, **state}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_page_token(kind: str, page_token: str | None) -> dict:
+    """
+    Returns the state stored in a cursor made by encode_page_token, or {}
+    for the first page. Raises ValueError for malformed cursors and for
+    cursors issued by a different listing.
+    """
+    if not page_token:
+        return {}
+
+    try:
+        state = json.loads(base64.urlsafe_b64decode(page_token.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page_token: {page_token!r}") from e
+
+    if not isinstance(state, dict) or state.pop("kind", None) != kind:
+        raise ValueError(f"page_token was not issued by this listing: {page_token!r}")
+
+    return state
+
+
+def clamp_page_size(page_size: int) -> int:
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def resolve_page_size(page_size: int | None, state: dict) -> int:
+    """
+    The page size asked for or, when a later page is fetched without
+    one, the size of the previous page kept in its cursor's state.
+    """
+    return clamp_page_size(page_size or state.get("page_size") or MAX_PAGE_SIZE)
+
+
+def page_result(kind: str, items: list, next_state: dict | None) -> dict:
+    """
+    Builds the response of a paginated listing. next_page_token is None on
+    the last page.
+    """
+    return {
+        "items": items,
+        "next_page_token": encode_page_token(kind, next_state) if next_state else None,
+    }
@@ -0,0 +1,86 @@
+from app import mcp
+from fastmcp.exceptions import ToolError
+from google.api_core import exceptions
+from gcp.clients import get_client
+from gcp.concurrency import run_blocking
+from gcp.lazy import lazy_import
+from gcp.singleflight import single_flight
+from gcp.throttling import throttled
+from gcp.utils import handle_gcp_exceptions
+
+resourcemanager_v3 = lazy_import("google.cloud.resourcemanager_v3")
+
+
+@mcp.tool()
+async def list_projects(parent: str) -> list:
+    """
+    Lists every active Google Cloud project under an organization or a
+    folder, including projects in nested folders.
+
+    Use this tool to discover which projects exist before asking
+    questions about them, e.g. "which projects are in folder X?".
+
+    Args:
+        parent: the organization or folder to enumerate, in the form
+        "organizations/123456789" or "folders/123456789".
+
+    Returns:
+        A list of dictionaries with the project ID, display name and
+        direct parent of each project.
+    """
+    return await run_blocking(list_projects_logic, parent)
+
+
+@handle_gcp_exceptions
+@single_flight
+@throttled("resourcemanager")
+def list_projects_logic(parent: str) -> list:
+    projects_client = get_client(resourcemanager_v3.ProjectsClient)
+    folders_client = get_client(resourcemanager_v3.FoldersClient)
+
+    results = []
+    pending_parents = [parent]
+    while pending_parents:
+        current_parent = pending_parents.pop()
+
+        request = resourcemanager_v3.ListProjectsRequest(parent=current_parent)
+        for project in projects_client.list_projects(request=request):
+            if project.state == resourcemanager_v3.Project.State.ACTIVE:
+                results.append(
+                    {
+                        "project_id": project.project_id,
+                        "display_name": project.display_name,
+                        "parent": project.parent,
+                    }
+                )
+
+        request = resourcemanager_v3.ListFoldersRequest(parent=current_parent)
+        for folder in folders_client.list_folders(request=request):
+            pending_parents.append(folder.name)
+
+    return results
+
+
+def resolve_project_ids(
+    project_ids: list[str] | None = None, parent: str | None = None
+) -> list:
+    """
+    Returns the given project IDs plus every active project found under
+    parent (an organization or folder), without duplicates.
+
+    A parent that can't be listed raises a ToolError rather than adding
+    no projects, so that a tool checking "every project of the
+    organization" doesn't report an empty, error-free result.
+    """
+    resolved = list(project_ids or [])
+    if parent:
+        try:
+            projects = list_projects_logic.__wrapped__(parent)
+        except exceptions.GoogleAPICallError as e:
+            raise ToolError(
+                f"Could not list the projects under {parent} "
+                f"({type(e).__name__}: {e})."
+            ) from e
+        resolved.extend(project["project_id"] for project in projects)
+
+    return list(dict.fromkeys(resolved))
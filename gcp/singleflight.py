@@ -0,0 +1,100 @@
+import functools
+import inspect
+import threading
+from collections import defaultdict
+import structlog
+from gcp.cache import freeze_arguments
+
+logger = structlog.get_logger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent identical calls: while a call for a key is in
+    flight, later callers with the same key wait for it and receive its
+    result (or exception) instead of starting their own. Nothing is kept
+    once the call returns; caching is the response cache's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executed = defaultdict(int)
+        self._coalesced = defaultdict(int)
+
+    def do(self, key, func, *args, **kwargs):
+        name = key[0]
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed[name] += 1
+            else:
+                self._coalesced[name] += 1
+
+        if not leader:
+            logger.debug("single_flight_coalesced", function=name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        """Returns how many calls ran and how many were coalesced, per function."""
+        with self._lock:
+            names = sorted(set(self._executed) | set(self._coalesced))
+            return {
+                name: {
+                    "executed": self._executed[name],
+                    "coalesced": self._coalesced[name],
+                }
+                for name in names
+            }
+
+    def clear(self):
+        with self._lock:
+            self._executed.clear()
+            self._coalesced.clear()
+
+
+in_flight = SingleFlight()
+
+
+def single_flight(func):
+    """
+    A decorator that shares one execution of a blocking logic function
+    between every concurrent call with the same arguments, so sessions
+    asking the same question at once trigger a single GCP walk.
+
+    Apply it below handle_gcp_exceptions, so func.__wrapped__ (used by the
+    fan-out tools) still coalesces and still raises GCP errors.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__, freeze_arguments(bound.arguments))
+        return in_flight.do(key, func, *args, **kwargs)
+
+    return wrapper
@@ -1,10 +1,66 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from app import mcp
-from gcp.utils import handle_gcp_exceptions
-from google.cloud import storage
+from fastmcp import Context
+from gcp.cache import cached
+from gcp.clients import get_client
+from gcp.concurrency import run_blocking
+from gcp.fanout import DEFAULT_MAX_WORKERS, fan_out_async, progress_reporter
+from gcp.inventory.store import snapshot_rows
+from gcp.lazy import lazy_import
+from gcp.pagination import (
+    decode_page_token,
+    page_result,
+    resolve_page_size,
+)
+from gcp.records import BucketSummary
+from gcp.resourcemanager.projects import resolve_project_ids
+from gcp.singleflight import single_flight
+from gcp.throttling import throttled
+from gcp.utils import (
+    fit_to_budget,
+    handle_gcp_exceptions,
+    project_fields,
+    top_level_fields,
+)
+from google.api_core import exceptions
+
+storage = lazy_import("google.cloud.storage")
+
+BUCKET_PAGE_KIND = "buckets"
+
+PUBLIC_PRINCIPALS = ("allUsers", "allAuthenticatedUsers")
+
+# Only what the posture scan needs from each bucket of the listing.
+POSTURE_LIST_FIELDS = "items(name,iamConfiguration),nextPageToken"
+
+UBLA_FIELDS = "iamConfiguration(uniformBucketLevelAccess)"
+
+# Every project shares one storage.Client (and its HTTP session): bucket
+# names are global, and the listings name their project, so a sweep over
+# many projects doesn't keep one client per project alive.
+
+BUCKET_FIELD_PRESETS = {
+    "summary": ["name", "location", "storageClass", "timeCreated", "labels"],
+    "security": [
+        "iamConfiguration",
+        "encryption",
+        "retentionPolicy",
+        "softDeletePolicy",
+        "defaultEventBasedHold",
+    ],
+    "lifecycle": ["lifecycle", "versioning", "autoclass", "softDeletePolicy"],
+}
 
 
 @mcp.tool()
-def list_gcs_buckets(project_id: str) -> list:
+@cached(ttl=300)
+async def list_gcs_buckets(
+    project_id: str,
+    refresh: bool = False,
+    page_size: int | None = None,
+    page_token: str | None = None,
+) -> list | dict:
     """
     Retrieves a comprehensive list of all Google Cloud Storage (GCS) buckets
      within a specified Google Cloud project.
@@ -13,36 +69,95 @@ def list_gcs_buckets(project_id: str) -> list:
 
      Args:
          project_id: The unique identifier for the Google Cloud project.
+         refresh: set to True to skip cached results and fetch fresh data.
+         page_size: Optional. Return at most this many buckets (up to 500)
+         plus a next_page_token, instead of every bucket at once.
+         page_token: Optional. The next_page_token of the previous page.
 
      Returns:
          A list of dictionaries, where each dictionary represents a complete
-         GCS bucket.
+         GCS bucket. With page_size, a dictionary with the "items" of the
+         page and the "next_page_token" (None on the last page).
     """
-    return list_gcs_buckets_logic(project_id)
+    if not (refresh or page_size or page_token):
+        rows = await run_blocking(snapshot_rows, "buckets", project_id)
+        if rows is not None:
+            return [BucketSummary.from_dict(row) for row in rows]
+
+    return await run_blocking(
+        list_gcs_buckets_logic,
+        project_id,
+        page_size=page_size,
+        page_token=page_token,
+    )
 
 
 @handle_gcp_exceptions
-def list_gcs_buckets_logic(project_id: str) -> list:
+@single_flight
+@throttled("storage")
+def list_gcs_buckets_logic(
+    project_id: str,
+    page_size: int | None = None,
+    page_token: str | None = None,
+) -> list | dict:
     results = []
-    # Storage client can't be used with "with".
-    client = storage.Client(project=project_id)
-    buckets = client.list_buckets()
+    client = get_client(storage.Client)
+
+    if page_size is not None or page_token is not None:
+        state = decode_page_token(BUCKET_PAGE_KIND, page_token)
+        size = resolve_page_size(page_size, state)
+        iterator = client.list_buckets(
+            project=project_id, page_size=size, page_token=state.get("token")
+        )
+        page = next(iterator.pages, [])
+        items = [BucketSummary.from_bucket(bucket) for bucket in page]
+        token = iterator.next_page_token
+        next_state = {"token": token, "page_size": size} if token else None
+        return page_result(BUCKET_PAGE_KIND, items, next_state)
+
+    buckets = client.list_buckets(project=project_id)
     for bucket in buckets:
-        bucket_dict = {
-            "name": bucket.name,
-            "location": bucket.location,
-            "storage_class": bucket.storage_class,
-            "created": bucket.time_created,
-            "labels": bucket.labels,
-            "self_link": bucket.self_link,
-        }
-        results.append(bucket_dict)
+        results.append(BucketSummary.from_bucket(bucket))
 
     return results
 
 
 @mcp.tool()
-def describe_gcs_bucket(project_id: str, bucket_name: str) -> dict:
+async def list_gcs_buckets_across_projects(
+    project_ids: list[str] | None = None,
+    parent: str | None = None,
+    ctx: Context | None = None,
+) -> list:
+    """
+    Runs list_gcs_buckets on many projects at once, concurrently.
+    Use this tool to inventory buckets of a whole folder or organization
+    instead of calling list_gcs_buckets once per project.
+
+    Args:
+        project_ids: the project IDs to check. Optional if parent is given.
+        parent: an organization or folder, e.g. "organizations/123" or
+        "folders/456", whose active projects (including nested folders)
+        are checked too. Optional.
+
+    Returns:
+        A list with one entry per project holding its "project_id" and
+        either the "result" or the "error" that prevented checking it.
+    """
+    project_ids = await run_blocking(resolve_project_ids, project_ids, parent)
+    return await fan_out_async(
+        list_gcs_buckets_logic.__wrapped__,
+        project_ids,
+        on_result=progress_reporter(ctx),
+    )
+
+
+@mcp.tool()
+async def describe_gcs_bucket(
+    project_id: str,
+    bucket_name: str,
+    fields: list[str] | None = None,
+    max_bytes: int | None = None,
+) -> dict:
     """
     Retrieves detailed metadata about a specific Google Cloud Storage (GCS)
     bucket. Use this tool to get comprehensive information about a bucket's
@@ -53,23 +168,97 @@ def describe_gcs_bucket(project_id: str, bucket_name: str) -> dict:
     Args:
         project_id: The unique identifier for the Google Cloud project.
         bucket_name: The name of the GCS bucket to describe.
+        fields: Optional. Presets "summary", "security" and "lifecycle",
+        and/or bucket field names such as "versioning". Only these
+        fields are fetched. Omit to get everything.
+        max_bytes: Optional. Upper bound on the size of the JSON returned;
+        the largest fields are dropped to fit and listed under
+        "_truncated_fields".
 
     Returns:
-        A dictionary containing the full metadata of the specified GCS bucket.
+        A dictionary containing the requested metadata of the specified
+        GCS bucket.
     """
-    return describe_gcs_bucket_logic(project_id, bucket_name)
+    return await run_blocking(
+        describe_gcs_bucket_logic, project_id, bucket_name, fields, max_bytes
+    )
 
 
 @handle_gcp_exceptions
-def describe_gcs_bucket_logic(project_id: str, bucket_name: str) -> dict:
-    client = storage.Client(project=project_id)
-    bucket = client.get_bucket(bucket_name)
+@single_flight
+@throttled("storage")
+def describe_gcs_bucket_logic(
+    project_id: str,
+    bucket_name: str,
+    fields: list[str] | None = None,
+    max_bytes: int | None = None,
+) -> dict:
+    client = get_client(storage.Client)
+    if fields:
+        # Let the API send only the requested fields (partial response).
+        selector = ",".join(top_level_fields(fields, BUCKET_FIELD_PRESETS))
+        bucket = load_bucket(client, bucket_name, fields=selector)
+    else:
+        bucket = client.get_bucket(bucket_name)
+
+    bucket_dict = project_fields(bucket._properties, fields, BUCKET_FIELD_PRESETS)
+
+    return fit_to_budget(bucket_dict, max_bytes)
+
+
+@mcp.tool()
+async def describe_gcs_buckets(
+    project_id: str,
+    bucket_names: list[str],
+    fields: list[str] | None = None,
+    max_bytes: int | None = None,
+) -> list:
+    """
+    Retrieves the metadata of many GCS buckets in one call; the buckets
+    are fetched concurrently. Use this tool instead of calling
+    describe_gcs_bucket once per bucket.
+
+    Args:
+        project_id: The unique identifier for the Google Cloud project.
+        bucket_names: the names of the GCS buckets to describe.
+        fields: Optional. As for describe_gcs_bucket; applies to every
+        bucket.
+        max_bytes: Optional. Upper bound on the size of the JSON of each
+        bucket, as for describe_gcs_bucket.
+
+    Returns:
+        A list with one entry per requested bucket holding its "name" and
+        either the "result" or the "error" (e.g. NotFound) that
+        prevented describing it.
+    """
+    # GCS can't list buckets by name, so every bucket is one get, all
+    # sharing the project's client.
+    requested = list(dict.fromkeys(bucket_names))
+    entries = await fan_out_async(
+        _describe_bucket,
+        requested,
+        key="name",
+        project_id=project_id,
+        fields=fields,
+        max_bytes=max_bytes,
+    )
+    # fan_out_async sorts the entries by name; they come back in the
+    # order they were asked for instead.
+    position = {name: index for index, name in enumerate(requested)}
+    return sorted(entries, key=lambda entry: position[entry["name"]])
 
-    return bucket._properties
+
+def _describe_bucket(
+    bucket_name: str, project_id: str, fields: list | None, max_bytes: int | None
+) -> dict:
+    # Undecorated, so a missing bucket is reported as that bucket's error.
+    return describe_gcs_bucket_logic.__wrapped__(
+        project_id, bucket_name, fields, max_bytes
+    )
 
 
 @mcp.tool()
-def is_ubla_enabled_in_bucket(project_id: str, bucket_name: str):
+async def is_ubla_enabled_in_bucket(project_id: str, bucket_name: str):
     """
     Checks whether the specified GCS bucket has Uniform Bucket Level enabled.
 
@@ -80,18 +269,21 @@ def is_ubla_enabled_in_bucket(project_id: str, bucket_name: str):
     Returns:
         A boolean. True if UBLA is enabled, False if it isn't.
     """
-    return is_ubla_enabled_in_bucket_logic(project_id, bucket_name)
+    return await run_blocking(
+        is_ubla_enabled_in_bucket_logic, project_id, bucket_name
+    )
 
 
 @handle_gcp_exceptions
+@throttled("storage")
 def is_ubla_enabled_in_bucket_logic(project_id: str, bucket_name: str) -> bool:
-    client = storage.Client(project=project_id)
-    bucket = client.get_bucket(bucket_name)
+    client = get_client(storage.Client)
+    bucket = load_bucket(client, bucket_name, fields=UBLA_FIELDS)
     return bucket.iam_configuration.uniform_bucket_level_access_enabled
 
 
 @mcp.tool()
-def is_bucket_public(project_id: str, bucket_name: str):
+async def is_bucket_public(project_id: str, bucket_name: str):
     """
     Checks all IAM bindings of a GCS bucket looking for explicit
     bindings of any roles to principals "allUsers" or
@@ -101,19 +293,149 @@ def is_bucket_public(project_id: str, bucket_name: str):
         project_id: The unique identifier for the Google Cloud project.
         bucket_name: The name of the GCS bucket to describe.
     """
-    return is_bucket_public_logic(project_id, bucket_name)
+    return await run_blocking(is_bucket_public_logic, project_id, bucket_name)
 
 
 @handle_gcp_exceptions
+@throttled("storage")
 def is_bucket_public_logic(project_id: str, bucket_name: str) -> bool:
-    client = storage.Client(project=project_id)
-    bucket = client.get_bucket(bucket_name)
-    bucket_iam_policy = bucket.get_iam_policy()
-    for binding in bucket_iam_policy.bindings:
-        if (
-            "allUsers" in binding["members"]
-            or "allAuthenticatedUsers" in binding["members"]
-        ):
-            return True
-
-    return False
+    client = get_client(storage.Client)
+    # getIamPolicy only needs the bucket name, not its metadata.
+    bucket_iam_policy = client.bucket(bucket_name).get_iam_policy()
+    return bool(public_members(bucket_iam_policy))
+
+
+def load_bucket(
+    client: "storage.Client", bucket_name: str, fields: str | None = None
+):
+    """
+    Fetches a bucket's metadata with a single GET and returns the Bucket.
+
+    With fields (a partial-response selector such as
+    "iamConfiguration(uniformBucketLevelAccess)") only those properties
+    are transferred and parsed; callers that check several settings of
+    the same bucket should load it once with all of their fields and
+    share the returned object.
+    """
+    bucket = client.bucket(bucket_name)
+    if not fields or not hasattr(client, "_get_resource"):
+        bucket.reload(projection="noAcl")
+        return bucket
+
+    # Neither Bucket.reload nor Client.get_bucket can send a "fields"
+    # selector, so this is the GET reload makes, with the selector added.
+    # These private methods are unchanged since 2.x; pyproject keeps
+    # google-cloud-storage below 4, and without them the full metadata
+    # is loaded through reload above.
+    properties = client._get_resource(
+        bucket.path,
+        query_params={"projection": "noAcl", "fields": fields},
+        _target_object=bucket,
+    )
+    bucket._set_properties(properties)
+
+    return bucket
+
+
+def public_members(policy) -> list:
+    """Returns the public principals ("allUsers", ...) bound in a bucket policy."""
+    members = set()
+    for binding in policy.bindings:
+        members.update(
+            member for member in binding["members"] if member in PUBLIC_PRINCIPALS
+        )
+
+    return sorted(members)
+
+
+@mcp.tool()
+@cached(ttl=300)
+async def scan_bucket_posture(
+    project_id: str, include_compliant: bool = False, refresh: bool = False
+) -> list:
+    """
+    Audits every GCS bucket of a project at once, looking for buckets that
+    are public (IAM bindings to "allUsers" or "allAuthenticatedUsers") or
+    that don't have Uniform Bucket Level Access (UBLA) enabled.
+
+    Use this tool instead of calling is_bucket_public and
+    is_ubla_enabled_in_bucket once per bucket.
+
+    Args:
+        project_id: The unique identifier for the Google Cloud project.
+        include_compliant: set to True to also list buckets that are
+        neither public nor missing UBLA.
+        refresh: set to True to skip cached results and fetch fresh data.
+
+    Returns:
+        A list with one dictionary per flagged bucket: its name, whether
+        UBLA is enabled, its public access prevention setting, the public
+        principals bound to it and, if its IAM policy couldn't be read,
+        the error.
+    """
+    return await run_blocking(scan_bucket_posture_logic, project_id, include_compliant)
+
+
+@handle_gcp_exceptions
+@single_flight
+def scan_bucket_posture_logic(
+    project_id: str, include_compliant: bool = False, max_workers: int | None = None
+) -> list:
+    client = get_client(storage.Client)
+    # A single listing carries UBLA and public access prevention for every
+    # bucket; only IAM policies need one call per bucket.
+    buckets = _list_posture_buckets(client, project_id)
+    if not buckets:
+        return []
+
+    # A pool of its own, as this already runs on the shared one. Each fetch
+    # runs in a copy of this call's context, so it is logged and measured
+    # as part of the tool call like run_blocking's.
+    workers = min(max_workers or DEFAULT_MAX_WORKERS, len(buckets))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _bucket_public_members, bucket)
+            for bucket in buckets
+        ]
+        policy_results = [future.result() for future in futures]
+
+    results = []
+    for bucket, (members, error) in zip(buckets, policy_results):
+        iam_configuration = bucket.iam_configuration
+        ubla_enabled = iam_configuration.uniform_bucket_level_access_enabled
+        if not (include_compliant or members or not ubla_enabled or error):
+            continue
+
+        row = {
+            "name": bucket.name,
+            "ubla_enabled": ubla_enabled,
+            "public_access_prevention": iam_configuration.public_access_prevention,
+            "public_members": members,
+        }
+        if error:
+            row["error"] = error
+        results.append(row)
+
+    return results
+
+
+def _bucket_public_members(bucket) -> tuple:
+    # Buckets enforcing public access prevention can't be public, so their
+    # IAM policy isn't fetched at all.
+    if bucket.iam_configuration.public_access_prevention == "enforced":
+        return [], None
+
+    try:
+        return public_members(_get_bucket_iam_policy(bucket)), None
+    except exceptions.GoogleAPICallError as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+@throttled("storage")
+def _list_posture_buckets(client: "storage.Client", project_id: str) -> list:
+    return list(client.list_buckets(project=project_id, fields=POSTURE_LIST_FIELDS))
+
+
+@throttled("storage")
+def _get_bucket_iam_policy(bucket: "storage.Bucket"):
+    return bucket.get_iam_policy()
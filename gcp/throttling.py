@@ -0,0 +1,217 @@
+import contextvars
+import functools
+import os
+import random
+import threading
+import time
+import structlog
+from google.api_core import exceptions
+from gcp import metrics
+
+logger = structlog.get_logger(__name__)
+
+# Errors worth retrying: quota / rate limits and transient server failures.
+RETRYABLE_ERRORS = (
+    exceptions.TooManyRequests,
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.BadGateway,
+)
+
+# Errors telling us to slow down.
+RATE_LIMIT_ERRORS = (exceptions.TooManyRequests, exceptions.ResourceExhausted)
+
+# HTTP requests per second allowed per API (quotas count requests, so a
+# listing takes one token per page), overridable with
+# GCP_MCP_RATE_LIMIT_<API>.
+DEFAULT_RATES = {
+    "compute": 20.0,
+    "storage": 50.0,
+    "resourcemanager": 10.0,
+}
+
+RETRY_INITIAL_BACKOFF = float(os.environ.get("GCP_MCP_RETRY_INITIAL_BACKOFF", 0.5))
+RETRY_MAX_BACKOFF = float(os.environ.get("GCP_MCP_RETRY_MAX_BACKOFF", 16))
+RETRY_DEADLINE = float(os.environ.get("GCP_MCP_RETRY_DEADLINE", 60))
+
+# The HTTP requests made so far by the throttled call in progress in this
+# thread, counted by the response hook that throttle_client installs.
+_call_requests = contextvars.ContextVar("gcp_mcp_call_requests", default=None)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket allowing rate calls per second with bursts
+    of up to burst calls.
+
+    The rate adapts to the quota actually available: every rate-limit
+    error halves it (down to min_rate) and every successful call wins a
+    bit of it back, up to the configured rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        min_rate: float = 0.5,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.min_rate = min(min_rate, rate)
+        self._tokens = self.burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes a token, sleeping until one is available. Returns the wait."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+    def throttled(self):
+        """Backs off multiplicatively after a rate-limit error."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        """Recovers additively after a successful call."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def _service_rate(service: str) -> float:
+    variable = f"GCP_MCP_RATE_LIMIT_{service.upper()}"
+    return float(os.environ.get(variable, DEFAULT_RATES[service]))
+
+
+def _service_deadline(service: str) -> float:
+    variable = f"GCP_MCP_RETRY_DEADLINE_{service.upper()}"
+    return float(os.environ.get(variable, RETRY_DEADLINE))
+
+
+rate_limiters = {
+    service: TokenBucket(_service_rate(service)) for service in DEFAULT_RATES
+}
+retry_deadlines = {service: _service_deadline(service) for service in DEFAULT_RATES}
+
+
+def throttle_client(client, service: str):
+    """
+    Makes every HTTP request of a client past the first of a throttled
+    call (each further page of a listing) take a token from the API's
+    rate limiter too, as the quotas count requests. The token is taken
+    once the response is in, so it delays the next page.
+
+    Only clients whose transport is a requests session (Compute REST
+    clients and storage.Client) can be hooked; the calls of gRPC
+    clients take one token each.
+    """
+    hooks = metrics.response_hooks(client)
+    bucket = rate_limiters.get(service)
+    if hooks is None or bucket is None:
+        return
+
+    def take_token(response, *args, **kwargs):
+        requests = _call_requests.get()
+        if requests is not None:
+            requests[0] += 1
+            if requests[0] == 1:
+                # Paid for by throttled() before the call.
+                return response
+        waited = bucket.acquire()
+        if waited:
+            metrics.rate_limit_wait.inc(waited, service=service)
+        return response
+
+    hooks.append(take_token)
+
+
+def throttled(service: str, deadline: float | None = None):
+    """
+    A decorator for blocking functions calling one Google Cloud API,
+    "compute", "storage" or "resourcemanager":
+
+    - every attempt first takes a token from the API's rate limiter
+      (GCP_MCP_RATE_LIMIT_<API> requests per second), and each further
+      HTTP request it makes takes one more (see throttle_client), so
+      multi-project sweeps queue up instead of tripping quota;
+    - quota and transient errors (RETRYABLE_ERRORS) are retried with
+      full-jitter exponential backoff until deadline seconds
+      (GCP_MCP_RETRY_DEADLINE_<API>, else GCP_MCP_RETRY_DEADLINE,
+      default 60) have passed, after which the last error is raised.
+
+    Apply it below single_flight, so coalesced callers share the retries.
+    """
+    bucket = rate_limiters[service]
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            budget = retry_deadlines[service] if deadline is None else deadline
+            started = time.monotonic()
+            attempt = 0
+            while True:
+                waited = bucket.acquire()
+                if waited:
+                    metrics.rate_limit_wait.inc(waited, service=service)
+                call_started = time.perf_counter()
+                token = _call_requests.set([0])
+                try:
+                    result = func(*args, **kwargs)
+                except RETRYABLE_ERRORS as e:
+                    _observe_api_call(service, call_started)
+                    if isinstance(e, RATE_LIMIT_ERRORS):
+                        bucket.throttled()
+                    backoff = random.uniform(
+                        0, min(RETRY_MAX_BACKOFF, RETRY_INITIAL_BACKOFF * 2**attempt)
+                    )
+                    elapsed = time.monotonic() - started
+                    if elapsed + backoff > budget:
+                        raise
+                    attempt += 1
+                    logger.warning(
+                        "gcp_call_retrying",
+                        function=func.__name__,
+                        service=service,
+                        attempt=attempt,
+                        backoff=round(backoff, 3),
+                        error=type(e).__name__,
+                    )
+                    time.sleep(backoff)
+                    continue
+                except Exception:
+                    _observe_api_call(service, call_started)
+                    raise
+                finally:
+                    _call_requests.reset(token)
+                _observe_api_call(service, call_started)
+                bucket.succeeded()
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def _observe_api_call(service: str, started: float):
+    metrics.gcp_api_duration.observe(
+        time.perf_counter() - started, tool=metrics.current_tool.get(), service=service
+    )
@@ -1,21 +1,60 @@
 import functools
+import inspect
+import json
+import time
+from fastmcp.exceptions import ToolError
 from google.api_core import exceptions
+from gcp import metrics
+from gcp.cache import mark_uncacheable
+from gcp.throttling import RETRYABLE_ERRORS
 import structlog
 
 logger = structlog.get_logger(__name__)
 
 
+# The arguments gcp_call_completed logs: which project and resource a call
+# was about, never lists, filters or field selections of unbounded size.
+LOGGED_ARGUMENTS = (
+    "project_id",
+    "parent",
+    "zone",
+    "instance_name",
+    "bucket_name",
+    "rule_name",
+    "vpc_name",
+)
+
+
 def handle_gcp_exceptions(func):
-    """A decorator to handle common GCP API exceptions."""
+    """
+    A decorator to handle common GCP API exceptions.
+
+    Every call logs one gcp_call_completed event with its outcome,
+    duration and LOGGED_ARGUMENTS; successful ones are sampled (see
+    GCP_MCP_LOG_SAMPLE_RATE).
+    """
+    positions = {
+        name: position
+        for position, name in enumerate(inspect.signature(func).parameters)
+        if name in LOGGED_ARGUMENTS
+    }
+
+    def logged_arguments(args, kwargs) -> dict:
+        return {
+            name: args[position] if position < len(args) else kwargs.get(name)
+            for name, position in positions.items()
+        }
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "ok"
         try:
-            logger.info(
-                "executing_gcp_logic", function=func.__name__, args=args, kwargs=kwargs
-            )
             return func(*args, **kwargs)
         except exceptions.NotFound as e:
+            outcome = "not_found"
+            metrics.record_error(e)
+            mark_uncacheable()
             logger.error(
                 "gcp_resource_not_found",
                 function=func.__name__,
@@ -24,6 +63,9 @@ def handle_gcp_exceptions(func):
             )
             return [] if "list" in func.__name__ or "unsafe" in func.__name__ else {}
         except exceptions.PermissionDenied as e:
+            outcome = "permission_denied"
+            metrics.record_error(e)
+            mark_uncacheable()
             logger.error(
                 "gcp_permissions_denied",
                 function=func.__name__,
@@ -31,5 +73,120 @@ def handle_gcp_exceptions(func):
                 exc_info=True,
             )
             return [] if "list" in func.__name__ or "unsafe" in func.__name__ else {}
+        except RETRYABLE_ERRORS as e:
+            # Still failing once throttled() gave up retrying: tell the
+            # agent the call may succeed later, instead of a raw traceback.
+            outcome = "retries_exhausted"
+            metrics.record_error(e)
+            logger.error(
+                "gcp_call_failed_after_retries",
+                function=func.__name__,
+                error_type=type(e).__name__,
+                error=str(e),
+            )
+            raise ToolError(
+                f"Google Cloud is rate limiting or temporarily unavailable "
+                f"({type(e).__name__}: {e}). Try again later."
+            ) from e
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            logger.info(
+                "gcp_call_completed",
+                function=func.__name__,
+                outcome=outcome,
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                **logged_arguments(args, kwargs),
+            )
 
     return wrapper
+
+
+def project_fields(
+    data: dict, fields: list | None, presets: dict | None = None
+) -> dict:
+    """
+    Keeps only the requested fields of a resource dict.
+
+    Args:
+        data: the resource, e.g. an instance or bucket as a dict.
+        fields: field names ("status"), dotted paths into nested dicts and
+        lists ("networkInterfaces.networkIP") or names of presets.
+        None or an empty list returns data unchanged.
+        presets: maps preset names ("network") to lists of field paths.
+    """
+    if not fields:
+        return data
+
+    projected = {}
+    for field in fields:
+        for path in (presets or {}).get(field, [field]):
+            _copy_path(data, projected, path.split("."))
+
+    return projected
+
+
+def top_level_fields(fields: list | None, presets: dict | None = None) -> list:
+    """Returns the distinct top-level keys that project_fields would keep."""
+    keys = []
+    for field in fields or []:
+        for path in (presets or {}).get(field, [field]):
+            keys.append(path.split(".")[0])
+
+    return list(dict.fromkeys(keys))
+
+
+def fit_to_budget(data: dict, max_bytes: int | None) -> dict:
+    """
+    Drops the largest top-level fields of data until its JSON encoding,
+    including the "_truncated_fields" list of what was dropped, fits in
+    max_bytes, so the caller can ask for those fields explicitly. Only
+    the "name" is always kept. None or 0 means no budget.
+    """
+    if not max_bytes:
+        return data
+
+    size = len(json.dumps(data, default=str))
+    if size <= max_bytes:
+        return data
+
+    entry_sizes = sorted(
+        (
+            (len(json.dumps(key)) + len(json.dumps(value, default=str)) + 4, key)
+            for key, value in data.items()
+        ),
+        reverse=True,
+    )
+    # The "_truncated_fields" entry counts too, and grows with each drop.
+    marker_size = len(json.dumps("_truncated_fields")) + 4
+    trimmed = dict(data)
+    dropped = []
+    for entry_size, key in entry_sizes:
+        if size + marker_size + len(json.dumps(dropped)) <= max_bytes:
+            break
+        if key == "name":
+            continue
+        del trimmed[key]
+        dropped.append(key)
+        size -= entry_size
+
+    trimmed["_truncated_fields"] = dropped
+    return trimmed
+
+
+def _copy_path(source: dict, target: dict, parts: list):
+    key, rest = parts[0], parts[1:]
+    if key not in source:
+        return
+
+    value = source[key]
+    if not rest:
+        target[key] = value
+    elif isinstance(value, dict):
+        _copy_path(value, target.setdefault(key, {}), rest)
+    elif isinstance(value, list):
+        projected_items = target.setdefault(key, [{} for _ in value])
+        for item, projected_item in zip(value, projected_items):
+            if isinstance(item, dict):
+                _copy_path(item, projected_item, rest)
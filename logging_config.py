@@ -1,12 +1,72 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
 import structlog
 
+try:
+    import orjson
+except ImportError:  # optional: pip install gcp-mcp[fast-json]
+    orjson = None
+
+# Fraction of routine success events (SAMPLED_EVENTS with outcome "ok")
+# that are logged. Errors and every other event are always logged.
+LOG_SAMPLE_RATE = float(os.environ.get("GCP_MCP_LOG_SAMPLE_RATE", 1.0))
+
+SAMPLED_EVENTS = {"gcp_call_completed"}
+
+_listener = None
+
+
+def sample_success_events(logger, method_name, event_dict):
+    """
+    Drops all but LOG_SAMPLE_RATE of the high-volume success events.
+    Runs first, so a dropped event is never timestamped nor rendered.
+    """
+    if (
+        LOG_SAMPLE_RATE < 1
+        and event_dict.get("event") in SAMPLED_EVENTS
+        and event_dict.get("outcome") == "ok"
+        and random.random() >= LOG_SAMPLE_RATE
+    ):
+        raise structlog.DropEvent
+    return event_dict
+
+
+def json_renderer():
+    """Renders with orjson when it's installed, else with the json module."""
+    if orjson is None:
+        return structlog.processors.JSONRenderer()
+
+    def dumps(event_dict, **kwargs):
+        return orjson.dumps(event_dict, **kwargs).decode()
+
+    return structlog.processors.JSONRenderer(serializer=dumps)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records as they are. The stock QueueHandler formats them in
+    the calling thread, which is the work this handler moves off it (and
+    would flatten structlog's event dicts into strings).
+    """
+
+    def prepare(self, record):
+        return record
+
 
 def setup_logging():
     """
     Configures structlog to output structured JSON logs.
+
+    Records are handed to a queue and written to stderr by a background
+    thread, so logging never blocks a request on a slow stderr pipe.
     """
+    global _listener
+
     shared_processors = [
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_logger_name,
@@ -16,6 +76,7 @@ def setup_logging():
 
     structlog.configure(
         processors=[
+            sample_success_events,
             *shared_processors,
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
@@ -24,8 +85,11 @@ def setup_logging():
         cache_logger_on_first_use=True,
     )
 
+    if _listener is not None:
+        return
+
     formatter = structlog.stdlib.ProcessorFormatter(
-        processor=structlog.processors.JSONRenderer(),
+        processor=json_renderer(),
         foreign_pre_chain=shared_processors,
     )
 
@@ -34,6 +98,21 @@ def setup_logging():
     handler = logging.StreamHandler(sys.stderr)
     handler.setFormatter(formatter)
 
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    # Flushes the records still queued when the process exits.
+    atexit.register(stop_logging)
+
     root_logger = logging.getLogger()
-    root_logger.addHandler(handler)
+    root_logger.addHandler(DeferredQueueHandler(log_queue))
     root_logger.setLevel(logging.INFO)
+
+
+def stop_logging():
+    """Writes out the queued records and stops the logging thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
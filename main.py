@@ -1,4 +1,5 @@
 from app import mcp
+from gcp import metrics
 from starlette.requests import Request
 from starlette.responses import PlainTextResponse
 
@@ -15,6 +16,20 @@ async def health_check(request: Request) -> PlainTextResponse:
     return PlainTextResponse("OK")
 
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """
+    metrics_endpoint exposes the server's metrics in the Prometheus text
+    format: tool calls, latencies split into GCP API and serialization
+    time, GCP requests (pages) fetched, bytes returned, cache hit ratios
+    and errors by exception class.
+    """
+
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 def main():
     print("Hello from gcp-mcp!")
 
@@ -1,5 +1,6 @@
 import unittest
-from unittest.mock import MagicMock, patch
+import structlog
+from unittest.mock import MagicMock, call, patch
 from google.api_core import exceptions
 
 from gcp.storage.buckets import (
@@ -7,9 +8,19 @@ from gcp.storage.buckets import (
     describe_gcs_bucket_logic,
     is_ubla_enabled_in_bucket_logic,
     is_bucket_public_logic,
+    scan_bucket_posture_logic,
 )
 
 
+def make_posture_bucket(name, ubla, prevention="inherited", members=()):
+    bucket = MagicMock()
+    bucket.name = name
+    bucket.iam_configuration.uniform_bucket_level_access_enabled = ubla
+    bucket.iam_configuration.public_access_prevention = prevention
+    bucket.get_iam_policy.return_value.bindings = [{"members": set(members)}]
+    return bucket
+
+
 class TestGCPStorageBuckets(unittest.TestCase):
     @patch("gcp.storage.buckets.storage.Client")
     def test_list_gcs_buckets_logic_success(self, MockStorageClient):
@@ -29,8 +40,39 @@ class TestGCPStorageBuckets(unittest.TestCase):
 
         self.assertIsInstance(result, list)
         self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]["name"], "bucket-1")
-        MockStorageClient.assert_called_with(project=project_id)
+        self.assertEqual(result[0].name, "bucket-1")
+        MockStorageClient.assert_called_with()
+        mock_client_instance.list_buckets.assert_called_once_with(project=project_id)
+
+    @patch("gcp.storage.buckets.storage.Client")
+    def test_projects_share_one_storage_client(self, MockStorageClient):
+        MockStorageClient.return_value.list_buckets.return_value = []
+
+        for project_id in ("project-a", "project-b"):
+            list_gcs_buckets_logic(project_id)
+
+        MockStorageClient.assert_called_once_with()
+        self.assertEqual(
+            MockStorageClient.return_value.list_buckets.call_args_list,
+            [call(project="project-a"), call(project="project-b")],
+        )
+
+    @patch("gcp.storage.buckets.storage.Client")
+    def test_list_gcs_buckets_logic_fetches_one_page(self, MockStorageClient):
+        mock_client_instance = MockStorageClient.return_value
+        mock_bucket = MagicMock()
+        mock_bucket.name = "bucket-1"
+        iterator = mock_client_instance.list_buckets.return_value
+        iterator.pages = iter([[mock_bucket]])
+        iterator.next_page_token = "api-token-2"
+
+        result = list_gcs_buckets_logic("test-project", page_size=1)
+
+        self.assertEqual([bucket.name for bucket in result["items"]], ["bucket-1"])
+        self.assertIsNotNone(result["next_page_token"])
+        mock_client_instance.list_buckets.assert_called_once_with(
+            project="test-project", page_size=1, page_token=None
+        )
 
     @patch("gcp.storage.buckets.storage.Client")
     def test_list_gcs_buckets_logic_permission_denied(self, MockStorageClient):
@@ -53,6 +95,28 @@ class TestGCPStorageBuckets(unittest.TestCase):
         self.assertEqual(result, {"name": "bucket-1", "location": "US"})
         mock_client_instance.get_bucket.assert_called_with("bucket-1")
 
+    @patch("gcp.storage.buckets.storage.Client")
+    def test_describe_gcs_bucket_logic_with_fields(self, MockStorageClient):
+        mock_client_instance = MockStorageClient.return_value
+        mock_bucket = MagicMock()
+        mock_bucket._properties = {
+            "name": "bucket-1",
+            "location": "US",
+            "versioning": {"enabled": True},
+        }
+        mock_client_instance.bucket.return_value = mock_bucket
+
+        result = describe_gcs_bucket_logic(
+            "test-project", "bucket-1", fields=["name", "versioning"]
+        )
+
+        self.assertEqual(result, {"name": "bucket-1", "versioning": {"enabled": True}})
+        mock_client_instance.get_bucket.assert_not_called()
+        query_params = mock_client_instance._get_resource.call_args.kwargs[
+            "query_params"
+        ]
+        self.assertEqual(query_params["fields"], "name,versioning")
+
     @patch("gcp.storage.buckets.storage.Client")
     def test_describe_gcs_bucket_logic_permission_denied(self, MockStorageClient):
         mock_client_instance = MockStorageClient.return_value
@@ -66,28 +130,56 @@ class TestGCPStorageBuckets(unittest.TestCase):
     def test_is_ubla_enabled_in_bucket_logic_enabled(self, MockStorageClient):
         mock_client_instance = MockStorageClient.return_value
         mock_bucket = MagicMock()
+        mock_bucket.path = "/b/bucket-1"
         mock_bucket.iam_configuration.uniform_bucket_level_access_enabled = True
-        mock_client_instance.get_bucket.return_value = mock_bucket
+        mock_client_instance.bucket.return_value = mock_bucket
 
         result = is_ubla_enabled_in_bucket_logic("test-project", "bucket-1")
         self.assertTrue(result)
+        mock_client_instance.get_bucket.assert_not_called()
+        mock_client_instance._get_resource.assert_called_once_with(
+            "/b/bucket-1",
+            query_params={
+                "projection": "noAcl",
+                "fields": "iamConfiguration(uniformBucketLevelAccess)",
+            },
+            _target_object=mock_bucket,
+        )
+        mock_bucket._set_properties.assert_called_once_with(
+            mock_client_instance._get_resource.return_value
+        )
 
     @patch("gcp.storage.buckets.storage.Client")
     def test_is_ubla_enabled_in_bucket_logic_disabled(self, MockStorageClient):
         mock_client_instance = MockStorageClient.return_value
         mock_bucket = MagicMock()
         mock_bucket.iam_configuration.uniform_bucket_level_access_enabled = False
-        mock_client_instance.get_bucket.return_value = mock_bucket
+        mock_client_instance.bucket.return_value = mock_bucket
 
         result = is_ubla_enabled_in_bucket_logic("test-project", "bucket-1")
         self.assertFalse(result)
 
+    @patch("gcp.storage.buckets.storage.Client")
+    def test_is_ubla_enabled_without_private_client_api_reloads(
+        self, MockStorageClient
+    ):
+        mock_client_instance = MockStorageClient.return_value
+        del mock_client_instance._get_resource
+        mock_bucket = MagicMock()
+        mock_bucket.iam_configuration.uniform_bucket_level_access_enabled = True
+        mock_client_instance.bucket.return_value = mock_bucket
+
+        result = is_ubla_enabled_in_bucket_logic("test-project", "bucket-1")
+
+        self.assertTrue(result)
+        mock_bucket.reload.assert_called_once_with(projection="noAcl")
+
     @patch("gcp.storage.buckets.storage.Client")
     def test_is_ubla_enabled_in_bucket_logic_permission_denied(
         self, MockStorageClient
     ):
         mock_client_instance = MockStorageClient.return_value
-        mock_client_instance.get_bucket.side_effect = exceptions.PermissionDenied(
+        mock_client_instance._get_resource.side_effect = exceptions.PermissionDenied(
             "Test permission denied"
         )
         result = is_ubla_enabled_in_bucket_logic("test-project", "bucket-1")
@@ -100,10 +192,12 @@ class TestGCPStorageBuckets(unittest.TestCase):
         mock_policy = MagicMock()
         mock_policy.bindings = [{"members": ["allUsers"]}]
         mock_bucket.get_iam_policy.return_value = mock_policy
-        mock_client_instance.get_bucket.return_value = mock_bucket
+        mock_client_instance.bucket.return_value = mock_bucket
 
         result = is_bucket_public_logic("test-project", "bucket-1")
         self.assertTrue(result)
+        mock_client_instance.bucket.assert_called_with("bucket-1")
+        mock_client_instance.get_bucket.assert_not_called()
 
     @patch("gcp.storage.buckets.storage.Client")
     def test_is_bucket_public_logic_all_authenticated_users(self, MockStorageClient):
@@ -112,7 +206,7 @@ class TestGCPStorageBuckets(unittest.TestCase):
         mock_policy = MagicMock()
         mock_policy.bindings = [{"members": ["allAuthenticatedUsers"]}]
         mock_bucket.get_iam_policy.return_value = mock_policy
-        mock_client_instance.get_bucket.return_value = mock_bucket
+        mock_client_instance.bucket.return_value = mock_bucket
 
         result = is_bucket_public_logic("test-project", "bucket-1")
         self.assertTrue(result)
@@ -124,7 +218,7 @@ class TestGCPStorageBuckets(unittest.TestCase):
         mock_policy = MagicMock()
         mock_policy.bindings = [{"members": ["user:test@example.com"]}]
         mock_bucket.get_iam_policy.return_value = mock_policy
-        mock_client_instance.get_bucket.return_value = mock_bucket
+        mock_client_instance.bucket.return_value = mock_bucket
 
         result = is_bucket_public_logic("test-project", "bucket-1")
         self.assertFalse(result)
@@ -132,8 +226,92 @@ class TestGCPStorageBuckets(unittest.TestCase):
     @patch("gcp.storage.buckets.storage.Client")
     def test_is_bucket_public_logic_permission_denied(self, MockStorageClient):
         mock_client_instance = MockStorageClient.return_value
-        mock_client_instance.get_bucket.side_effect = exceptions.PermissionDenied(
+        mock_bucket = MagicMock()
+        mock_bucket.get_iam_policy.side_effect = exceptions.PermissionDenied(
             "Test permission denied"
         )
+        mock_client_instance.bucket.return_value = mock_bucket
         result = is_bucket_public_logic("test-project", "bucket-1")
         self.assertEqual(result, {})
+
+    @patch("gcp.storage.buckets.storage.Client")
+    def test_scan_bucket_posture_logic_flags_public_and_non_ubla(
+        self, MockStorageClient
+    ):
+        mock_client_instance = MockStorageClient.return_value
+        compliant = make_posture_bucket("compliant", ubla=True)
+        enforced = make_posture_bucket("enforced", ubla=True, prevention="enforced")
+        public = make_posture_bucket(
+            "public", ubla=True, members=["allUsers", "user:a@example.com"]
+        )
+        legacy_acl = make_posture_bucket("legacy-acl", ubla=False)
+        mock_client_instance.list_buckets.return_value = [
+            compliant,
+            enforced,
+            public,
+            legacy_acl,
+        ]
+
+        result = scan_bucket_posture_logic("test-project")
+
+        self.assertEqual(
+            result,
+            [
+                {
+                    "name": "public",
+                    "ubla_enabled": True,
+                    "public_access_prevention": "inherited",
+                    "public_members": ["allUsers"],
+                },
+                {
+                    "name": "legacy-acl",
+                    "ubla_enabled": False,
+                    "public_access_prevention": "inherited",
+                    "public_members": [],
+                },
+            ],
+        )
+        mock_client_instance.list_buckets.assert_called_once()
+        mock_client_instance.get_bucket.assert_not_called()
+        enforced.get_iam_policy.assert_not_called()
+
+    @patch("gcp.storage.buckets.storage.Client")
+    def test_scan_bucket_posture_logic_fetches_policies_in_the_call_context(
+        self, MockStorageClient
+    ):
+        buckets = [make_posture_bucket(f"b{i}", ubla=True) for i in range(4)]
+        MockStorageClient.return_value.list_buckets.return_value = buckets
+        contexts = []
+
+        def get_iam_policy():
+            contexts.append(structlog.contextvars.get_contextvars())
+            return MagicMock(bindings=[])
+
+        for bucket in buckets:
+            bucket.get_iam_policy.side_effect = get_iam_policy
+
+        with structlog.contextvars.bound_contextvars(request_id="r-1"):
+            scan_bucket_posture_logic("test-project", max_workers=2)
+
+        self.assertEqual(contexts, [{"request_id": "r-1"}] * 4)
+
+    @patch("gcp.storage.buckets.storage.Client")
+    def test_scan_bucket_posture_logic_reports_policy_errors_per_bucket(
+        self, MockStorageClient
+    ):
+        mock_client_instance = MockStorageClient.return_value
+        denied = make_posture_bucket("denied", ubla=True)
+        denied.get_iam_policy.side_effect = exceptions.PermissionDenied(
+            "Test permission denied"
+        )
+        mock_client_instance.list_buckets.return_value = [
+            denied,
+            make_posture_bucket("compliant", ubla=True),
+        ]
+
+        result = scan_bucket_posture_logic("test-project", include_compliant=True)
+
+        self.assertEqual([row["name"] for row in result], ["denied", "compliant"])
+        self.assertEqual(
+            result[0]["error"], "PermissionDenied: 403 Test permission denied"
+        )
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from google.api_core import exceptions
+
+from gcp.cache import ResponseCache, cached, response_cache
+from gcp.concurrency import run_blocking
+from gcp.utils import handle_gcp_exceptions
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_get_returns_live_entry(self):
+        cache = ResponseCache()
+        cache.set(("tool", ()), "value", ttl=60)
+
+        self.assertEqual(cache.get(("tool", ())), (True, "value"))
+        self.assertEqual(cache.stats()["tools"]["tool"], {"hits": 1, "misses": 0})
+
+    @patch("gcp.cache.time.monotonic")
+    def test_get_drops_expired_entry(self, mock_monotonic):
+        cache = ResponseCache()
+        mock_monotonic.return_value = 100.0
+        cache.set(("tool", ()), "value", ttl=10)
+
+        mock_monotonic.return_value = 111.0
+
+        self.assertEqual(cache.get(("tool", ())), (False, None))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_set_evicts_least_recently_used_entry(self):
+        cache = ResponseCache(max_size=2)
+        cache.set(("tool", (("project_id", "a"),)), "a", ttl=60)
+        cache.set(("tool", (("project_id", "b"),)), "b", ttl=60)
+        cache.get(("tool", (("project_id", "a"),)))
+
+        cache.set(("tool", (("project_id", "c"),)), "c", ttl=60)
+
+        self.assertTrue(cache.get(("tool", (("project_id", "a"),)))[0])
+        self.assertFalse(cache.get(("tool", (("project_id", "b"),)))[0])
+
+    def test_invalidate_by_project(self):
+        cache = ResponseCache()
+        cache.set(("tool", (("project_id", "a"),)), "a", ttl=60)
+        cache.set(("tool", (("project_id", "b"),)), "b", ttl=60)
+
+        removed = cache.invalidate(project_id="a")
+
+        self.assertEqual(removed, 1)
+        self.assertFalse(cache.get(("tool", (("project_id", "a"),)))[0])
+        self.assertTrue(cache.get(("tool", (("project_id", "b"),)))[0])
+
+
+class TestCachedDecorator(unittest.TestCase):
+    def setUp(self):
+        response_cache.clear()
+
+    def tearDown(self):
+        response_cache.clear()
+
+    def test_cached_reuses_result_until_refresh(self):
+        logic = MagicMock(side_effect=[["first"], ["second"]])
+
+        @cached(ttl=60)
+        def list_things(project_id: str, refresh: bool = False) -> list:
+            return logic(project_id)
+
+        self.assertEqual(list_things("test-project"), ["first"])
+        self.assertEqual(list_things(project_id="test-project"), ["first"])
+        self.assertEqual(list_things("test-project", refresh=True), ["second"])
+        self.assertEqual(list_things("test-project"), ["second"])
+        self.assertEqual(logic.call_count, 2)
+
+    def test_cached_keys_on_arguments(self):
+        logic = MagicMock(side_effect=lambda project_id: [project_id])
+
+        @cached(ttl=60)
+        def list_things(project_id: str, refresh: bool = False) -> list:
+            return logic(project_id)
+
+        self.assertEqual(list_things("project-a"), ["project-a"])
+        self.assertEqual(list_things("project-b"), ["project-b"])
+        self.assertEqual(logic.call_count, 2)
+
+    def test_cached_supports_async_functions(self):
+        logic = MagicMock(side_effect=[["first"], ["second"]])
+
+        @cached(ttl=60)
+        async def list_things(project_id: str, refresh: bool = False) -> list:
+            return logic(project_id)
+
+        self.assertEqual(asyncio.run(list_things("test-project")), ["first"])
+        self.assertEqual(asyncio.run(list_things("test-project")), ["first"])
+        self.assertEqual(
+            asyncio.run(list_things("test-project", refresh=True)), ["second"]
+        )
+
+    def test_cached_skips_error_fallbacks(self):
+        logic = MagicMock(
+            side_effect=[exceptions.PermissionDenied("denied"), ["granted"]]
+        )
+
+        @handle_gcp_exceptions
+        def list_things_logic(project_id):
+            return logic(project_id)
+
+        @cached(ttl=60)
+        async def list_things(project_id: str, refresh: bool = False) -> list:
+            return await run_blocking(list_things_logic, project_id)
+
+        @cached(ttl=60)
+        async def list_everything(project_id: str) -> list:
+            return await list_things(project_id)
+
+        self.assertEqual(asyncio.run(list_everything("test-project")), [])
+        self.assertEqual(asyncio.run(list_everything("test-project")), ["granted"])
+        self.assertEqual(asyncio.run(list_everything("test-project")), ["granted"])
+        self.assertEqual(logic.call_count, 2)
@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import MagicMock
+
+from gcp import clients
+
+
+class TestGCPClients(unittest.TestCase):
+    def setUp(self):
+        clients.clear_overrides()
+        clients.close_all()
+
+    def tearDown(self):
+        clients.clear_overrides()
+        clients.close_all()
+
+    def test_get_client_reuses_client_for_same_arguments(self):
+        factory = MagicMock()
+
+        first = clients.get_client(factory, project="test-project")
+        second = clients.get_client(factory, project="test-project")
+
+        self.assertIs(first, second)
+        factory.assert_called_once_with(project="test-project")
+
+    def test_get_client_keeps_projects_apart(self):
+        factory = MagicMock(side_effect=lambda **kwargs: MagicMock())
+
+        first = clients.get_client(factory, project="project-a")
+        second = clients.get_client(factory, project="project-b")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(factory.call_count, 2)
+
+    def test_close_all_closes_and_forgets_clients(self):
+        factory = MagicMock()
+        client = clients.get_client(factory)
+
+        clients.close_all()
+        clients.get_client(factory)
+
+        client.close.assert_called_once()
+        self.assertEqual(factory.call_count, 2)
+
+    def test_close_all_uses_context_manager_when_there_is_no_close(self):
+        client = MagicMock(spec=["__exit__"])
+        clients.get_client(lambda: client)
+
+        clients.close_all()
+
+        client.__exit__.assert_called_once_with(None, None, None)
+
+    def test_override_client_replaces_factory(self):
+        real_factory = MagicMock()
+        fake_client = MagicMock()
+        clients.override_client(real_factory, lambda **kwargs: fake_client)
+
+        result = clients.get_client(real_factory, project="test-project")
+
+        self.assertIs(result, fake_client)
+        real_factory.assert_not_called()
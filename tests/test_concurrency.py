@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import unittest
+
+from gcp import concurrency
+from gcp.fanout import fan_out_async
+
+
+class TestConcurrency(unittest.IsolatedAsyncioTestCase):
+    async def test_run_blocking_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+
+        result = await concurrency.run_blocking(
+            lambda value, suffix: (threading.get_ident(), value + suffix),
+            "a",
+            suffix="b",
+        )
+
+        self.assertNotEqual(result[0], loop_thread)
+        self.assertEqual(result[1], "ab")
+
+    async def test_blocking_calls_do_not_serialize(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        results = await asyncio.gather(
+            concurrency.run_blocking(barrier.wait),
+            concurrency.run_blocking(barrier.wait),
+        )
+
+        self.assertEqual(sorted(results), [0, 1])
+
+    async def test_run_blocking_after_shutdown_starts_a_new_pool(self):
+        concurrency.shutdown()
+
+        self.assertEqual(await concurrency.run_blocking(lambda: "ok"), "ok")
+
+    async def test_fan_out_async_reports_each_project(self):
+        progress = []
+
+        async def on_result(entry, done, total):
+            progress.append((done, total))
+
+        def logic(project_id):
+            if project_id == "broken":
+                raise RuntimeError("boom")
+            return project_id.upper()
+
+        result = await fan_out_async(logic, ["b", "broken", "a"], on_result=on_result)
+
+        self.assertEqual(
+            result,
+            [
+                {"project_id": "a", "result": "A"},
+                {"project_id": "b", "result": "B"},
+                {"project_id": "broken", "error": "RuntimeError: boom"},
+            ],
+        )
+        self.assertEqual(sorted(progress), [(1, 3), (2, 3), (3, 3)])
@@ -0,0 +1,117 @@
+import unittest
+
+from gcp.compute.exposure import ExposureIndex, parse_port_intervals
+from gcp.records import FirewallRule
+
+
+NETWORK_URL = "https://www.googleapis.com/compute/v1/projects/p/global/networks/"
+
+
+def make_rule(name, protocol="tcp", ports=(), source_ranges=("0.0.0.0/0",), **kwargs):
+    rule = {
+        "name": name,
+        "network": NETWORK_URL + "default",
+        "direction": "INGRESS",
+        "allowed": [{"ip_protocol": protocol, "ports": list(ports)}],
+        "source_ranges": list(source_ranges),
+        "source_tags": [],
+        "source_service_accounts": [],
+        "disabled": False,
+    }
+    rule.update(kwargs)
+    return FirewallRule.from_dict(rule)
+
+
+def names(matches):
+    return [rule.name for rule, _ in matches]
+
+
+class TestExposureIndex(unittest.TestCase):
+    def test_parse_port_intervals(self):
+        self.assertEqual(
+            parse_port_intervals(["22", "8000-8080"]), [(22, 22), (8000, 8080)]
+        )
+        self.assertEqual(parse_port_intervals([]), [(0, 65535)])
+
+    def test_parse_port_intervals_skips_invalid_specs(self):
+        self.assertEqual(
+            parse_port_intervals(["ssh", "22", "90-80", "70000", "443"]),
+            [(22, 22), (443, 443)],
+        )
+
+    def test_all_protocols_ignores_portless_protocols(self):
+        index = ExposureIndex(
+            [
+                make_rule("icmp", protocol="icmp"),
+                make_rule("esp", protocol="50"),
+                make_rule("udp-dns", protocol="udp", ports=["53"]),
+                make_rule("bad-ports", ports=["ssh"]),
+            ]
+        )
+
+        self.assertEqual(names(index.exposed_ports([22], protocol="all")[22]), [])
+        self.assertEqual(
+            names(index.exposed_ports([53], protocol="all")[53]), ["udp-dns"]
+        )
+        self.assertEqual(
+            names(index.exposed_ports([22], protocol="icmp")[22]), ["icmp"]
+        )
+
+    def test_port_ranges_and_all_protocol_rules_match(self):
+        index = ExposureIndex(
+            [
+                make_rule("ssh", ports=["22"]),
+                make_rule("wide-range", ports=["1-65535"]),
+                make_rule("any-protocol", protocol="all"),
+                make_rule("udp-only", protocol="udp", ports=["22"]),
+                make_rule("tcp-number", protocol="6", ports=["3389"]),
+            ]
+        )
+
+        result = index.exposed_ports([22, 3389, 5432], protocol="tcp")
+
+        self.assertEqual(names(result[22]), ["ssh", "wide-range", "any-protocol"])
+        self.assertEqual(
+            names(result[3389]), ["wide-range", "any-protocol", "tcp-number"]
+        )
+        self.assertEqual(names(result[5432]), ["wide-range", "any-protocol"])
+
+    def test_internet_means_broad_public_ranges(self):
+        index = ExposureIndex(
+            [
+                make_rule("half-internet", ports=["22"], source_ranges=["0.0.0.0/1"]),
+                make_rule("ipv6", ports=["22"], source_ranges=["::/0"]),
+                make_rule("private", ports=["22"], source_ranges=["10.0.0.0/8"]),
+                make_rule("single-host", ports=["22"], source_ranges=["8.8.8.8/32"]),
+                make_rule(
+                    "tags-only", ports=["22"], source_ranges=[], source_tags=["bastion"]
+                ),
+                make_rule("no-sources", ports=["22"], source_ranges=[]),
+            ]
+        )
+
+        result = index.exposed_ports([22])
+
+        self.assertEqual(names(result[22]), ["half-internet", "ipv6", "no-sources"])
+
+    def test_explicit_source_prefix_matches_overlapping_ranges(self):
+        index = ExposureIndex(
+            [
+                make_rule("office", ports=["22"], source_ranges=["203.0.113.0/24"]),
+                make_rule("private", ports=["22"], source_ranges=["10.0.0.0/8"]),
+            ]
+        )
+
+        result = index.exposed_ports([22], sources=["203.0.113.7/32"])
+
+        self.assertEqual(result[22], [(index.rules[0], ["203.0.113.0/24"])])
+
+    def test_disabled_and_egress_rules_are_ignored(self):
+        index = ExposureIndex(
+            [
+                make_rule("disabled", ports=["22"], disabled=True),
+                make_rule("egress", ports=["22"], direction="EGRESS"),
+            ]
+        )
+
+        self.assertEqual(index.exposed_ports([22]), {22: []})
@@ -0,0 +1,103 @@
+import unittest
+
+from gcp.inventory.expressions import compile_filter
+
+RULES = [
+    {
+        "name": "allow-ssh",
+        "direction": "INGRESS",
+        "allowed": [{"ip_protocol": "tcp", "ports": ["22"]}],
+        "source_ranges": ["0.0.0.0/0"],
+        "disabled": False,
+        "priority": 1000,
+    },
+    {
+        "name": "allow-internal",
+        "direction": "INGRESS",
+        "allowed": [{"ip_protocol": "all", "ports": []}],
+        "source_ranges": ["10.128.0.0/9"],
+        "disabled": True,
+        "priority": 65534,
+        "labels": {"env": "prod"},
+    },
+]
+
+
+def matching(expression):
+    predicate = compile_filter(expression)
+    return [rule["name"] for rule in RULES if predicate(rule)]
+
+
+class TestCompileFilter(unittest.TestCase):
+    def test_empty_filter_matches_everything(self):
+        self.assertEqual(matching(""), ["allow-ssh", "allow-internal"])
+
+    def test_comparisons_coerce_to_the_field_type(self):
+        self.assertEqual(matching("priority < 2000"), ["allow-ssh"])
+        self.assertEqual(matching("disabled = true"), ["allow-internal"])
+        self.assertEqual(matching('name = "allow-ssh"'), ["allow-ssh"])
+
+    def test_ordering_against_numbers_is_numeric_on_string_fields(self):
+        rows = [
+            {"name": "http-alt", "ports": ["8080"]},
+            {"name": "ssh", "ports": ["22"]},
+            {"name": "range", "ports": ["8000-9000"]},
+        ]
+        predicate = compile_filter("ports < 1024")
+
+        self.assertEqual([row["name"] for row in rows if predicate(row)], ["ssh"])
+        self.assertEqual(
+            [row["name"] for row in rows if compile_filter("ports >= 8000")(row)],
+            ["http-alt"],
+        )
+        self.assertEqual(
+            [row["name"] for row in rows if compile_filter("name < r")(row)],
+            ["http-alt"],
+        )
+
+    def test_nested_lists_match_any_value(self):
+        self.assertEqual(matching("allowed.ports = 22"), ["allow-ssh"])
+        self.assertEqual(matching("allowed.ports != 22"), ["allow-internal"])
+
+    def test_in_startswith_and_labels(self):
+        self.assertEqual(
+            matching("allowed.ip_protocol in (udp, all)"), ["allow-internal"]
+        )
+        self.assertEqual(matching("name startswith allow-i"), ["allow-internal"])
+        self.assertEqual(matching("labels.env = prod"), ["allow-internal"])
+        self.assertEqual(matching("labels.env = *"), ["allow-internal"])
+
+    def test_cidr_overlap(self):
+        self.assertEqual(
+            matching("source_ranges overlaps 10.200.0.0/16"),
+            ["allow-ssh", "allow-internal"],
+        )
+        self.assertEqual(
+            matching("source_ranges overlaps 192.168.0.0/16"), ["allow-ssh"]
+        )
+        self.assertEqual(
+            matching("source_ranges in (0.0.0.0/0, ::/0)"), ["allow-ssh"]
+        )
+
+    def test_boolean_operators_and_parentheses(self):
+        self.assertEqual(
+            matching("not disabled = true and (priority > 10 or name = x)"),
+            ["allow-ssh"],
+        )
+        self.assertEqual(
+            matching("name = allow-ssh or name = allow-internal"),
+            ["allow-ssh", "allow-internal"],
+        )
+
+    def test_malformed_filters_raise_value_error(self):
+        for expression in ("name", "name = ", "(name = a", "name = a b", "a ! b"):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    compile_filter(expression)
+
+    def test_unknown_fields_raise_value_error(self):
+        fields = {"name", "status"}
+
+        self.assertTrue(compile_filter("not status = RUNNING", fields)({}))
+        with self.assertRaisesRegex(ValueError, "'labels.env'.*name, status"):
+            compile_filter("name = a or labels.env = prod", fields)
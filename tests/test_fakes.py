@@ -0,0 +1,140 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from benchmarks import bench_tools
+from gcp import clients
+from gcp.cache import response_cache
+from gcp.compute.firewalls import (
+    describe_firewall_rule_logic,
+    list_firewall_rules_logic,
+    list_firewall_rules_per_vpc_logic,
+)
+from gcp.compute.instances import (
+    list_all_instances_in_project_logic,
+    list_instances_aggregated_logic,
+)
+from gcp.fakes import ORGANIZATION, FakeGcp
+from gcp.iam.policy import get_ancestry, list_project_iam_logic
+from gcp.resourcemanager.projects import list_projects_logic
+from gcp.storage.buckets import (
+    describe_gcs_buckets,
+    is_bucket_public_logic,
+    list_gcs_buckets_logic,
+    scan_bucket_posture_logic,
+)
+
+
+@patch("gcp.compute.firewall_index.snapshot_rows", return_value=None)
+class TestFakeGcp(unittest.TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.fake = FakeGcp(
+            projects=2, folders=2, firewalls=1200, instances=40, buckets=30
+        )
+        self.fake.install()
+        self.project_id = self.fake.project_ids[0]
+
+    def tearDown(self):
+        self.fake.uninstall()
+        clients.close_all()
+        response_cache.clear()
+
+    def test_firewall_listing_is_paginated_like_the_api(self, _):
+        rules = list_firewall_rules_logic(self.project_id)
+
+        self.assertEqual(len(rules), 1200)
+        self.assertEqual(self.fake.requests[("compute", "firewalls.list")], 3)
+        self.assertEqual(
+            describe_firewall_rule_logic(self.project_id, "fw-00007").name,
+            "fw-00007",
+        )
+
+    def test_firewall_filters_are_applied_by_the_api(self, _):
+        rules = list_firewall_rules_per_vpc_logic(self.project_id, "vpc-1")
+
+        self.assertTrue(0 < len(rules) < 500)
+        self.assertTrue(all(rule.network.endswith("/vpc-1") for rule in rules))
+        self.assertEqual(self.fake.requests[("compute", "firewalls.list")], 1)
+
+    def test_unknown_resources_are_not_found(self, _):
+        self.assertEqual(describe_firewall_rule_logic(self.project_id, "nope"), {})
+        self.assertEqual(list_gcs_buckets_logic("unknown-project"), [])
+
+    def test_aggregated_instances_honour_the_filter(self, _):
+        running = list_instances_aggregated_logic(
+            self.project_id, region="us-central1", status="RUNNING"
+        )
+
+        self.assertTrue(running)
+        for instance in running:
+            self.assertEqual(instance.status, "RUNNING")
+            self.assertTrue(instance.zone.startswith("us-central1-"))
+
+        page = list_all_instances_in_project_logic(
+            self.project_id, "us-central1-a", page_size=4
+        )
+        self.assertEqual(len(page["items"]), 4)
+        self.assertIsNotNone(page["next_page_token"])
+
+    def test_buckets_are_real_storage_buckets(self, _):
+        page = list_gcs_buckets_logic(self.project_id, page_size=25)
+        self.assertEqual(len(page["items"]), 25)
+        self.assertIsNotNone(page["next_page_token"])
+
+        posture = scan_bucket_posture_logic(self.project_id, include_compliant=True)
+        self.assertEqual(len(posture), 30)
+        public = [row["name"] for row in posture if row["public_members"]]
+        for name in public:
+            self.assertTrue(is_bucket_public_logic(self.project_id, name))
+
+    def test_bulk_describe_fetches_every_bucket(self, _):
+        names = [f"{self.project_id}-bucket-{number:05d}" for number in range(20)]
+        requested = names[::-1] + ["missing", names[0]]
+
+        result = asyncio.run(
+            describe_gcs_buckets.fn(self.project_id, requested, fields=["location"])
+        )
+
+        self.assertEqual([entry["name"] for entry in result], names[::-1] + ["missing"])
+        self.assertEqual(list(result[0]["result"]), ["location"])
+        self.assertTrue(result[-1]["error"].startswith("NotFound"))
+
+    def test_resource_hierarchy(self, _):
+        projects = list_projects_logic(ORGANIZATION)
+
+        self.assertEqual(
+            sorted(project["project_id"] for project in projects),
+            self.fake.project_ids,
+        )
+        self.assertEqual(
+            get_ancestry(self.fake.project_ids[1]),
+            [f"projects/{self.fake.project_ids[1]}", "folders/2001", ORGANIZATION],
+        )
+        policy = list_project_iam_logic(self.project_id)
+        self.assertIn("roles/owner", [b["role"] for b in policy["bindings"]])
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_every_tool_has_a_benchmark_case(self):
+        from app import mcp
+
+        tools = asyncio.run(mcp.get_tools())
+        cases = bench_tools.benchmark_cases(FakeGcp())
+
+        for name, tool in tools.items():
+            if tool.fn.__module__.startswith(bench_tools.BENCHMARKED_PACKAGES):
+                self.assertIn(name, cases)
+
+    def test_regressions(self):
+        baseline = {"results": {"a/cold": {"p50_ms": 10, "p99_ms": 20}}}
+        results = {"results": {"a/cold": {"p50_ms": 14, "p99_ms": 21}}}
+
+        self.assertEqual(
+            bench_tools.regressions(results, baseline, tolerance=0.25),
+            ["a/cold p50_ms: 10 -> 14"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
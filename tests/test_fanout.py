@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from fastmcp.exceptions import ToolError
+from google.api_core import exceptions
+
+from gcp.fanout import fan_out_async
+from gcp.resourcemanager.projects import list_projects_logic, resolve_project_ids
+
+
+class TestFanOut(unittest.IsolatedAsyncioTestCase):
+    async def test_fan_out_collects_results_and_errors_per_project(self):
+        def logic(project_id, suffix):
+            if project_id == "denied":
+                raise exceptions.PermissionDenied("Test permission denied")
+            return [project_id + suffix]
+
+        result = await fan_out_async(logic, ["b", "denied", "a", "b"], suffix="-x")
+
+        self.assertEqual(
+            result,
+            [
+                {"project_id": "a", "result": ["a-x"]},
+                {"project_id": "b", "result": ["b-x"]},
+                {
+                    "project_id": "denied",
+                    "error": "PermissionDenied: 403 Test permission denied",
+                },
+            ],
+        )
+
+    async def test_fan_out_without_projects(self):
+        self.assertEqual(await fan_out_async(lambda project_id: None, []), [])
+
+
+class TestResourceManagerProjects(unittest.TestCase):
+    @patch("gcp.resourcemanager.projects.resourcemanager_v3.FoldersClient")
+    @patch("gcp.resourcemanager.projects.resourcemanager_v3.ProjectsClient")
+    def test_list_projects_logic_walks_nested_folders(
+        self, MockProjectsClient, MockFoldersClient
+    ):
+        from google.cloud import resourcemanager_v3
+
+        active = resourcemanager_v3.Project.State.ACTIVE
+        deleted = resourcemanager_v3.Project.State.DELETE_REQUESTED
+        projects_by_parent = {
+            "organizations/1": [
+                resourcemanager_v3.Project(project_id="top", state=active)
+            ],
+            "folders/2": [
+                resourcemanager_v3.Project(project_id="nested", state=active),
+                resourcemanager_v3.Project(project_id="gone", state=deleted),
+            ],
+        }
+        folders_by_parent = {
+            "organizations/1": [resourcemanager_v3.Folder(name="folders/2")],
+        }
+        MockProjectsClient.return_value.list_projects.side_effect = (
+            lambda request: projects_by_parent.get(request.parent, [])
+        )
+        MockFoldersClient.return_value.list_folders.side_effect = (
+            lambda request: folders_by_parent.get(request.parent, [])
+        )
+
+        result = list_projects_logic("organizations/1")
+
+        self.assertEqual(
+            sorted(project["project_id"] for project in result), ["nested", "top"]
+        )
+
+    @patch("gcp.resourcemanager.projects.list_projects_logic")
+    def test_resolve_project_ids_merges_without_duplicates(self, mock_list_projects):
+        mock_list_projects.__wrapped__ = MagicMock(
+            return_value=[{"project_id": "b"}, {"project_id": "c"}]
+        )
+
+        result = resolve_project_ids(["a", "b"], parent="folders/2")
+
+        self.assertEqual(result, ["a", "b", "c"])
+        mock_list_projects.__wrapped__.assert_called_once_with("folders/2")
+
+    @patch("gcp.resourcemanager.projects.list_projects_logic")
+    def test_resolve_project_ids_raises_when_parent_is_denied(
+        self, mock_list_projects
+    ):
+        mock_list_projects.__wrapped__ = MagicMock(
+            side_effect=exceptions.PermissionDenied("denied")
+        )
+
+        with self.assertRaises(ToolError):
+            resolve_project_ids(["a"], parent="organizations/1")
@@ -0,0 +1,58 @@
+import unittest
+
+from unittest.mock import patch
+
+from gcp.compute import filters
+from gcp.compute.filters import (
+    firewalls_filter,
+    instances_filter,
+    name_filter,
+    name_filters,
+)
+
+
+class TestFilters(unittest.TestCase):
+    def test_instances_filter(self):
+        self.assertEqual(instances_filter(), "")
+        self.assertEqual(
+            instances_filter(region="us-central1"),
+            r"(zone eq .*/zones/us\-central1-[a-z]+)",
+        )
+        self.assertEqual(
+            instances_filter(zone="us-central1-a"),
+            r"(zone eq .*/zones/us\-central1\-a)",
+        )
+        self.assertEqual(
+            instances_filter(status="running", name_prefix="web-"),
+            r"(status eq RUNNING) (name eq web\-.*)",
+        )
+
+    def test_firewalls_filter(self):
+        self.assertEqual(firewalls_filter(), "")
+        self.assertEqual(
+            firewalls_filter(network="prod", direction="ingress", disabled=False),
+            r"(network eq .*/networks/prod) (direction eq INGRESS) "
+            r"(disabled eq false)",
+        )
+
+    def test_name_filter(self):
+        self.assertEqual(name_filter(["a.b", "c"]), r"(name eq a\.b|c)")
+
+    def test_name_filters_bound_names_and_length(self):
+        names = [f"rule-{i:03}" for i in range(250)]
+
+        batches = list(name_filters(names))
+
+        self.assertEqual([batch.count("|") + 1 for batch in batches], [100, 100, 50])
+        self.assertTrue(batches[0].startswith(r"(name eq rule\-000|rule\-001|"))
+        with patch.object(filters, "MAX_FILTER_LENGTH", 60):
+            batches = list(name_filters(names[:10]))
+        self.assertTrue(all(len(batch) <= 60 for batch in batches))
+        self.assertEqual(
+            "|".join(batch[len("(name eq ") : -1] for batch in batches),
+            "|".join(name.replace("-", r"\-") for name in names[:10]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
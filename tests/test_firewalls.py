@@ -0,0 +1,199 @@
+import unittest
+from unittest.mock import patch
+from google.api_core import exceptions
+from google.cloud import compute_v1
+
+from gcp.cache import response_cache
+from gcp.compute.firewalls import (
+    describe_firewall_rule_logic,
+    describe_firewall_rules_logic,
+    list_firewall_rules_logic,
+    list_firewall_rules_per_vpc_logic,
+    list_exposed_ports_logic,
+    unsafe_ssh_exposure_logic,
+)
+from gcp.records import Allowed
+
+NETWORK_URL = "https://www.googleapis.com/compute/v1/projects/test-project/global/networks/"
+
+
+def make_rule(name, network="default", ports=("22",), protocol="tcp", **kwargs):
+    return compute_v1.Firewall(
+        name=name,
+        network=NETWORK_URL + network,
+        direction=kwargs.pop("direction", "INGRESS"),
+        allowed=[compute_v1.Allowed(I_p_protocol=protocol, ports=list(ports))],
+        self_link=f"{NETWORK_URL}firewalls/{name}",
+        **kwargs,
+    )
+
+
+class TestGCPFirewalls(unittest.TestCase):
+    def setUp(self):
+        response_cache.clear()
+        patcher = patch("gcp.compute.firewall_index.compute_v1.FirewallsClient")
+        self.MockFirewallsClient = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_client = self.MockFirewallsClient.return_value
+        self.mock_client.list.return_value = [
+            make_rule("allow-ssh", source_ranges=["0.0.0.0/0"]),
+            make_rule(
+                "allow-ssh-disabled", source_ranges=["0.0.0.0/0"], disabled=True
+            ),
+            make_rule(
+                "allow-https",
+                network="prod",
+                ports=["443"],
+                source_ranges=["0.0.0.0/0"],
+            ),
+            make_rule(
+                "allow-all-internal",
+                protocol="all",
+                ports=[],
+                source_ranges=["10.0.0.0/8"],
+            ),
+        ]
+
+    def tearDown(self):
+        response_cache.clear()
+
+    def test_list_firewall_rules_logic_returns_every_rule(self):
+        result = list_firewall_rules_logic("test-project")
+
+        self.assertEqual(
+            [rule.name for rule in result],
+            ["allow-ssh", "allow-ssh-disabled", "allow-https", "allow-all-internal"],
+        )
+        self.assertEqual(result[0].allowed, (Allowed("tcp", ("22",)),))
+        self.assertEqual(result[0].source_ranges, ("0.0.0.0/0",))
+
+    def test_firewall_tools_share_one_listing(self):
+        list_firewall_rules_logic("test-project")
+        list_firewall_rules_per_vpc_logic("test-project", "prod")
+        unsafe_ssh_exposure_logic("test-project")
+        describe_firewall_rule_logic("test-project", "allow-https")
+
+        self.mock_client.list.assert_called_once()
+        self.mock_client.get.assert_not_called()
+
+    def test_refresh_lists_rules_again(self):
+        list_firewall_rules_logic("test-project")
+        list_firewall_rules_logic("test-project", refresh=True)
+
+        self.assertEqual(self.mock_client.list.call_count, 2)
+
+    def test_list_firewall_rules_per_vpc_logic_filters_server_side(self):
+        self.mock_client.list.return_value = [
+            make_rule("allow-https", network="prod", ports=["443"])
+        ]
+
+        result = list_firewall_rules_per_vpc_logic("test-project", "prod")
+
+        self.assertEqual([rule.name for rule in result], ["allow-https"])
+        request = self.mock_client.list.call_args.kwargs["request"]
+        self.assertEqual(request.filter, "(network eq .*/networks/prod)")
+        self.assertEqual(request.max_results, 500)
+
+    def test_list_firewall_rules_logic_filters_a_cached_snapshot(self):
+        list_firewall_rules_logic("test-project")
+
+        enabled_ssh = list_firewall_rules_logic(
+            "test-project", direction="ingress", disabled=False, name_prefix="allow-ssh"
+        )
+        disabled = list_firewall_rules_logic("test-project", disabled=True)
+        prod = list_firewall_rules_per_vpc_logic("test-project", "prod")
+
+        self.assertEqual([rule.name for rule in enabled_ssh], ["allow-ssh"])
+        self.assertEqual([rule.name for rule in disabled], ["allow-ssh-disabled"])
+        self.assertEqual([rule.name for rule in prod], ["allow-https"])
+        self.mock_client.list.assert_called_once()
+
+    def test_unsafe_ssh_exposure_logic_skips_disabled_rules(self):
+        result = unsafe_ssh_exposure_logic("test-project")
+
+        self.assertEqual(result, [{"name": "allow-ssh", "network": "default"}])
+
+    def test_list_exposed_ports_logic(self):
+        result = list_exposed_ports_logic("test-project", [22, 443, 3389])
+
+        self.assertEqual(
+            [(entry["port"], entry["name"]) for entry in result],
+            [(22, "allow-ssh"), (443, "allow-https")],
+        )
+        self.assertEqual(result[0]["source_ranges"], ["0.0.0.0/0"])
+
+    def test_describe_firewall_rule_logic_without_snapshot_uses_get(self):
+        self.mock_client.get.return_value = make_rule("allow-ssh")
+
+        result = describe_firewall_rule_logic("test-project", "allow-ssh")
+
+        self.assertEqual(result.name, "allow-ssh")
+        self.mock_client.list.assert_not_called()
+        request = self.mock_client.get.call_args.kwargs["request"]
+        self.assertEqual(request.firewall, "allow-ssh")
+
+    def test_describe_firewall_rules_logic_lists_only_the_named_rules(self):
+        self.mock_client.list.return_value = [make_rule("allow-ssh")]
+
+        result = describe_firewall_rules_logic(
+            "test-project", ["nope", "allow-ssh", "allow-ssh"]
+        )
+
+        self.assertEqual(
+            [(entry["name"], "result" in entry) for entry in result],
+            [("nope", False), ("allow-ssh", True)],
+        )
+        self.assertTrue(result[0]["error"].startswith("NotFound"))
+        request = self.mock_client.list.call_args.kwargs["request"]
+        self.assertEqual(request.filter, r"(name eq nope|allow\-ssh)")
+        self.mock_client.get.assert_not_called()
+
+    def test_describe_firewall_rules_logic_uses_the_snapshot(self):
+        list_firewall_rules_logic("test-project")
+
+        result = describe_firewall_rules_logic(
+            "test-project", ["allow-https", "allow-ssh"]
+        )
+
+        self.assertEqual(result[0]["result"].network, NETWORK_URL + "prod")
+        self.assertEqual(result[1]["result"].name, "allow-ssh")
+        self.mock_client.list.assert_called_once()
+
+    def test_list_firewall_rules_logic_pages_through_the_snapshot(self):
+        first = list_firewall_rules_logic("test-project", page_size=3)
+        second = list_firewall_rules_logic(
+            "test-project", page_token=first["next_page_token"]
+        )
+
+        self.assertEqual(
+            [rule.name for rule in first["items"]],
+            ["allow-ssh", "allow-ssh-disabled", "allow-https"],
+        )
+        self.assertEqual(
+            [rule.name for rule in second["items"]], ["allow-all-internal"]
+        )
+        self.assertIsNone(second["next_page_token"])
+        self.mock_client.list.assert_called_once()
+
+    def test_list_firewall_rules_logic_rejects_cursors_of_changed_rules(self):
+        first = list_firewall_rules_logic("test-project", page_size=3)
+        self.mock_client.list.return_value = self.mock_client.list.return_value[1:]
+
+        unchanged = list_firewall_rules_logic(
+            "test-project", page_token=first["next_page_token"]
+        )
+        with self.assertRaises(ValueError):
+            list_firewall_rules_logic(
+                "test-project", refresh=True, page_token=first["next_page_token"]
+            )
+
+        self.assertEqual(len(unchanged["items"]), 1)
+
+    def test_list_firewall_rules_logic_permission_denied(self):
+        self.mock_client.list.side_effect = exceptions.PermissionDenied(
+            "Test permission denied"
+        )
+
+        result = list_firewall_rules_logic("test-project")
+
+        self.assertEqual(result, [])
@@ -1,9 +1,18 @@
+import asyncio
 import unittest
 from unittest.mock import MagicMock, patch
 from google.api_core import exceptions
+from structlog.testing import capture_logs
 
+from google.cloud import compute_v1
+
+from gcp.cache import response_cache
 from gcp.compute.instances import (
+    describe_gcp_instance_logic,
+    describe_gcp_instances_logic,
     list_all_instances_in_project_logic as list_all_instances_in_project,
+    list_gcp_instances,
+    list_instances_aggregated_logic,
 )
 
 
@@ -43,13 +52,13 @@ class TestGCPInstances(unittest.TestCase):
             self.assertIsInstance(result, list)
             self.assertEqual(len(result), 2)
 
-            self.assertEqual(result[0]["name"], "vm-1")
-            self.assertEqual(result[0]["status"], "RUNNING")
-            self.assertEqual(result[0]["machine_type"], "n1-standard-1")
+            self.assertEqual(result[0].name, "vm-1")
+            self.assertEqual(result[0].status, "RUNNING")
+            self.assertEqual(result[0].machine_type, "n1-standard-1")
 
-            self.assertEqual(result[1]["name"], "vm-2")
-            self.assertEqual(result[1]["status"], "STOPPED")
-            self.assertEqual(result[1]["machine_type"], "e2-medium")
+            self.assertEqual(result[1].name, "vm-2")
+            self.assertEqual(result[1].status, "STOPPED")
+            self.assertEqual(result[1].machine_type, "e2-medium")
 
             mock_client_instance.list.assert_called_once()
 
@@ -96,3 +105,267 @@ class TestGCPInstances(unittest.TestCase):
 
             self.assertIsInstance(result, list)
             self.assertEqual(result, [])
+
+    def test_list_instances_aggregated_success(self):
+        """
+        Tests that the aggregated listing walks every zone in one call and
+        tags each VM with its zone.
+        """
+        mock_instance_1 = MagicMock()
+        mock_instance_1.name = "vm-1"
+        mock_instance_1.status = "RUNNING"
+        mock_instance_1.machine_type = "zones/us-central1-a/machineTypes/e2-small"
+        mock_instance_1.fingerprint = "a1b2"
+
+        mock_instance_2 = MagicMock()
+        mock_instance_2.name = "vm-2"
+        mock_instance_2.status = "RUNNING"
+        mock_instance_2.machine_type = "zones/europe-west1-b/machineTypes/e2-medium"
+        mock_instance_2.fingerprint = "c3d4"
+
+        mock_pages = [
+            MagicMock(
+                items={
+                    "zones/us-central1-a": MagicMock(instances=[mock_instance_1]),
+                    "zones/us-east1-b": MagicMock(instances=[]),
+                }
+            ),
+            MagicMock(
+                items={"zones/europe-west1-b": MagicMock(instances=[mock_instance_2])}
+            ),
+        ]
+
+        with patch(
+            "gcp.compute.instances.compute_v1.InstancesClient"
+        ) as MockInstancesClient:
+            mock_client_instance = MockInstancesClient.return_value
+            mock_client_instance.aggregated_list.return_value.pages = iter(mock_pages)
+
+            result = list_instances_aggregated_logic(
+                "test-project", status="running", labels={"env": "prod"}
+            )
+
+            self.assertEqual(
+                [vm.to_dict() for vm in result],
+                [
+                    {
+                        "name": "vm-1",
+                        "status": "RUNNING",
+                        "machine_type": "e2-small",
+                        "zone": "us-central1-a",
+                        "fingerprint": "a1b2",
+                    },
+                    {
+                        "name": "vm-2",
+                        "status": "RUNNING",
+                        "machine_type": "e2-medium",
+                        "zone": "europe-west1-b",
+                        "fingerprint": "c3d4",
+                    },
+                ],
+            )
+
+            mock_client_instance.aggregated_list.assert_called_once()
+            request = mock_client_instance.aggregated_list.call_args.kwargs["request"]
+            self.assertEqual(request.project, "test-project")
+            self.assertEqual(
+                request.filter, "(status eq RUNNING) (labels.env eq prod)"
+            )
+            self.assertTrue(request.return_partial_success)
+
+    def test_list_instances_aggregated_fetches_one_page(self):
+        """
+        Tests that with page_size only one API page is fetched and its
+        token is handed back as an opaque cursor.
+        """
+        mock_instance = MagicMock()
+        mock_instance.name = "vm-1"
+        mock_instance.status = "RUNNING"
+        mock_instance.machine_type = "zones/us-central1-a/machineTypes/e2-small"
+
+        mock_page = MagicMock(next_page_token="api-token-2")
+        mock_page.items = {
+            "zones/us-central1-a": MagicMock(instances=[mock_instance]),
+        }
+
+        with patch(
+            "gcp.compute.instances.compute_v1.InstancesClient"
+        ) as MockInstancesClient:
+            mock_client_instance = MockInstancesClient.return_value
+            mock_client_instance.aggregated_list.return_value.pages = iter([mock_page])
+
+            first = list_instances_aggregated_logic("test-project", page_size=1)
+
+            self.assertEqual([vm.name for vm in first["items"]], ["vm-1"])
+            request = mock_client_instance.aggregated_list.call_args.kwargs["request"]
+            self.assertEqual(request.max_results, 1)
+            self.assertEqual(request.page_token, "")
+
+            mock_page.next_page_token = ""
+            mock_client_instance.aggregated_list.return_value.pages = iter([mock_page])
+
+            second = list_instances_aggregated_logic(
+                "test-project", page_token=first["next_page_token"]
+            )
+
+            request = mock_client_instance.aggregated_list.call_args.kwargs["request"]
+            self.assertEqual(request.page_token, "api-token-2")
+            self.assertEqual(request.max_results, 1)
+            self.assertIsNone(second["next_page_token"])
+
+    def test_list_instances_aggregated_reports_unreachable_zones(self):
+        page = compute_v1.InstanceAggregatedList(
+            items={
+                "zones/us-central1-a": compute_v1.InstancesScopedList(
+                    instances=[compute_v1.Instance(name="vm-1")]
+                )
+            },
+            unreachables=["zones/us-east1-b"],
+            warning=compute_v1.Warning(
+                code="UNREACHABLE",
+                data=[
+                    compute_v1.Data(key="scope", value="zones/us-east1-b"),
+                    compute_v1.Data(key="scope", value="zones/asia-east1-a"),
+                ],
+            ),
+        )
+
+        with patch(
+            "gcp.compute.instances.compute_v1.InstancesClient"
+        ) as MockInstancesClient:
+            pager = MockInstancesClient.return_value.aggregated_list.return_value
+            pager.pages = iter([page])
+            paged = list_instances_aggregated_logic("test-project", page_size=10)
+            pager.pages = iter([page])
+            with capture_logs() as logs:
+                full = list_instances_aggregated_logic("test-project")
+
+        self.assertEqual([vm.name for vm in paged["items"]], ["vm-1"])
+        self.assertEqual(paged["unreachable_zones"], ["us-east1-b", "asia-east1-a"])
+        self.assertEqual([vm.name for vm in full["items"]], ["vm-1"])
+        self.assertEqual(full["unreachable_zones"], ["us-east1-b", "asia-east1-a"])
+        warning = next(log for log in logs if log["event"] == "gcp_zones_unreachable")
+        self.assertEqual(warning["zones"], ["us-east1-b", "asia-east1-a"])
+        self.assertEqual(warning["project_id"], "test-project")
+
+    def test_incomplete_listings_are_not_cached(self):
+        page = compute_v1.InstanceAggregatedList(unreachables=["zones/us-east1-b"])
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+        with patch(
+            "gcp.compute.instances.compute_v1.InstancesClient"
+        ) as MockInstancesClient, patch(
+            "gcp.compute.instances.snapshot_rows", return_value=None
+        ):
+            aggregated_list = MockInstancesClient.return_value.aggregated_list
+            aggregated_list.side_effect = lambda request: MagicMock(pages=iter([page]))
+            for _ in range(2):
+                result = asyncio.run(list_gcp_instances.fn("test-project"))
+
+        self.assertEqual(result, {"items": [], "unreachable_zones": ["us-east1-b"]})
+        self.assertEqual(aggregated_list.call_count, 2)
+
+    def test_zonal_and_aggregated_cursors_are_not_interchangeable(self):
+        mock_page = MagicMock(next_page_token="api-token-2", items=[])
+
+        with patch(
+            "gcp.compute.instances.compute_v1.InstancesClient"
+        ) as MockInstancesClient:
+            mock_client_instance = MockInstancesClient.return_value
+            mock_client_instance.list.return_value.pages = iter([mock_page])
+
+            zonal = list_all_instances_in_project(
+                "test-project", "us-central1-a", page_size=1
+            )
+
+            with self.assertRaises(ValueError):
+                list_instances_aggregated_logic(
+                    "test-project", page_token=zonal["next_page_token"]
+                )
+
+    def test_describe_gcp_instance_with_fields(self):
+        """
+        Tests that describe converts the protobuf to a camelCase dict and
+        keeps only the requested fields.
+        """
+        instance = compute_v1.Instance(
+            name="vm-1",
+            status="RUNNING",
+            machine_type="zones/us-central1-a/machineTypes/e2-small",
+            network_interfaces=[compute_v1.NetworkInterface(network_i_p="10.0.0.2")],
+            disks=[compute_v1.AttachedDisk(boot=True)],
+        )
+
+        with patch(
+            "gcp.compute.instances.compute_v1.InstancesClient"
+        ) as MockInstancesClient:
+            mock_client_instance = MockInstancesClient.return_value
+            mock_client_instance.get.return_value = instance
+
+            result = describe_gcp_instance_logic(
+                "vm-1",
+                "test-project",
+                "us-central1-a",
+                fields=["status", "networkInterfaces.networkIP"],
+            )
+
+            self.assertEqual(
+                result,
+                {"status": "RUNNING", "networkInterfaces": [{"networkIP": "10.0.0.2"}]},
+            )
+
+    def test_describe_gcp_instances_across_zones(self):
+        """
+        Tests that one filtered aggregated list describes instances of
+        every zone, and that missing or ambiguous names are errors.
+        """
+
+        def scoped(zone, *names):
+            instances = [
+                compute_v1.Instance(name=name, status="RUNNING") for name in names
+            ]
+            return f"zones/{zone}", compute_v1.InstancesScopedList(instances=instances)
+
+        with patch(
+            "gcp.compute.instances.compute_v1.InstancesClient"
+        ) as MockInstancesClient:
+            mock_client_instance = MockInstancesClient.return_value
+            mock_client_instance.aggregated_list.return_value = [
+                scoped("us-central1-a", "vm-1", "web"),
+                scoped("europe-west1-b", "vm-2", "web"),
+            ]
+
+            result = describe_gcp_instances_logic(
+                "test-project",
+                ["vm-1", "vm-2", "web", "europe-west1-b/web", "vm-9"],
+                fields=["name", "status"],
+            )
+
+            self.assertEqual(
+                [entry["name"] for entry in result],
+                ["vm-1", "vm-2", "web", "europe-west1-b/web", "vm-9"],
+            )
+            self.assertEqual(result[3]["result"], {"name": "web", "status": "RUNNING"})
+            self.assertEqual(result[1]["result"]["name"], "vm-2")
+            self.assertTrue(result[4]["error"].startswith("NotFound"))
+            self.assertIn("zone/name", result[2]["error"])
+            mock_client_instance.aggregated_list.assert_called_once()
+            request = mock_client_instance.aggregated_list.call_args.kwargs["request"]
+            self.assertEqual(request.filter, r"(name eq vm\-1|vm\-2|web|vm\-9)")
+
+    def test_list_all_instances_in_project_filters_server_side(self):
+        with patch(
+            "gcp.compute.instances.compute_v1.InstancesClient"
+        ) as MockInstancesClient:
+            mock_client_instance = MockInstancesClient.return_value
+            mock_client_instance.list.return_value = []
+
+            list_all_instances_in_project(
+                "test-project", "us-central1-a", status="running", name_prefix="web-"
+            )
+
+            request = mock_client_instance.list.call_args.kwargs["request"]
+            self.assertEqual(request.zone, "us-central1-a")
+            self.assertEqual(request.filter, r"(status eq RUNNING) (name eq web\-.*)")
+            self.assertEqual(request.max_results, 500)
@@ -0,0 +1,366 @@
+import asyncio
+import datetime
+import unittest
+from unittest.mock import patch
+from google.cloud import compute_v1
+
+from gcp.cache import response_cache
+from gcp.cache_tools import invalidate_cache
+from gcp.compute.firewall_index import get_firewall_index
+from gcp.compute.instances import list_gcp_instances
+from gcp.inventory import store
+from gcp.inventory.collector import collect_inventory_logic
+from gcp.inventory.diff import diff_inventory_logic
+from gcp.inventory.expressions import compile_filter
+from gcp.inventory.query import QUERY_FIELDS, query_inventory_logic
+from gcp.inventory.store import InventoryStore
+from gcp.records import BucketSummary, InstanceSummary
+from gcp.storage.buckets import list_gcs_buckets
+
+
+class TestInventoryStore(unittest.TestCase):
+    def setUp(self):
+        self.inventory = InventoryStore(":memory:")
+        self.addCleanup(self.inventory.close)
+
+    def test_store_only_counts_changed_resources(self):
+        self.inventory.store(
+            "firewalls", "test-project", [{"name": "a", "priority": 1}, {"name": "b"}]
+        )
+
+        result = self.inventory.store(
+            "firewalls", "test-project", [{"name": "a", "priority": 2}, {"name": "c"}]
+        )
+
+        self.assertEqual(
+            result,
+            {
+                "kind": "firewalls",
+                "added": 1,
+                "updated": 1,
+                "removed": 1,
+                "unchanged": 0,
+            },
+        )
+        self.assertEqual(
+            self.inventory.rows("firewalls", "test-project"),
+            [{"name": "a", "priority": 2}, {"name": "c"}],
+        )
+
+    def test_unchanged_resources_are_not_rewritten(self):
+        rows = [{"name": "a", "created": datetime.datetime(2025, 1, 1)}]
+        self.inventory.store("buckets", "test-project", rows)
+
+        result = self.inventory.store("buckets", "test-project", rows)
+
+        self.assertEqual(result["unchanged"], 1)
+        self.assertEqual(
+            self.inventory.rows("buckets", "test-project"),
+            [{"name": "a", "created": "2025-01-01T00:00:00"}],
+        )
+
+    def test_api_fingerprints_decide_what_changed(self):
+        vm = {"name": "vm-1", "zone": "z", "status": "RUNNING", "fingerprint": "f1"}
+        self.inventory.store("instances", "test-project", [vm])
+
+        same_fingerprint = self.inventory.store(
+            "instances", "test-project", [{**vm, "machine_type": "e2-small"}]
+        )
+        stopped = self.inventory.store(
+            "instances", "test-project", [{**vm, "status": "TERMINATED"}]
+        )
+        updated = self.inventory.store(
+            "instances", "test-project", [{**vm, "fingerprint": "f2"}]
+        )
+
+        self.assertEqual(same_fingerprint["unchanged"], 1)
+        self.assertEqual(stopped["updated"], 1)
+        self.assertEqual(updated["updated"], 1)
+
+    def test_stale_or_missing_snapshots_are_not_returned(self):
+        self.inventory.store("firewalls", "test-project", [])
+
+        self.assertEqual(self.inventory.rows("firewalls", "test-project"), [])
+        self.assertIsNone(
+            self.inventory.rows("firewalls", "test-project", max_staleness=-1)
+        )
+        self.assertIsNone(self.inventory.rows("firewalls", "other-project"))
+
+    def test_instances_are_keyed_by_zone(self):
+        rows = [
+            {"name": "vm-1", "zone": "us-central1-a"},
+            {"name": "vm-1", "zone": "europe-west1-b"},
+        ]
+
+        result = self.inventory.store("instances", "test-project", rows)
+
+        self.assertEqual(result["added"], 2)
+
+    def test_diff_between_collections(self):
+        for collected_at, priorities in [
+            (100, {"a": 1, "b": 1}),
+            (200, {"a": 2, "c": 1}),
+            (300, {"a": 1, "c": 1, "d": 1}),
+        ]:
+            rows = [{"name": name, "priority": p} for name, p in priorities.items()]
+            with patch("gcp.inventory.store.time.time", return_value=collected_at):
+                self.inventory.store("firewalls", "test-project", rows)
+
+        self.assertEqual(
+            self.inventory.diff("firewalls", "test-project", 100, 200),
+            [
+                ("a", {"name": "a", "priority": 1}, {"name": "a", "priority": 2}),
+                ("b", {"name": "b", "priority": 1}, None),
+                ("c", None, {"name": "c", "priority": 1}),
+            ],
+        )
+        # "a" changed back, so it differs from neither end.
+        changed = self.inventory.diff("firewalls", "test-project", 100, 300)
+        self.assertEqual([key for key, _, _ in changed], ["b", "c", "d"])
+        self.assertEqual(
+            self.inventory.collections("firewalls", "test-project"), [100, 200, 300]
+        )
+
+    def test_history_older_than_retention_is_pruned(self):
+        with patch("gcp.inventory.store.time.time", return_value=100):
+            self.inventory.store("firewalls", "test-project", [{"name": "a"}])
+        with patch("gcp.inventory.store.time.time", return_value=200):
+            self.inventory.store("firewalls", "test-project", [{"name": "b"}])
+        with patch.object(store, "HISTORY_RETENTION", 50), patch(
+            "gcp.inventory.store.time.time", return_value=300
+        ):
+            self.inventory.store("firewalls", "test-project", [{"name": "b"}])
+
+        self.assertEqual(self.inventory.collections("firewalls", "test-project"), [300])
+        self.assertEqual(
+            self.inventory._connection.execute(
+                "SELECT key, collected_at FROM changes"
+            ).fetchall(),
+            [("b", 200)],
+        )
+
+
+class TestInventoryCollector(unittest.TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        self.inventory = InventoryStore(":memory:")
+        inventory_patcher = patch.object(store, "_inventory", self.inventory)
+        inventory_patcher.start()
+        self.addCleanup(inventory_patcher.stop)
+        patcher = patch("gcp.compute.firewall_index.compute_v1.FirewallsClient")
+        self.mock_client = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.mock_client.list.return_value = [
+            compute_v1.Firewall(name="allow-ssh", network="networks/default")
+        ]
+
+    def test_collected_firewalls_are_served_from_the_snapshot(self):
+        result = collect_inventory_logic("test-project", kinds=["firewalls"])
+        response_cache.clear()
+
+        index = get_firewall_index("test-project")
+
+        self.assertEqual(result[0]["added"], 1)
+        self.assertEqual(index.get("allow-ssh").network, "networks/default")
+        self.mock_client.list.assert_called_once()
+
+    def test_invalidate_cache_expires_the_snapshots(self):
+        collect_inventory_logic("test-project", kinds=["firewalls"])
+
+        result = invalidate_cache.fn(project_id="test-project")
+        get_firewall_index("test-project")
+
+        self.assertEqual(result["expired_snapshots"], 1)
+        self.assertIsNone(self.inventory.rows("firewalls", "test-project"))
+        self.assertEqual(self.mock_client.list.call_count, 2)
+
+    def test_failing_kind_keeps_its_previous_snapshot(self):
+        collect_inventory_logic("test-project", kinds=["firewalls"])
+        self.mock_client.list.side_effect = RuntimeError("API disabled")
+
+        result = collect_inventory_logic("test-project", kinds=["firewalls"])
+
+        self.assertEqual(
+            result, [{"kind": "firewalls", "error": "RuntimeError: API disabled"}]
+        )
+        self.assertEqual(len(self.inventory.rows("firewalls", "test-project")), 1)
+
+    def test_instances_are_not_stored_with_unreachable_zones(self):
+        vm = {"name": "vm-1", "zone": "z"}
+        self.inventory.store("instances", "test-project", [vm])
+        page = compute_v1.InstanceAggregatedList(unreachables=["zones/z"])
+
+        with patch("gcp.compute.instances.compute_v1.InstancesClient") as client:
+            client.return_value.aggregated_list.return_value.pages = iter([page])
+            result = collect_inventory_logic("test-project", kinds=["instances"])
+
+        self.assertEqual(
+            result[0]["error"], "RuntimeError: Zones z could not be reached"
+        )
+        self.assertEqual(len(self.inventory.rows("instances", "test-project")), 1)
+
+
+class TestQueryInventory(unittest.TestCase):
+    def setUp(self):
+        self.inventory = InventoryStore(":memory:")
+        self.addCleanup(self.inventory.close)
+        patcher = patch.object(store, "_inventory", self.inventory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_query_filters_the_snapshot(self):
+        self.inventory.store(
+            "buckets",
+            "test-project",
+            [{"name": "logs", "location": "US"}, {"name": "data", "location": "EU"}],
+        )
+
+        result = query_inventory_logic(
+            "test-project", "buckets", compile_filter("location = EU")
+        )
+
+        self.assertEqual(result, [{"name": "data", "location": "EU"}])
+
+    def test_query_hides_instance_fingerprints_and_rejects_unknown_fields(self):
+        vm = {"name": "vm-1", "zone": "z", "status": "RUNNING", "fingerprint": "f1"}
+        self.inventory.store("instances", "test-project", [vm])
+
+        result = query_inventory_logic(
+            "test-project",
+            "instances",
+            compile_filter("status = RUNNING", QUERY_FIELDS["instances"]),
+        )
+
+        self.assertEqual(result, [{"name": "vm-1", "zone": "z", "status": "RUNNING"}])
+        with self.assertRaisesRegex(ValueError, "labels"):
+            compile_filter("labels.env = prod", QUERY_FIELDS["instances"])
+
+    def test_query_flattens_iam_bindings(self):
+        policy = {
+            "bindings": [
+                {"role": "roles/owner", "members": ["user:a@example.com"]},
+                {
+                    "role": "roles/viewer",
+                    "members": ["user:b@example.com", "group:c@example.com"],
+                },
+            ]
+        }
+        self.inventory.store("iam_policy", "test-project", [policy])
+
+        result = query_inventory_logic(
+            "test-project", "iam_bindings", compile_filter("member startswith user:")
+        )
+
+        self.assertEqual(
+            result,
+            [
+                {"role": "roles/owner", "member": "user:a@example.com"},
+                {"role": "roles/viewer", "member": "user:b@example.com"},
+            ],
+        )
+
+    def test_list_tools_return_records_from_the_snapshot(self):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        vm = InstanceSummary("vm-1", "RUNNING", "e2-small", "us-central1-a", "f1")
+        bucket = BucketSummary("logs", "US", "STANDARD", None, {"env": "prod"}, None)
+        self.inventory.store("instances", "test-project", [vm.to_dict()])
+        self.inventory.store("buckets", "test-project", [bucket.to_dict()])
+
+        instances = asyncio.run(
+            list_gcp_instances.fn("test-project", zone="us-central1-a")
+        )
+        buckets = asyncio.run(list_gcs_buckets.fn("test-project"))
+
+        self.assertEqual(instances, [vm])
+        self.assertEqual(buckets, [bucket])
+
+    def test_query_without_snapshot_collects_it(self):
+        with patch.dict(
+            "gcp.inventory.query.COLLECTORS",
+            {"firewalls": lambda project_id: [{"name": "allow-ssh"}]},
+        ):
+            result = query_inventory_logic(
+                "test-project", "firewalls", compile_filter(None)
+            )
+
+        self.assertEqual(result, [{"name": "allow-ssh"}])
+        self.assertEqual(self.inventory.status()[0]["kind"], "firewalls")
+
+
+class TestDiffInventory(unittest.TestCase):
+    def setUp(self):
+        self.inventory = InventoryStore(":memory:")
+        self.addCleanup(self.inventory.close)
+        patcher = patch.object(store, "_inventory", self.inventory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def store(self, collected_at, kind, rows):
+        with patch("gcp.inventory.store.time.time", return_value=collected_at):
+            self.inventory.store(kind, "test-project", rows)
+
+    def test_modified_resources_report_the_changed_fields(self):
+        self.store(1000, "buckets", [{"name": "logs", "location": "US", "labels": {}}])
+        self.store(
+            5000, "buckets", [{"name": "logs", "location": "US", "labels": {"a": "b"}}]
+        )
+
+        with patch("gcp.inventory.store.time.time", return_value=5000):
+            result = diff_inventory_logic("test-project", ["buckets"], since=2000)
+
+        self.assertEqual(result[0]["from"], "1970-01-01T00:16:40+00:00")
+        self.assertEqual(
+            result[0]["changes"],
+            [
+                {
+                    "change": "modified",
+                    "name": "logs",
+                    "fields": {"labels": {"before": {}, "after": {"a": "b"}}},
+                }
+            ],
+        )
+
+    def test_etags_detect_changes_without_being_reported(self):
+        bucket = {"name": "logs", "location": "US", "labels": {}}
+        self.store(1000, "buckets", [{**bucket, "etag": "CAE="}])
+        self.store(2000, "buckets", [{**bucket, "etag": "CAI="}])
+        with patch("gcp.inventory.store.time.time", return_value=2000):
+            quiet = diff_inventory_logic("test-project", ["buckets"], since=1000)
+        self.store(3000, "buckets", [{**bucket, "labels": {"a": "b"}, "etag": "CAM="}])
+        with patch("gcp.inventory.store.time.time", return_value=3000):
+            labelled = diff_inventory_logic("test-project", ["buckets"], since=2000)
+
+        self.assertEqual(
+            quiet[0]["changes"], [{"change": "modified", "name": "logs", "fields": {}}]
+        )
+        self.assertEqual(
+            labelled[0]["changes"][0]["fields"],
+            {"labels": {"before": {}, "after": {"a": "b"}}},
+        )
+
+    def test_iam_policy_changes_are_bindings(self):
+        owner = {"role": "roles/owner", "members": ["user:a@example.com"]}
+        self.store(1000, "iam_policy", [{"etag": "1", "bindings": [owner]}])
+        viewer = {"role": "roles/viewer", "members": ["user:b@example.com"]}
+        self.store(2000, "iam_policy", [{"etag": "2", "bindings": [viewer]}])
+
+        with patch("gcp.inventory.store.time.time", return_value=2000):
+            result = diff_inventory_logic("test-project", ["iam_policy"], since=1500)
+
+        self.assertEqual(
+            result[0]["changes"],
+            [
+                {
+                    "change": "removed",
+                    "role": "roles/owner",
+                    "member": "user:a@example.com",
+                },
+                {
+                    "change": "added",
+                    "role": "roles/viewer",
+                    "member": "user:b@example.com",
+                },
+            ],
+        )
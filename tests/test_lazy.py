@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from benchmarks.bench_startup import DEFERRED_LIBRARIES
+from gcp import lazy
+
+
+class TestLazyImport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.directory.name, "lazy_probe.py"), "w") as f:
+            f.write("import sys\nsys.lazy_probe_executed = True\nVALUE = 42\n")
+        sys.path.insert(0, self.directory.name)
+
+    def tearDown(self):
+        sys.path.remove(self.directory.name)
+        sys.modules.pop("lazy_probe", None)
+        lazy._lazy_modules.pop("lazy_probe", None)
+        if hasattr(sys, "lazy_probe_executed"):
+            del sys.lazy_probe_executed
+        self.directory.cleanup()
+
+    def test_module_is_executed_on_first_attribute_access(self):
+        module = lazy.lazy_import("lazy_probe")
+
+        self.assertFalse(hasattr(sys, "lazy_probe_executed"))
+        self.assertFalse(lazy.is_loaded("lazy_probe"))
+        self.assertIs(lazy.lazy_import("lazy_probe"), module)
+
+        self.assertEqual(module.VALUE, 42)
+        self.assertTrue(sys.lazy_probe_executed)
+        self.assertTrue(lazy.is_loaded("lazy_probe"))
+
+    def test_warm_up_loads_pending_modules(self):
+        lazy.lazy_import("lazy_probe")
+
+        lazy.warm_up()
+
+        self.assertTrue(lazy.is_loaded("lazy_probe"))
+
+    def test_missing_module(self):
+        with self.assertRaises(ModuleNotFoundError):
+            lazy.lazy_import("no_such_module_anywhere")
+
+
+class TestServerStartup(unittest.TestCase):
+    def test_client_libraries_are_not_imported_at_startup(self):
+        # A fresh interpreter: this test process may have loaded them already.
+        code = (
+            "import main\n"
+            "from gcp import lazy\n"
+            f"print([n for n in {DEFERRED_LIBRARIES!r} if lazy.is_loaded(n)])\n"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+
+        self.assertEqual(completed.stdout.strip().splitlines()[-1], "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
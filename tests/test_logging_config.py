@@ -0,0 +1,68 @@
+import json
+import logging
+import queue
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import structlog
+
+import logging_config
+
+
+class TestSampling(unittest.TestCase):
+    def test_only_successful_sampled_events_are_dropped(self):
+        with patch.object(logging_config, "LOG_SAMPLE_RATE", 0.0):
+            with self.assertRaises(structlog.DropEvent):
+                logging_config.sample_success_events(
+                    None, "info", {"event": "gcp_call_completed", "outcome": "ok"}
+                )
+
+            for event_dict in (
+                {"event": "gcp_call_completed", "outcome": "not_found"},
+                {"event": "inventory_opened"},
+            ):
+                self.assertIs(
+                    logging_config.sample_success_events(None, "info", event_dict),
+                    event_dict,
+                )
+
+    def test_everything_is_kept_by_default(self):
+        event_dict = {"event": "gcp_call_completed", "outcome": "ok"}
+        with patch.object(logging_config, "LOG_SAMPLE_RATE", 1.0):
+            self.assertIs(
+                logging_config.sample_success_events(None, "info", event_dict),
+                event_dict,
+            )
+
+
+class TestDeferredQueueHandler(unittest.TestCase):
+    def test_records_are_queued_unformatted(self):
+        log_queue = queue.SimpleQueue()
+        handler = logging_config.DeferredQueueHandler(log_queue)
+        record = logging.LogRecord(
+            "test", logging.INFO, __file__, 1, {"event": "x"}, None, None
+        )
+
+        handler.emit(record)
+
+        self.assertEqual(log_queue.get_nowait().msg, {"event": "x"})
+
+
+class TestJsonRenderer(unittest.TestCase):
+    def test_renders_a_json_string(self):
+        rendered = logging_config.json_renderer()(None, "info", {"event": "x"})
+
+        self.assertEqual(json.loads(rendered), {"event": "x"})
+
+    def test_renders_with_orjson_when_installed(self):
+        serialize = MagicMock(side_effect=lambda data, **kwargs: json.dumps(data))
+        stub = SimpleNamespace(dumps=lambda data, **kwargs: serialize(data).encode())
+        with patch.object(logging_config, "orjson", stub):
+            rendered = logging_config.json_renderer()(None, "info", {"event": "x"})
+
+        self.assertEqual(json.loads(rendered), {"event": "x"})
+        serialize.assert_called_once_with({"event": "x"})
+
+
+if __name__ == "__main__":
+    unittest.main()
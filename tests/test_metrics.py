@@ -0,0 +1,155 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from fastmcp.exceptions import ToolError
+from google.api_core import exceptions
+
+from gcp import metrics
+from gcp.cache import cached, response_cache
+
+
+class TestCounter(unittest.TestCase):
+    def test_render_sums_per_label_set(self):
+        counter = metrics.Counter("calls_total", "Calls.", ("tool",))
+        counter.inc(tool="a")
+        counter.inc(2, tool="a")
+        counter.inc(tool='say "hi"')
+
+        self.assertEqual(counter.value(tool="a"), 3)
+        self.assertEqual(
+            counter.render(),
+            [
+                "# HELP calls_total Calls.",
+                "# TYPE calls_total counter",
+                'calls_total{tool="a"} 3',
+                'calls_total{tool="say \\"hi\\""} 1',
+            ],
+        )
+
+
+class TestHistogram(unittest.TestCase):
+    def test_render_has_cumulative_buckets_sum_and_count(self):
+        histogram = metrics.Histogram("latency", "Latency.", ("tool",), (0.1, 1))
+        for value in (0.05, 0.5, 0.7, 5):
+            histogram.observe(value, tool="a")
+
+        self.assertEqual(histogram.count(tool="a"), 4)
+        self.assertEqual(
+            histogram.render()[2:],
+            [
+                'latency_bucket{tool="a",le="0.1"} 1',
+                'latency_bucket{tool="a",le="1"} 3',
+                'latency_bucket{tool="a",le="+Inf"} 4',
+                'latency_sum{tool="a"} 6.25',
+                'latency_count{tool="a"} 4',
+            ],
+        )
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_timed_serializer_is_labelled_with_the_current_tool(self):
+        token = metrics.current_tool.set("test_serializer_tool")
+        try:
+            text = metrics.timed_serializer({"a": [1, 2]})
+        finally:
+            metrics.current_tool.reset(token)
+
+        self.assertEqual(text, '{"a":[1,2]}')
+        self.assertEqual(
+            metrics.serialization_duration.count(tool="test_serializer_tool"), 1
+        )
+
+    def test_instrument_client_counts_http_responses(self):
+        client = SimpleNamespace(_http=SimpleNamespace(hooks={"response": []}))
+        metrics.instrument_client(client, "storage")
+
+        token = metrics.current_tool.set("test_instrumented_tool")
+        try:
+            for hook in client._http.hooks["response"]:
+                hook(MagicMock())
+        finally:
+            metrics.current_tool.reset(token)
+
+        count = metrics.gcp_requests.value(
+            tool="test_instrumented_tool", service="storage"
+        )
+        self.assertEqual(count, 1)
+
+    def test_middleware_counts_outcomes_and_bytes(self):
+        middleware = metrics.MetricsMiddleware()
+        context = SimpleNamespace(message=SimpleNamespace(name="test_middleware_tool"))
+
+        async def succeed(context):
+            self.assertEqual(metrics.current_tool.get(), "test_middleware_tool")
+            return SimpleNamespace(content=[SimpleNamespace(text="héllo")])
+
+        async def fail(context):
+            raise ValueError("bad argument")
+
+        asyncio.run(middleware.on_call_tool(context, succeed))
+        with self.assertRaises(ValueError):
+            asyncio.run(middleware.on_call_tool(context, fail))
+
+        tool = "test_middleware_tool"
+        self.assertEqual(metrics.tool_calls.value(tool=tool, outcome="ok"), 1)
+        self.assertEqual(metrics.tool_calls.value(tool=tool, outcome="error"), 1)
+        self.assertEqual(metrics.response_bytes.value(tool=tool), 6)
+        self.assertEqual(metrics.errors.value(tool=tool, error="ValueError"), 1)
+        self.assertEqual(metrics.tool_duration.count(tool=tool), 2)
+        self.assertEqual(metrics.current_tool.get(), "")
+
+    def test_errors_raised_from_a_recorded_error_are_not_counted_again(self):
+        middleware = metrics.MetricsMiddleware()
+        tool = "test_exhausted_retries_tool"
+        context = SimpleNamespace(message=SimpleNamespace(name=tool))
+
+        async def fail(context):
+            try:
+                raise exceptions.ServiceUnavailable("down")
+            except exceptions.ServiceUnavailable as e:
+                metrics.record_error(e)
+                raise ToolError("Try again later.") from e
+
+        with self.assertRaises(ToolError):
+            asyncio.run(middleware.on_call_tool(context, fail))
+
+        self.assertEqual(
+            metrics.errors.value(tool=tool, error="ServiceUnavailable"), 1
+        )
+        self.assertEqual(metrics.errors.value(tool=tool, error="ToolError"), 0)
+
+
+class TestRender(unittest.TestCase):
+    def setUp(self):
+        response_cache.clear()
+
+    def tearDown(self):
+        response_cache.clear()
+
+    def test_render_includes_cache_hit_ratio(self):
+        calls = []
+
+        @cached(ttl=60)
+        def list_things_for_metrics():
+            calls.append(1)
+            return ["thing"]
+
+        list_things_for_metrics()
+        list_things_for_metrics()
+        list_things_for_metrics()
+
+        text = metrics.render()
+
+        self.assertIn("# TYPE gcp_mcp_tool_calls_total counter", text)
+        self.assertIn(
+            'gcp_mcp_cache_hits_total{cache="list_things_for_metrics"} 2', text
+        )
+        self.assertIn(
+            'gcp_mcp_cache_hit_ratio{cache="list_things_for_metrics"} 0.666667', text
+        )
+        self.assertTrue(text.endswith("\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from gcp.pagination import (
+    MAX_PAGE_SIZE,
+    clamp_page_size,
+    decode_page_token,
+    encode_page_token,
+    page_result,
+    resolve_page_size,
+)
+
+
+class TestPagination(unittest.TestCase):
+    def test_page_token_round_trip(self):
+        token = encode_page_token("firewalls", {"offset": 50})
+
+        self.assertEqual(decode_page_token("firewalls", token), {"offset": 50})
+
+    def test_missing_page_token_is_the_first_page(self):
+        self.assertEqual(decode_page_token("firewalls", None), {})
+        self.assertEqual(decode_page_token("firewalls", ""), {})
+
+    def test_page_token_from_another_listing_is_rejected(self):
+        token = encode_page_token("buckets", {"token": "abc"})
+
+        with self.assertRaises(ValueError):
+            decode_page_token("firewalls", token)
+
+    def test_malformed_page_token_is_rejected(self):
+        with self.assertRaises(ValueError):
+            decode_page_token("firewalls", "not-a-token")
+
+    def test_clamp_page_size(self):
+        self.assertEqual(clamp_page_size(0), 1)
+        self.assertEqual(clamp_page_size(20), 20)
+        self.assertEqual(clamp_page_size(10_000), MAX_PAGE_SIZE)
+
+    def test_later_pages_keep_the_page_size_of_their_cursor(self):
+        self.assertEqual(resolve_page_size(None, {}), MAX_PAGE_SIZE)
+        self.assertEqual(resolve_page_size(None, {"page_size": 20}), 20)
+        self.assertEqual(resolve_page_size(50, {"page_size": 20}), 50)
+
+    def test_last_page_has_no_next_page_token(self):
+        self.assertEqual(
+            page_result("firewalls", [1], None), {"items": [1], "next_page_token": None}
+        )
@@ -1,8 +1,17 @@
+import asyncio
 import unittest
 from unittest.mock import MagicMock, patch
 from google.api_core import exceptions
 
-from gcp.iam.policy import list_project_iam_logic
+from google.iam.v1 import policy_pb2
+
+from gcp.cache import response_cache
+from gcp.iam.policy import (
+    find_project_owners_logic,
+    get_effective_iam_policy,
+    get_project_policy,
+    list_project_iam_logic,
+)
 
 
 class TestGCPIAMPolicy(unittest.TestCase):
@@ -44,3 +53,87 @@ class TestGCPIAMPolicy(unittest.TestCase):
 
         self.assertIsInstance(result, list)
         self.assertEqual(result, [])
+
+    @patch("gcp.iam.policy.resourcemanager_v3.ProjectsClient")
+    def test_get_project_policy_fetches_once(self, MockProjectsClient):
+        """
+        Tests that the IAM analysis tools share one policy fetch per project.
+        """
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        mock_client_instance = MockProjectsClient.return_value
+        mock_client_instance.get_iam_policy.return_value = policy_pb2.Policy(
+            bindings=[policy_pb2.Binding(role="roles/owner", members=["user:a@x.com"])]
+        )
+
+        first = get_project_policy("test-project")
+        second = get_project_policy("test-project")
+
+        self.assertEqual(
+            first, {"bindings": [{"role": "roles/owner", "members": ["user:a@x.com"]}]}
+        )
+        self.assertIs(first, second)
+        mock_client_instance.get_iam_policy.assert_called_once()
+
+    @patch("gcp.iam.policy.resourcemanager_v3.ProjectsClient")
+    def test_find_project_owners_logic_returns_plain_members(self, MockProjectsClient):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        mock_client_instance = MockProjectsClient.return_value
+        mock_client_instance.get_iam_policy.return_value = policy_pb2.Policy(
+            bindings=[
+                policy_pb2.Binding(
+                    role="roles/owner", members=["user:b@x.com", "user:a@x.com"]
+                ),
+                policy_pb2.Binding(role="roles/viewer", members=["user:c@x.com"]),
+            ]
+        )
+
+        result = find_project_owners_logic("test-project")
+
+        self.assertEqual(result, ["user:a@x.com", "user:b@x.com"])
+        request = mock_client_instance.get_iam_policy.call_args.kwargs["request"]
+        self.assertEqual(request.options.requested_policy_version, 3)
+
+    @patch("gcp.iam.policy.resourcemanager_v3.OrganizationsClient")
+    @patch("gcp.iam.policy.resourcemanager_v3.FoldersClient")
+    @patch("gcp.iam.policy.resourcemanager_v3.ProjectsClient")
+    def test_get_effective_iam_policy_includes_inherited_bindings(
+        self, MockProjectsClient, MockFoldersClient, MockOrganizationsClient
+    ):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        projects_client = MockProjectsClient.return_value
+        projects_client.get_project.return_value.parent = "folders/1"
+        projects_client.get_iam_policy.return_value = policy_pb2.Policy(
+            bindings=[policy_pb2.Binding(role="roles/viewer", members=["user:a@x.com"])]
+        )
+        folders_client = MockFoldersClient.return_value
+        folders_client.get_folder.return_value.parent = "organizations/2"
+        folders_client.get_iam_policy.side_effect = exceptions.PermissionDenied(
+            "Test permission denied"
+        )
+        MockOrganizationsClient.return_value.get_iam_policy.return_value = (
+            policy_pb2.Policy(
+                bindings=[
+                    policy_pb2.Binding(role="roles/owner", members=["user:a@x.com"])
+                ]
+            )
+        )
+
+        result = asyncio.run(
+            get_effective_iam_policy.fn("test-project", principal="a@x.com")
+        )
+
+        self.assertEqual(
+            result["ancestry"],
+            ["projects/test-project", "folders/1", "organizations/2"],
+        )
+        self.assertEqual(
+            [(binding["resource"], binding["role"]) for binding in result["bindings"]],
+            [
+                ("projects/test-project", "roles/viewer"),
+                ("organizations/2", "roles/owner"),
+            ],
+        )
+        self.assertEqual(result["errors"][0]["resource"], "folders/1")
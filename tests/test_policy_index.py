@@ -0,0 +1,95 @@
+import unittest
+
+from gcp.iam.policy_index import IamIndex, member_domain
+
+POLICIES = {
+    "prod": {
+        "bindings": [
+            {
+                "role": "roles/owner",
+                "members": ["user:alice@example.com", "user:eve@gmail.com"],
+            },
+            {
+                "role": "roles/editor",
+                "members": [
+                    "serviceAccount:ci@prod.iam.gserviceaccount.com",
+                    "group:ops@eng.example.com",
+                ],
+            },
+            {
+                "role": "roles/storage.admin",
+                "members": ["user:Alice@example.com", "domain:partner.io"],
+                "condition": {"title": "expires", "expression": "true"},
+            },
+        ]
+    },
+    "dev": {
+        "bindings": [
+            {
+                "role": "roles/editor",
+                "members": ["serviceAccount:ci@prod.iam.gserviceaccount.com"],
+            }
+        ]
+    },
+}
+
+
+class TestIamIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = IamIndex(POLICIES)
+
+    def test_member_domain(self):
+        self.assertEqual(member_domain("user:a@Example.com"), "example.com")
+        self.assertEqual(member_domain("domain:partner.io"), "partner.io")
+        self.assertEqual(
+            member_domain("deleted:user:a@old.com?uid=123"), "old.com"
+        )
+        self.assertIsNone(member_domain("allUsers"))
+
+    def test_service_accounts_with_editor(self):
+        result = self.index.query(role="roles/editor", member_type="serviceAccount")
+
+        self.assertEqual(
+            [(binding.scope, binding.member) for binding in result],
+            [
+                ("dev", "serviceAccount:ci@prod.iam.gserviceaccount.com"),
+                ("prod", "serviceAccount:ci@prod.iam.gserviceaccount.com"),
+            ],
+        )
+
+    def test_primitive_roles(self):
+        result = self.index.query(primitive_roles_only=True, domain="example.com")
+
+        self.assertEqual(
+            [binding.member for binding in result], ["user:alice@example.com"]
+        )
+
+    def test_roles_of_a_principal_keep_conditions(self):
+        result = self.index.query(principal="alice@example.com")
+
+        self.assertEqual(
+            [binding.role for binding in result],
+            ["roles/owner", "roles/storage.admin"],
+        )
+        self.assertEqual(result[1].condition["title"], "expires")
+        self.assertEqual(
+            self.index.as_dicts(result[1:]),
+            [
+                {
+                    "project_id": "prod",
+                    "role": "roles/storage.admin",
+                    "member": "user:Alice@example.com",
+                    "condition": result[1].condition,
+                }
+            ],
+        )
+        self.assertEqual(
+            self.index.roles_by_principal(principal="user:eve@gmail.com"),
+            {"user:eve@gmail.com": {"prod": ["roles/owner"]}},
+        )
+
+    def test_external_domains(self):
+        self.assertEqual(
+            self.index.external_domains(["example.com"]),
+            {"gmail.com": ["user:eve@gmail.com"], "partner.io": ["domain:partner.io"]},
+        )
@@ -0,0 +1,134 @@
+import copy
+import json
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pydantic_core
+from google.cloud import compute_v1
+
+from gcp.records import BucketSummary, FirewallRule, IamBinding, InstanceSummary
+
+
+class TestRecords(unittest.TestCase):
+    def test_firewall_rule_from_proto_serializes_like_a_dict(self):
+        proto = compute_v1.Firewall(
+            name="allow-ssh",
+            network="global/networks/default",
+            direction="INGRESS",
+            allowed=[compute_v1.Allowed(I_p_protocol="tcp", ports=["22"])],
+            source_ranges=["0.0.0.0/0"],
+            priority=1000,
+        )
+
+        rule = FirewallRule.from_proto(proto)
+
+        self.assertEqual(
+            json.loads(pydantic_core.to_json(rule)),
+            {
+                "name": "allow-ssh",
+                "network": "global/networks/default",
+                "direction": "INGRESS",
+                "allowed": [{"ip_protocol": "tcp", "ports": ["22"]}],
+                "source_ranges": ["0.0.0.0/0"],
+                "source_tags": [],
+                "source_service_accounts": [],
+                "target_tags": [],
+                "destination_ranges": [],
+                "disabled": False,
+                "priority": 1000,
+                "self_link": "",
+            },
+        )
+        self.assertEqual(FirewallRule.from_dict(rule.to_dict()), rule)
+        with self.assertRaises(AttributeError):
+            rule.__dict__
+
+    def test_instance_summary(self):
+        proto = compute_v1.Instance(
+            name="vm-1",
+            status="RUNNING",
+            machine_type="zones/us-central1-a/machineTypes/e2-small",
+            fingerprint="a1b2",
+        )
+        mock = MagicMock(machine_type="e2-small", status="RUNNING", fingerprint="a1b2")
+        mock.name = "vm-1"
+
+        expected = InstanceSummary(
+            "vm-1", "RUNNING", "e2-small", "us-central1-a", "a1b2"
+        )
+        self.assertEqual(InstanceSummary.from_proto(proto, "us-central1-a"), expected)
+        self.assertEqual(InstanceSummary.from_proto(mock, "us-central1-a"), expected)
+
+    def test_bucket_summary(self):
+        bucket = MagicMock(
+            location="EU",
+            storage_class="STANDARD",
+            time_created=datetime(2024, 1, 2, tzinfo=timezone.utc),
+            labels={"env": "prod"},
+            self_link="https://storage/b/data",
+            etag="CAE=",
+        )
+        bucket.name = "data"
+
+        summary = BucketSummary.from_bucket(bucket)
+
+        self.assertEqual(summary.created, "2024-01-02T00:00:00Z")
+        self.assertEqual(
+            json.loads(pydantic_core.to_json(summary))["created"],
+            "2024-01-02T00:00:00Z",
+        )
+        self.assertEqual(summary.etag, "CAE=")
+        self.assertEqual(summary.to_dict()["labels"], {"env": "prod"})
+
+    def test_iam_binding_to_dict(self):
+        binding = IamBinding("folders/1", "roles/owner", "user:a@example.com")
+        conditional = IamBinding(
+            "p", "roles/viewer", "user:a@example.com", {"title": "expires"}
+        )
+
+        self.assertEqual(
+            binding.to_dict("resource"),
+            {
+                "resource": "folders/1",
+                "role": "roles/owner",
+                "member": "user:a@example.com",
+            },
+        )
+        self.assertEqual(conditional.to_dict()["condition"], {"title": "expires"})
+
+    def test_mapping_fields_are_frozen(self):
+        labels = {"env": "prod"}
+        bucket = BucketSummary("data", "EU", "STANDARD", None, labels, None)
+        binding = IamBinding("p", "roles/viewer", "user:a@example.com", labels)
+        labels["env"] = "dev"
+
+        for mapping in (bucket.labels, binding.condition):
+            self.assertEqual(mapping, {"env": "prod"})
+            with self.assertRaises(TypeError):
+                mapping["env"] = "dev"
+            with self.assertRaises(TypeError):
+                mapping.update(env="dev")
+        self.assertEqual(copy.deepcopy(bucket), bucket)
+        self.assertEqual(
+            json.loads(pydantic_core.to_json(bucket))["labels"], {"env": "prod"}
+        )
+
+    def test_records_round_trip_through_dicts(self):
+        instance = InstanceSummary(
+            "vm-1", "RUNNING", "e2-small", "us-central1-a", "a1"
+        )
+        bucket = BucketSummary(
+            "data", "EU", "STANDARD", "2024-01-02T00:00:00Z", {"env": "prod"}, None
+        )
+
+        self.assertEqual(InstanceSummary.from_dict(instance.to_dict()), instance)
+        self.assertEqual(BucketSummary.from_dict(bucket.to_dict()), bucket)
+        self.assertEqual(
+            BucketSummary.from_dict({"name": "logs"}),
+            BucketSummary("logs", None, None, None, {}, None),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
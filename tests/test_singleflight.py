@@ -0,0 +1,63 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from gcp.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow_call(self, value):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def coalesced(self, key):
+        return self.flight.stats().get(key[0], {}).get("coalesced", 0)
+
+    def run_concurrently(self, key, value, callers=4):
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            leader = pool.submit(self.flight.do, key, self.slow_call, value)
+            self.started.wait(5)
+            followers = [
+                pool.submit(self.flight.do, key, self.slow_call, value)
+                for _ in range(callers - 1)
+            ]
+            # Followers are queued on the in-flight call before it returns.
+            while self.coalesced(key) < len(followers):
+                time.sleep(0.01)
+            self.release.set()
+            return [leader, *followers]
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        futures = self.run_concurrently(("list", ("p",)), ["rule"])
+
+        self.assertEqual([future.result() for future in futures], [["rule"]] * 4)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(
+            self.flight.stats(), {"list": {"executed": 1, "coalesced": 3}}
+        )
+
+    def test_errors_are_shared_by_every_waiter(self):
+        futures = self.run_concurrently(("list", ("p",)), RuntimeError("boom"), 2)
+
+        for future in futures:
+            with self.assertRaisesRegex(RuntimeError, "boom"):
+                future.result()
+
+    def test_sequential_calls_are_not_coalesced(self):
+        self.release.set()
+
+        self.flight.do(("list", ("p",)), self.slow_call, 1)
+        self.flight.do(("list", ("p",)), self.slow_call, 2)
+
+        self.assertEqual(self.calls, 2)
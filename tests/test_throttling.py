@@ -0,0 +1,114 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from fastmcp.exceptions import ToolError
+from google.api_core import exceptions
+
+from gcp import throttling
+from gcp.throttling import TokenBucket, throttle_client, throttled
+from gcp.utils import handle_gcp_exceptions
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_acquire_waits_once_the_burst_is_spent(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+
+        waits = [bucket.acquire() for _ in range(4)]
+
+        self.assertEqual(waits, [0.0, 0.0, 0.5, 0.5])
+        self.assertEqual(clock.now, 1.0)
+
+    def test_rate_halves_on_throttling_and_recovers(self):
+        bucket = TokenBucket(rate=10, min_rate=1)
+
+        bucket.throttled()
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 2.5)
+
+        for _ in range(20):
+            bucket.succeeded()
+        self.assertEqual(bucket.rate, 10)
+
+
+@patch("gcp.throttling.time.sleep")
+class TestThrottled(unittest.TestCase):
+    def test_retries_transient_errors(self, mock_sleep):
+        outcomes = [exceptions.ServiceUnavailable("down"), "ok"]
+
+        @throttled("compute")
+        def call():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(call(), "ok")
+        mock_sleep.assert_called_once()
+
+    def test_gives_up_after_the_deadline(self, mock_sleep):
+        @throttled("compute", deadline=0)
+        def call():
+            raise exceptions.TooManyRequests("slow down")
+
+        with self.assertRaises(exceptions.TooManyRequests):
+            call()
+
+    def test_does_not_retry_other_errors(self, mock_sleep):
+        calls = []
+
+        @throttled("storage")
+        def call():
+            calls.append(1)
+            raise exceptions.PermissionDenied("no")
+
+        with self.assertRaises(exceptions.PermissionDenied):
+            call()
+        self.assertEqual(len(calls), 1)
+
+    def test_handle_gcp_exceptions_reports_exhausted_retries(self, mock_sleep):
+        @handle_gcp_exceptions
+        @throttled("resourcemanager", deadline=0)
+        def list_things_logic():
+            raise exceptions.ResourceExhausted("quota")
+
+        with self.assertRaisesRegex(ToolError, "Try again later"):
+            list_things_logic()
+
+    def test_each_further_request_of_a_call_takes_a_token(self, mock_sleep):
+        client = SimpleNamespace(_http=SimpleNamespace(hooks={"response": []}))
+        bucket = MagicMock(acquire=MagicMock(return_value=0.0))
+
+        with patch.dict(throttling.rate_limiters, {"storage": bucket}):
+            throttle_client(client, "storage")
+            (hook,) = client._http.hooks["response"]
+
+            @throttled("storage")
+            def list_pages(pages):
+                for _ in range(pages):
+                    hook(MagicMock())
+
+            list_pages(3)
+            self.assertEqual(bucket.acquire.call_count, 3)
+
+            hook(MagicMock())
+            self.assertEqual(bucket.acquire.call_count, 4)
+
+    def test_retry_deadlines_are_per_service(self, mock_sleep):
+        with patch.dict(
+            "os.environ",
+            {"GCP_MCP_RETRY_DEADLINE": "30", "GCP_MCP_RETRY_DEADLINE_STORAGE": "5"},
+        ), patch("gcp.throttling.RETRY_DEADLINE", 30.0):
+            self.assertEqual(throttling._service_deadline("storage"), 5.0)
+            self.assertEqual(throttling._service_deadline("compute"), 30.0)
@@ -0,0 +1,112 @@
+import json
+import unittest
+from google.api_core import exceptions
+from structlog.testing import capture_logs
+
+from gcp.utils import (
+    fit_to_budget,
+    handle_gcp_exceptions,
+    project_fields,
+    top_level_fields,
+)
+
+INSTANCE = {
+    "name": "vm-1",
+    "status": "RUNNING",
+    "labels": {"env": "prod"},
+    "networkInterfaces": [
+        {"networkIP": "10.0.0.2", "accessConfigs": [{"natIP": "1.2.3.4"}]},
+        {"networkIP": "10.0.1.2"},
+    ],
+    "metadata": {"items": [{"key": "startup-script", "value": "x" * 500}]},
+}
+
+
+class TestProjectFields(unittest.TestCase):
+    def test_project_fields_without_fields_returns_everything(self):
+        self.assertIs(project_fields(INSTANCE, None), INSTANCE)
+
+    def test_project_fields_with_presets_and_dotted_paths(self):
+        result = project_fields(
+            INSTANCE,
+            ["basic", "networkInterfaces.networkIP", "missing"],
+            presets={"basic": ["name", "status"]},
+        )
+
+        self.assertEqual(
+            result,
+            {
+                "name": "vm-1",
+                "status": "RUNNING",
+                "networkInterfaces": [
+                    {"networkIP": "10.0.0.2"},
+                    {"networkIP": "10.0.1.2"},
+                ],
+            },
+        )
+
+    def test_top_level_fields(self):
+        self.assertEqual(
+            top_level_fields(
+                ["basic", "networkInterfaces.networkIP", "name"],
+                presets={"basic": ["name", "status"]},
+            ),
+            ["name", "status", "networkInterfaces"],
+        )
+
+
+class TestFitToBudget(unittest.TestCase):
+    def test_fit_to_budget_keeps_small_payloads(self):
+        self.assertIs(fit_to_budget(INSTANCE, 10_000), INSTANCE)
+        self.assertIs(fit_to_budget(INSTANCE, None), INSTANCE)
+
+    def test_fit_to_budget_drops_largest_fields_first(self):
+        result = fit_to_budget(INSTANCE, 300)
+
+        self.assertEqual(result["_truncated_fields"], ["metadata"])
+        self.assertEqual(result["name"], "vm-1")
+        self.assertLessEqual(len(json.dumps(result)), 300)
+
+    def test_fit_to_budget_counts_the_truncation_marker(self):
+        size = len(json.dumps(INSTANCE))
+        for max_bytes in range(1, size):
+            result = fit_to_budget(INSTANCE, max_bytes)
+            if set(result) != {"name", "_truncated_fields"}:
+                self.assertLessEqual(len(json.dumps(result)), max_bytes)
+
+    def test_fit_to_budget_never_drops_the_name(self):
+        result = fit_to_budget(INSTANCE, 1)
+
+        self.assertEqual(list(result), ["name", "_truncated_fields"])
+
+
+class TestHandleGcpExceptions(unittest.TestCase):
+    def test_each_call_logs_one_completion_event_with_its_outcome(self):
+        @handle_gcp_exceptions
+        def list_things(project_id):
+            if project_id == "missing":
+                raise exceptions.NotFound("no such project")
+            return ["thing"]
+
+        with capture_logs() as logs:
+            self.assertEqual(list_things("p"), ["thing"])
+            self.assertEqual(list_things("missing"), [])
+
+        completed = [log for log in logs if log["event"] == "gcp_call_completed"]
+        self.assertEqual([log["outcome"] for log in completed], ["ok", "not_found"])
+        self.assertEqual(completed[0]["project_id"], "p")
+        self.assertNotIn("args", completed[0])
+        self.assertIsInstance(completed[0]["duration_ms"], float)
+
+    def test_completion_event_logs_only_the_resource_arguments(self):
+        @handle_gcp_exceptions
+        def describe_things_logic(project_id, names, fields=None, zone=None):
+            return []
+
+        with capture_logs() as logs:
+            describe_things_logic("p", ["a"] * 1000, zone="us-central1-a")
+
+        (completed,) = [log for log in logs if log["event"] == "gcp_call_completed"]
+        self.assertEqual(completed["project_id"], "p")
+        self.assertEqual(completed["zone"], "us-central1-a")
+        self.assertNotIn("names", completed)